@@ -0,0 +1,66 @@
+"""
+Compare the real-time factor of the transcription backends.
+
+Each file is decoded to 16 kHz PCM once, then transcribed by every backend
+on the same samples. The real-time factor is transcription time divided by
+audio duration (lower is faster; 0.1 means ten times faster than real time).
+
+Usage:
+    python scripts/benchmark_transcription.py clip.mp4 [clip2.mp4 ...]
+        [--backends whisper faster-whisper] [--model base] [--threads 4]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.audio import decode_pcm, SAMPLE_RATE
+from src.transcription_backends import BACKENDS, create_backend
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('files', nargs='+', help="Audio or video files")
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument('--model', default='base')
+    parser.add_argument('--threads', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--device', default='cpu')
+    parser.add_argument('--compute-type', default=None, help="e.g. int8, int8_float32, float32")
+    parser.add_argument('--language', default=None)
+    args = parser.parse_args()
+
+    # Writable copies, as the workers' copy-on-write maps are
+    audio = [(path, decode_pcm(path).copy()) for path in args.files]
+    audio = [(path, pcm) for path, pcm in audio if len(pcm)]
+    total = sum(len(pcm) for _, pcm in audio) / SAMPLE_RATE
+    if not audio:
+        sys.exit("None of the files has an audio track")
+    options = {'language': args.language} if args.language else {}
+
+    print(f"{len(audio)} file(s), {total:.1f}s of audio, model {args.model}, {args.threads} thread(s)")
+    print(f"{'backend':<16}{'precision':<12}{'load s':>8}{'transcribe s':>14}{'RTF':>8}")
+    for name in args.backends:
+        backend = create_backend(name, args.model, args.device, args.threads, args.compute_type)
+        try:
+            start = time.perf_counter()
+            backend.load()
+            loaded = time.perf_counter() - start
+        except ImportError as e:
+            print(f"{name:<16}not installed ({str(e)})")
+            continue
+
+        # One untimed pass so lazy initialization is not counted
+        backend.transcribe(audio[0][1][:SAMPLE_RATE], options)
+
+        start = time.perf_counter()
+        for _, pcm in audio:
+            backend.transcribe(pcm, options)
+        elapsed = time.perf_counter() - start
+
+        precision = backend.compute_type or ('fp16' if backend.device == 'cuda' else 'fp32')
+        print(f"{name:<16}{precision:<12}{loaded:>8.2f}{elapsed:>14.2f}{elapsed / total:>8.3f}")
+
+if __name__ == "__main__":
+    main()
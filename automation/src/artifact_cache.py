@@ -0,0 +1,201 @@
+"""
+Content-addressed artifact cache for TikTok content automation.
+
+Stage outputs are stored under a key derived from the hash of the stage input
+and the parameters that affect the output. Byte-identical inputs processed
+with the same settings are served from disk instead of being recomputed. The
+cache is bounded by total size and evicts least recently used entries.
+
+The total is counted once and then kept up to date as entries are written,
+so the cache directory is only scanned again when it may be over its limit.
+Other instances sharing the directory are counted at that scan.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+class ArtifactCache:
+    def __init__(self, cache_dir: str, max_size_mb: float = 10240):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding cached artifacts
+            max_size_mb: Total size the cache may grow to before eviction
+        """
+        self.logger = logging.getLogger(__name__)
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self._size: Optional[int] = None
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'ArtifactCache':
+        """Create the cache described by the 'cache' section of the config."""
+        settings = config.get('cache', {})
+        cache_dir = Path(__file__).resolve().parent.parent / settings.get('dir', 'cache')
+        return cls(str(cache_dir), settings.get('max_size_mb', 10240))
+
+    @staticmethod
+    def make_key(stage: str, input_hash: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Build a cache key from a stage name, input hash and stage parameters.
+
+        Args:
+            stage: Name of the stage producing the artifact
+            input_hash: Hash of the stage input
+            params: Settings that change the output (must be JSON-serializable)
+        """
+        payload = json.dumps(
+            {'stage': stage, 'input': input_hash, 'params': params or {}},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def restore(self, key: str, dest_path: str) -> bool:
+        """
+        Copy a cached artifact to dest_path.
+
+        Returns:
+            True on a cache hit, False if the key is not cached
+        """
+        entry = self._entry_path(key)
+        if not entry.exists():
+            return False
+
+        try:
+            self._atomic_copy(entry, Path(dest_path))
+            self._touch(entry)
+            return True
+        except OSError as e:
+            self.logger.error(f"Error restoring cached artifact {key}: {str(e)}")
+            return False
+
+    def store(self, key: str, source_path: str, move: bool = False) -> None:
+        """
+        Copy an artifact into the cache under key.
+
+        Args:
+            move: Move source_path into the cache instead of copying it; it
+                should be on the same filesystem, e.g. a temporary file in cache_dir
+        """
+        try:
+            entry = self._entry_path(key)
+            previous = self._size_of(entry)
+            if move:
+                entry.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(source_path, entry)
+            else:
+                self._atomic_copy(Path(source_path), entry)
+            self._written(entry, previous)
+        except OSError as e:
+            self.logger.error(f"Error caching artifact {source_path}: {str(e)}")
+
+    def path(self, key: str) -> Optional[str]:
+        """Return the cached file for key, to be read in place (e.g. memory-mapped), or None on a miss."""
+        entry = self._entry_path(key)
+        if not entry.exists():
+            return None
+
+        self._touch(entry)
+        return str(entry)
+
+    def get_json(self, key: str) -> Optional[Any]:
+        """Return a cached JSON value, or None on a miss."""
+        entry = self._entry_path(key)
+        try:
+            with open(entry, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        self._touch(entry)
+        return value
+
+    def put_json(self, key: str, value: Any) -> None:
+        """Cache a JSON-serializable value under key."""
+        entry = self._entry_path(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            previous = self._size_of(entry)
+            fd, tmp_path = tempfile.mkstemp(dir=entry.parent, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(value, f)
+            os.replace(tmp_path, entry)
+            self._written(entry, previous)
+        except OSError as e:
+            self.logger.error(f"Error caching value {key}: {str(e)}")
+
+    def evict(self) -> None:
+        """Delete least recently used entries until the cache fits max_size_mb."""
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob('*/*'):
+            if path.suffix == '.tmp':
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total -= size
+                self.logger.info(f"Evicted cached artifact {path.name}")
+                if total <= self.max_bytes:
+                    break
+        self._size = total
+
+    def _written(self, entry: Path, previous: int) -> None:
+        """Count an entry that replaced one of previous bytes, evicting once the total is over the limit."""
+        if self._size is None:
+            # First write: the scan counts every entry, this one included
+            self.evict()
+            return
+
+        self._size += self._size_of(entry) - previous
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _size_of(self, entry: Path) -> int:
+        """Size of an entry in bytes, 0 if it does not exist."""
+        try:
+            return entry.stat().st_size
+        except OSError:
+            return 0
+
+    def _entry_path(self, key: str) -> Path:
+        """Return where the artifact for key is stored."""
+        return self.cache_dir / key[:2] / key
+
+    def _touch(self, entry: Path) -> None:
+        """Mark an entry as recently used."""
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+
+    def _atomic_copy(self, source: Path, dest: Path) -> None:
+        """Copy source to dest without ever exposing a partial file at dest."""
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=dest.parent, suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, dest)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
@@ -0,0 +1,188 @@
+"""
+Decoded audio for TikTok content automation.
+
+The audio track of a video is decoded once to 16 kHz mono float32 PCM, the
+format Whisper works on, and kept in the artifact cache as a .npy file.
+Transcription, language detection and silence analysis memory-map that file
+and slice it without copying or decoding the video again; worker processes
+receive a small PcmRef instead of the samples. A video without an audio
+track decodes to no samples and gets an empty transcript without the model.
+
+Audio fingerprints identify the same sound in differently encoded files: the
+sign of the change in energy difference between neighbouring frequency bands
+from one frame to the next gives 32 bits per frame, which survive
+re-encoding, resampling and volume changes far better than the samples do.
+"""
+
+import os
+import logging
+import tempfile
+import subprocess
+from typing import NamedTuple, Optional
+import numpy as np
+from .artifact_cache import ArtifactCache
+from .utils import file_checksum
+
+SAMPLE_RATE = 16000
+
+# Fingerprint frames (samples at SAMPLE_RATE) and frequency bands (Hz)
+FINGERPRINT_FRAME = 2048
+FINGERPRINT_HOP = 1024
+FINGERPRINT_BANDS = np.geomspace(300, 2000, 34)
+
+class PcmRef(NamedTuple):
+    """A range of cached PCM samples, cheap to send to another process."""
+    path: str
+    start: int = 0
+    end: Optional[int] = None
+
+    def load(self) -> np.ndarray:
+        """
+        Memory-map the samples of the range.
+
+        The mapping is copy-on-write, so consumers that need a writable array
+        (torch.from_numpy) get one without copying the file.
+        """
+        return np.load(self.path, mmap_mode='c')[self.start:self.end]
+
+    def slice(self, start: int, end: Optional[int] = None) -> 'PcmRef':
+        """Refer to samples start:end of this range."""
+        first = self.start + start
+        last = self.start + end if end is not None else self.end
+        if self.end is not None and last is not None:
+            last = min(last, self.end)
+        return PcmRef(self.path, first, last)
+
+class AudioStore:
+    def __init__(self, cache: ArtifactCache, sample_rate: int = SAMPLE_RATE):
+        """
+        Keep decoded PCM in the artifact cache.
+
+        Args:
+            cache: Cache the .npy files are stored in (and evicted from)
+            sample_rate: Sample rate to decode to
+        """
+        self.logger = logging.getLogger(__name__)
+        self.cache = cache
+        self.sample_rate = sample_rate
+
+    def extract(self, video_path: str, input_hash: Optional[str] = None) -> PcmRef:
+        """
+        Return the PCM of a video, decoding it on the first request.
+
+        Args:
+            video_path: Video (or audio) file
+            input_hash: Checksum of video_path, if the caller already has it
+
+        Raises:
+            IOError: If the file cannot be decoded
+        """
+        key = self.cache.make_key(
+            'pcm', input_hash or file_checksum(video_path), {'sample_rate': self.sample_rate}
+        )
+        path = self.cache.path(key)
+        if path is not None:
+            return PcmRef(path)
+
+        pcm = decode_pcm(video_path, self.sample_rate)
+
+        # Written next to the entries so the cache can move it into place
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, pcm)
+            self.cache.store(key, tmp_path, move=True)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+        path = self.cache.path(key)
+        if path is None:
+            raise IOError(f"Error caching audio of {video_path}")
+        return PcmRef(path)
+
+    def load(self, video_path: str, input_hash: Optional[str] = None) -> np.ndarray:
+        """Return the PCM of a video as a memory-mapped array."""
+        return self.extract(video_path, input_hash).load()
+
+def decode_pcm(path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode the first audio track of a file to mono float32 PCM.
+
+    Files without an audio track decode to an empty array.
+
+    Raises:
+        IOError: If FFmpeg fails for any other reason
+    """
+    command = [
+        'ffmpeg', '-nostdin', '-loglevel', 'error',
+        '-i', path,
+        '-map', '0:a:0?', '-vn', '-sn', '-dn',
+        '-ac', '1', '-ar', str(sample_rate),
+        '-f', 'f32le', '-'
+    ]
+    result = subprocess.run(command, capture_output=True)
+    if result.returncode != 0:
+        error = result.stderr.decode(errors='ignore').strip()
+        if 'does not contain any stream' in error:
+            return np.empty(0, dtype=np.float32)
+        raise IOError(f"Error decoding audio of {path}: {error}")
+
+    return np.frombuffer(result.stdout, dtype=np.float32)
+
+def fingerprint(pcm: np.ndarray, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Compute the fingerprint of mono PCM.
+
+    Returns:
+        One uint32 of sub-fingerprint bits per hop (64 ms at 16 kHz), empty for
+        audio shorter than two frames
+    """
+    count = 1 + (len(pcm) - FINGERPRINT_FRAME) // FINGERPRINT_HOP if len(pcm) >= FINGERPRINT_FRAME else 0
+    if count < 2:
+        return np.empty(0, dtype=np.uint32)
+
+    # Bin-to-band matrix, so band energies are one matrix product per block
+    frequencies = np.fft.rfftfreq(FINGERPRINT_FRAME, 1 / sample_rate)
+    bands = np.digitize(frequencies, FINGERPRINT_BANDS) - 1
+    bins = len(FINGERPRINT_BANDS) - 1
+    membership = np.zeros((len(frequencies), bins), dtype=np.float32)
+    inside = (bands >= 0) & (bands < bins)
+    membership[np.flatnonzero(inside), bands[inside]] = 1
+
+    window = np.hanning(FINGERPRINT_FRAME).astype(np.float32)
+    frames = np.lib.stride_tricks.sliding_window_view(pcm, FINGERPRINT_FRAME)[::FINGERPRINT_HOP][:count]
+    energies = np.empty((count, bins), dtype=np.float32)
+    for first in range(0, count, 4096):
+        spectrum = np.abs(np.fft.rfft(frames[first:first + 4096] * window, axis=1)) ** 2
+        energies[first:first + 4096] = spectrum.astype(np.float32) @ membership
+
+    difference = energies[:, :-1] - energies[:, 1:]
+    bits = (difference[1:] - difference[:-1]) > 0
+
+    # Near-silent frames would only encode the codec's noise; they get no bits set
+    loudness = energies.sum(axis=1)
+    bits[loudness[1:] < loudness.max() * 1e-6] = False
+    return np.packbits(bits, axis=1, bitorder='little').view('<u4').ravel()
+
+def bit_error_rate(first: np.ndarray, second: np.ndarray) -> float:
+    """
+    Fraction of differing bits between two fingerprints.
+
+    Only frames over their common length that are active (have bits set) in
+    at least one of them count, so shared silence does not make different
+    audio look alike.
+
+    Returns:
+        The error rate, or 1.0 if no frame is active in either
+    """
+    count = min(len(first), len(second))
+    active = (first[:count] != 0) | (second[:count] != 0)
+    if not active.any():
+        return 1.0
+    differences = np.bitwise_xor(first[:count][active], second[:count][active])
+    return float(np.unpackbits(differences.view(np.uint8)).mean())
+
+def active_frames(prints: np.ndarray) -> int:
+    """Number of sub-fingerprints that are not silent."""
+    return int(np.count_nonzero(prints))
@@ -4,9 +4,24 @@ import json
 import logging
 from pathlib import Path
 from typing import Optional, Tuple, List
+import hashlib
 import aiohttp
+from .artifact_cache import ArtifactCache
 from .utils import load_config
 
+PROMPT_TEMPLATE = """Based on the following video transcription, create an engaging TikTok caption and relevant hashtags.
+        
+Video: {video_path}
+Transcription: {subtitle_content}
+
+Please provide:
+1. A catchy caption that will engage viewers
+2. A list of relevant hashtags (max 5)
+
+Format the response as:
+CAPTION: [your caption here]
+HASHTAGS: [hashtag1] [hashtag2] [hashtag3] [hashtag4] [hashtag5]"""
+
 class CaptionGenerator:
     def __init__(self, config_path: Optional[str] = None):
         """Initialize the caption generator with configuration."""
@@ -27,6 +42,20 @@ class CaptionGenerator:
         self.model = "anthropic/claude-3-opus-20240229"
         self.max_tokens = 500
         self.temperature = 0.7
+        
+        # Identical transcripts with the same prompt and model are served from the cache
+        self.cache = ArtifactCache.from_config(self.config)
+
+    async def generate_caption(
+        self,
+        video_path: str,
+        subtitle_path: str
+    ) -> Tuple[str, List[str]]:
+        """Generate caption and hashtags for a single video from its transcript file."""
+        with open(subtitle_path, 'r', encoding='utf-8') as f:
+            subtitle_content = f.read()
+        
+        return await self._generate_single_caption(video_path, subtitle_content)
 
     async def generate_captions(
         self,
@@ -61,24 +90,32 @@ class CaptionGenerator:
         subtitle_content: str
     ) -> Tuple[str, List[str]]:
         """Generate caption and hashtags for a single video."""
+        input_hash = hashlib.sha256(subtitle_content.encode('utf-8')).hexdigest()
+        cache_key = self.cache.make_key(
+            'caption',
+            input_hash,
+            {'template': PROMPT_TEMPLATE, 'model': self.model, 'temperature': self.temperature}
+        )
+        cached = self.cache.get_json(cache_key)
+        if cached:
+            self.logger.info(f"Using cached caption for {video_path}")
+            return cached['caption'], cached['hashtags']
+        
         prompt = self._create_prompt(video_path, subtitle_content)
         response = await self._call_api(prompt)
-        return self._parse_response(response)
+        caption, hashtags = self._parse_response(response)
+        
+        if caption and hashtags:
+            self.cache.put_json(cache_key, {'caption': caption, 'hashtags': hashtags})
+        
+        return caption, hashtags
     
     def _create_prompt(self, video_path: str, subtitle_content: str) -> str:
         """Create the prompt for the API."""
-        return f"""Based on the following video transcription, create an engaging TikTok caption and relevant hashtags.
-        
-Video: {video_path}
-Transcription: {subtitle_content}
-
-Please provide:
-1. A catchy caption that will engage viewers
-2. A list of relevant hashtags (max 5)
-
-Format the response as:
-CAPTION: [your caption here]
-HASHTAGS: [hashtag1] [hashtag2] [hashtag3] [hashtag4] [hashtag5]"""
+        return PROMPT_TEMPLATE.format(
+            video_path=video_path,
+            subtitle_content=subtitle_content
+        )
     
     async def _call_api(self, prompt: str) -> str:
         """Call the OpenRouter API."""
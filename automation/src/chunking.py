@@ -0,0 +1,138 @@
+"""
+Chunked transcription planning for TikTok content automation.
+
+Long audio is split into chunks of about chunk_seconds of speech so the
+transcription workers can decode them at the same time. Chunks are cut in
+the silence between speech regions where possible. A region longer than a
+chunk (continuous speech, or no voice-activity detector) is cut at its
+quietest frame near the chunk length, and the two sides overlap a little
+so a word at the cut is heard whole by at least one of them.
+
+When the results are stitched, each chunk owns the time up to the seam
+with its neighbours (the middle of the overlap, or of the silence between
+them); a segment is kept by the chunk that owns its midpoint.
+"""
+
+from typing import Any, Dict, List, NamedTuple, Tuple
+import numpy as np
+
+# Frame length (seconds) for choosing the quietest cut point
+CUT_FRAME = 0.02
+
+class Chunk(NamedTuple):
+    """Sample ranges transcribed together, and the time (seconds) whose segments they own."""
+    regions: List[Tuple[int, int]]
+    keep_from: float
+    keep_until: float
+
+def plan_chunks(
+    pcm: np.ndarray,
+    regions: List[Tuple[int, int]],
+    sample_rate: int,
+    chunk_seconds: float,
+    overlap_seconds: float = 1.0,
+    search_seconds: float = 5.0
+) -> List[Chunk]:
+    """
+    Group speech regions into chunks.
+
+    Args:
+        pcm: The whole audio, to find quiet cut points in long regions
+        regions: Speech as (start, end) sample ranges, in order
+        chunk_seconds: Target amount of audio per chunk; 0 puts everything in one chunk
+        overlap_seconds: Audio shared by both sides of a cut inside a region
+        search_seconds: How far before the target length a cut inside a
+            region may be placed
+
+    Returns:
+        Chunks in order
+    """
+    if not regions:
+        return []
+    if chunk_seconds <= 0:
+        return [Chunk(list(regions), float('-inf'), float('inf'))]
+
+    limit = int(chunk_seconds * sample_rate)
+    groups: List[List[Tuple[int, int]]] = []
+    current: List[Tuple[int, int]] = []
+    length = 0
+    for start, end in regions:
+        pieces = split_region(
+            pcm, start, end, sample_rate, limit,
+            int(overlap_seconds * sample_rate), int(search_seconds * sample_rate)
+        )
+        for index, (first, last) in enumerate(pieces):
+            if current and length + last - first > limit:
+                groups.append(current)
+                current, length = [], 0
+            current.append((first, last))
+            length += last - first
+
+            # Overlapping pieces of one region never share a chunk
+            if index < len(pieces) - 1:
+                groups.append(current)
+                current, length = [], 0
+    if current:
+        groups.append(current)
+
+    seams = [
+        (previous[-1][1] + following[0][0]) / 2 / sample_rate
+        for previous, following in zip(groups[:-1], groups[1:])
+    ]
+    bounds = [float('-inf'), *seams, float('inf')]
+    return [Chunk(group, bounds[i], bounds[i + 1]) for i, group in enumerate(groups)]
+
+def split_region(
+    pcm: np.ndarray,
+    start: int,
+    end: int,
+    sample_rate: int,
+    limit: int,
+    overlap: int,
+    search: int
+) -> List[Tuple[int, int]]:
+    """Cut a region into overlapping pieces of at most limit samples (plus the overlap)."""
+    pieces = []
+    frame = max(1, int(CUT_FRAME * sample_rate))
+    first = start
+    while end - first > limit:
+        # Quietest frame in the search window before the limit
+        window = pcm[first + max(limit - search, overlap):first + limit]
+        count = len(window) // frame
+        if count:
+            frames = window[:count * frame].reshape(count, frame)
+            energy = np.einsum('ij,ij->i', frames, frames, dtype=np.float64)
+            cut = first + max(limit - search, overlap) + int(np.argmin(energy)) * frame + frame // 2
+        else:
+            cut = first + limit
+
+        pieces.append((first, min(end, cut + overlap // 2)))
+        first = max(start, cut - overlap // 2)
+    pieces.append((first, end))
+    return pieces
+
+class SegmentStitcher:
+    """Joins the segments of chunks, added in order, into one timeline."""
+
+    def __init__(self):
+        self.end = float('-inf')
+
+    def add(self, chunk: Chunk, segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Take the segments of the next chunk, already on the original timeline.
+
+        Returns:
+            The segments this chunk owns (by midpoint), ready to be appended
+        """
+        kept = []
+        for segment in segments:
+            middle = (segment['start'] + segment['end']) / 2
+            if not chunk.keep_from <= middle < chunk.keep_until:
+                continue
+
+            # A segment picked up before the seam must not overlap one kept from the previous chunk
+            if segment['start'] < self.end:
+                segment = {**segment, 'start': min(self.end, segment['end'])}
+            kept.append(segment)
+            self.end = segment['end']
+        return kept
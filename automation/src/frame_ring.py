@@ -0,0 +1,135 @@
+"""
+Threaded frame ring for TikTok content automation.
+
+Decoding, per-frame processing and encoding run on three threads that pass
+slots of a fixed ring of preallocated frame buffers between them. OpenCV
+releases the GIL while it decodes and encodes, so both overlap with the
+processing of other frames, and no frame is allocated after the first lap
+around the ring.
+"""
+
+import queue
+import threading
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+
+# Marker that tells the next thread no more frames are coming
+_DONE = None
+
+# process(slot, frame, frame_index) returns the frame to encode; it may
+# modify frame in place or fill a caller-owned buffer for that slot
+FrameProcessor = Callable[[int, np.ndarray, int], np.ndarray]
+
+class FrameRing:
+    def __init__(self, shape: Tuple[int, ...], size: int = 8):
+        """
+        Preallocate the ring.
+
+        Args:
+            shape: Shape of a decoded frame, e.g. (height, width, 3)
+            size: Number of frames that can be in flight at once
+        """
+        self.size = max(2, int(size))
+        self.buffers: List[np.ndarray] = [np.empty(shape, dtype=np.uint8) for _ in range(self.size)]
+
+    def run(
+        self,
+        capture,
+        process: FrameProcessor,
+        write: Callable[[np.ndarray], None],
+        frame_count: Optional[int] = None
+    ) -> int:
+        """
+        Decode, process and encode frames until the capture ends.
+
+        Args:
+            capture: Opened cv2.VideoCapture (or anything with read(image))
+            process: Called on this thread for every decoded frame
+            write: Called on the writer thread with every processed frame
+            frame_count: Stop after this many frames, or None to read to the end
+
+        Returns:
+            Number of frames written
+
+        Raises:
+            The first exception raised by the reader, process or write
+        """
+        free = queue.Queue()
+        decoded = queue.Queue()
+        processed = queue.Queue()
+        for slot in range(self.size):
+            free.put(slot)
+
+        stop = threading.Event()
+        errors: List[BaseException] = []
+        written = [0]
+
+        def read_frames():
+            try:
+                index = 0
+                while frame_count is None or index < frame_count:
+                    slot = free.get()
+                    if stop.is_set():
+                        break
+
+                    ret, frame = capture.read(self.buffers[slot])
+                    if not ret:
+                        break
+                    if frame is not self.buffers[slot]:
+                        # The frame size changed mid-stream; adopt the new buffer
+                        self.buffers[slot] = frame
+
+                    decoded.put((slot, index))
+                    index += 1
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                decoded.put(_DONE)
+
+        def write_frames():
+            try:
+                while True:
+                    item = processed.get()
+                    if item is _DONE:
+                        break
+
+                    slot, frame = item
+                    if not stop.is_set():
+                        write(frame)
+                        written[0] += 1
+                    free.put(slot)
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+                free.put(0)
+
+        reader = threading.Thread(target=read_frames, name='frame-reader', daemon=True)
+        writer = threading.Thread(target=write_frames, name='frame-writer', daemon=True)
+        reader.start()
+        writer.start()
+
+        try:
+            while True:
+                item = decoded.get()
+                if item is _DONE or stop.is_set():
+                    break
+
+                slot, index = item
+                processed.put((slot, process(slot, self.buffers[slot], index)))
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            processed.put(_DONE)
+
+            # Unblock a reader waiting for a slot so it sees the stop flag
+            if stop.is_set():
+                free.put(0)
+            writer.join()
+            stop.set()
+            free.put(0)
+            reader.join()
+
+        if errors:
+            raise errors[0]
+        return written[0]
@@ -0,0 +1,224 @@
+"""
+Persistent per-video job state for TikTok content automation.
+
+Every video moves through the stages in STAGES. Each completed stage is stored
+in a local SQLite file together with its artifact path and checksum, so a run
+that dies halfway can resume each video at its last completed stage.
+
+Each file is hashed once, when its stage is recorded. Its size and
+modification time are stored alongside, and a file whose size and time are
+unchanged is trusted without reading it again.
+"""
+
+import json
+import logging
+import sqlite3
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .utils import file_checksum
+
+STAGES = ['downloaded', 'transcribed', 'processed', 'captioned', 'uploaded']
+
+class JobStore:
+    def __init__(self, db_path: str):
+        """
+        Open (or create) the job state database.
+
+        Args:
+            db_path: Path to the SQLite file
+        """
+        self.logger = logging.getLogger(__name__)
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Stage handlers call into the store from executor threads
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS stages (
+                    job_id TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    path TEXT,
+                    checksum TEXT,
+                    data TEXT,
+                    completed_at TEXT NOT NULL,
+                    size INTEGER,
+                    mtime_ns INTEGER,
+                    PRIMARY KEY (job_id, stage)
+                )
+                """
+            )
+
+            # Databases from before the file stats were kept get the columns added
+            columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(stages)")}
+            for column in ('size', 'mtime_ns'):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE stages ADD COLUMN {column} INTEGER")
+
+    def start(self, source_path: str) -> str:
+        """
+        Register a downloaded video and return its job id.
+
+        If the file behind an existing job has changed, the job's recorded
+        progress is discarded so every stage runs again. The source's
+        checksum is available afterwards from get(job_id, 'downloaded'),
+        so later stages need not hash it again.
+        """
+        job_id = str(Path(source_path).resolve())
+        previous = self._get_row(job_id, 'downloaded')
+        stat = _stat(source_path)
+
+        if previous is not None and _unchanged(previous, stat):
+            checksum = previous['checksum']
+        else:
+            checksum = file_checksum(source_path)
+            if previous is not None and previous['checksum'] != checksum:
+                self.logger.info(f"Source changed since last run, restarting job: {source_path}")
+                self.reset(job_id)
+
+        self._save(job_id, 'downloaded', source_path, checksum, None, stat)
+        return job_id
+
+    def complete(
+        self,
+        job_id: str,
+        stage: str,
+        path: Optional[str] = None,
+        data: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Record that a stage finished for a job.
+
+        Args:
+            job_id: Job id returned by start()
+            stage: One of STAGES
+            path: Artifact produced by the stage, if any
+            data: Extra JSON-serializable results of the stage
+        """
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage: {stage}")
+
+        stat = _stat(path) if path else None
+        checksum = file_checksum(path) if path else None
+        self._save(job_id, stage, path, checksum, data, stat)
+
+    def get(self, job_id: str, stage: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a completed stage for a job.
+
+        Returns:
+            Dict with 'path', 'checksum' and 'data', or None if the stage has
+            not completed or its artifact is missing or modified
+        """
+        row = self._get_row(job_id, stage)
+        if row is None:
+            return None
+
+        path = row['path']
+        if path and stage != 'downloaded' and not self._verify(row):
+            self.logger.warning(f"Artifact for {stage} stage is missing or modified: {path}")
+            return None
+
+        return {
+            'path': path,
+            'checksum': row['checksum'],
+            'data': json.loads(row['data']) if row['data'] else None
+        }
+
+    def state(self, job_id: str) -> Optional[str]:
+        """Return the furthest stage a job has completed."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return row['state'] if row else None
+
+    def reset(self, job_id: str) -> None:
+        """Forget all recorded progress for a job."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM stages WHERE job_id = ?", (job_id,))
+            self._conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _verify(self, row: sqlite3.Row) -> bool:
+        """Check that a stage's artifact is still the file that was recorded."""
+        path = row['path']
+        if not Path(path).exists():
+            return False
+
+        # Only a file whose size or modification time moved is read again
+        stat = _stat(path)
+        if _unchanged(row, stat):
+            return True
+        return row['size'] in (None, stat[0]) and file_checksum(path) == row['checksum']
+
+    def _get_row(self, job_id: str, stage: str) -> Optional[sqlite3.Row]:
+        """Fetch the raw stage row for a job."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT path, checksum, data, size, mtime_ns FROM stages WHERE job_id = ? AND stage = ?",
+                (job_id, stage)
+            ).fetchone()
+
+    def _save(
+        self,
+        job_id: str,
+        stage: str,
+        path: Optional[str],
+        checksum: Optional[str],
+        data: Optional[Dict[str, Any]],
+        stat: Optional[Tuple[int, int]] = None
+    ) -> None:
+        """Upsert a stage row and advance the job state."""
+        now = datetime.now().isoformat()
+        size, mtime_ns = stat or (None, None)
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO stages
+                    (job_id, stage, path, checksum, data, completed_at, size, mtime_ns)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (job_id, stage, path, checksum, json.dumps(data) if data else None, now, size, mtime_ns)
+            )
+
+            row = self._conn.execute(
+                "SELECT state FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if row is None or STAGES.index(stage) >= STAGES.index(row['state']):
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO jobs (job_id, state, updated_at) VALUES (?, ?, ?)",
+                    (job_id, stage, now)
+                )
+
+def _stat(path: str) -> Tuple[int, int]:
+    """Size and modification time (ns) of a file."""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+def _unchanged(row: sqlite3.Row, stat: Tuple[int, int]) -> bool:
+    """Whether a file still has the size and modification time recorded in its row."""
+    return row['size'] is not None and (row['size'], row['mtime_ns']) == stat
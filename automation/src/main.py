@@ -9,11 +9,15 @@ from typing import List, Optional
 from datetime import datetime
 
 from src.scraper import ContentScraper
+from src.quality_filter import QualityFilter
 from src.video_processor import VideoProcessor
 from src.transcription import TranscriptionService
 from src.caption_generator import CaptionGenerator
 from src.upload import TikTokUploader
 from src.logger import AutomationLogger
+from src.job_store import JobStore
+from src.subtitles import parse_srt
+from src.pipeline import Stage, StagePipeline
 from src.utils import load_config
 
 class TikTokAutomation:
@@ -22,10 +26,20 @@ class TikTokAutomation:
         self.config = load_config()
         self.logger = AutomationLogger()
         self.scraper = ContentScraper()
+        self.quality_filter = QualityFilter()
         self.processor = VideoProcessor()
         self.transcriber = TranscriptionService()
         self.caption_generator = CaptionGenerator()
         self.uploader = TikTokUploader()
+        self.pipeline_settings = self.config.get('pipeline', {})
+        
+        # Per-video stage state, so an interrupted run resumes where it stopped
+        project_root = Path(__file__).resolve().parent.parent
+        db_path = self.config.get('state', {}).get('db_path', 'state/jobs.db')
+        self.jobs = JobStore(str(project_root / db_path))
+
+        # Sources of this run that were uploaded by an earlier run
+        self.skipped: List[str] = []
         
         # Set up logging
         logging.basicConfig(
@@ -40,11 +54,16 @@ class TikTokAutomation:
 
     async def run(self):
         """Run the automation process."""
+        warmup = None
+        self.skipped = []
         try:
             # Log start
             await self.logger.log_event("Process started", "info")
             self.log.info("Starting TikTok content automation process")
 
+            # Load the transcription model while the videos download
+            warmup = asyncio.ensure_future(self.transcriber.warmup())
+
             # Acquire content
             self.log.info("Acquiring content from sources")
             video_paths = await self.scraper.get_content()
@@ -55,67 +74,20 @@ class TikTokAutomation:
             await self.logger.log_event(f"Acquired {len(video_paths)} videos", "success")
             self.log.info(f"Acquired {len(video_paths)} videos")
 
-            # Process videos
-            self.log.info("Processing videos")
-            processed_videos = []
-            for video_path in video_paths:
-                try:
-                    # Process video
-                    processed_path = await self.processor.process_video(video_path)
-                    if processed_path:
-                        processed_videos.append(processed_path)
-                except Exception as e:
-                    self.log.error(f"Error processing video {video_path}: {str(e)}")
-                    continue
-
-            if not processed_videos:
-                raise Exception("No videos were processed successfully")
-
-            # Transcribe videos
-            self.log.info("Transcribing videos")
-            subtitle_paths = []
-            for video_path in processed_videos:
-                try:
-                    subtitle_path = await self.transcriber.transcribe_video(video_path)
-                    if subtitle_path:
-                        subtitle_paths.append(subtitle_path)
-                except Exception as e:
-                    self.log.error(f"Error transcribing video {video_path}: {str(e)}")
-                    continue
-
-            if not subtitle_paths:
-                raise Exception("No videos were transcribed successfully")
-
-            # Generate captions
-            self.log.info("Generating captions")
-            captions = []
-            for video_path, subtitle_path in zip(processed_videos, subtitle_paths):
-                try:
-                    caption, hashtags = await self.caption_generator.generate_caption(
-                        video_path, subtitle_path
-                    )
-                    if caption and hashtags:
-                        captions.append((video_path, caption, hashtags))
-                except Exception as e:
-                    self.log.error(f"Error generating caption for {video_path}: {str(e)}")
-                    continue
-
-            if not captions:
-                raise Exception("No captions were generated successfully")
-
-            # Upload videos
-            self.log.info("Uploading videos")
-            for video_path, caption, hashtags in captions:
-                try:
-                    success = await self.uploader.upload_video(video_path, caption, hashtags)
-                    if success:
-                        await self.logger.log_event(
-                            f"Successfully uploaded {video_path}",
-                            "success"
-                        )
-                except Exception as e:
-                    self.log.error(f"Error uploading video {video_path}: {str(e)}")
-                    continue
+            if self.pipeline_settings.get('mode', 'streaming') == 'streaming':
+                uploaded = await self._run_streaming(video_paths)
+
+                # Items that fail a stage are dropped silently on the way through;
+                # a run with only finished videos left has nothing to fail
+                if not uploaded and len(self.skipped) < len(video_paths):
+                    raise Exception("No videos were uploaded successfully")
+            else:
+                uploaded = await self._run_batch(video_paths)
+
+            self.log.info(
+                f"Uploaded {len(uploaded)} of {len(video_paths)} videos "
+                f"({len(self.skipped)} already uploaded)"
+            )
 
             # Log completion
             await self.logger.log_event("Process completed successfully", "success")
@@ -127,6 +99,179 @@ class TikTokAutomation:
             self.log.error(error_msg)
             raise
 
+        finally:
+            # A run that ends before transcribing must not leave the warmup or the workers behind
+            if warmup is not None:
+                warmup.cancel()
+                await asyncio.gather(warmup, return_exceptions=True)
+            self.transcriber.close()
+            self.processor.close()
+
+    async def _run_batch(self, video_paths: List[str]) -> List[dict]:
+        """Run each stage over the whole batch before starting the next one."""
+        items = [{'source': video_path} for video_path in video_paths]
+
+        self.log.info("Checking video quality")
+        items = await self._run_batch_stage(self._filter_item, items)
+        if not items:
+            if len(self.skipped) == len(video_paths):
+                self.log.info("Every video was already uploaded")
+                return []
+            raise Exception("No videos passed the quality filter")
+
+        self.log.info("Transcribing videos")
+        items = await self._run_batch_stage(self._transcribe_item, items)
+        if not items:
+            raise Exception("No videos were transcribed successfully")
+
+        self.log.info("Processing videos")
+        items = await self._run_batch_stage(self._process_item, items)
+        if not items:
+            raise Exception("No videos were processed successfully")
+
+        self.log.info("Generating captions")
+        items = await self._run_batch_stage(self._caption_item, items)
+        if not items:
+            raise Exception("No captions were generated successfully")
+
+        self.log.info("Uploading videos")
+        return await self._run_batch_stage(self._upload_item, items)
+
+    async def _run_batch_stage(self, handler, items: List[dict]) -> List[dict]:
+        """Run one stage handler over every item, dropping the failures."""
+        results = []
+        for item in items:
+            result = await handler(item)
+            if result:
+                results.append(result)
+        return results
+
+    async def _run_streaming(self, video_paths: List[str]) -> List[dict]:
+        """Stream videos through the stages so they overlap with each other."""
+        workers = self.pipeline_settings.get('workers', {})
+        pipeline = StagePipeline(
+            [
+                Stage('filter', self._filter_item, workers.get('filter', 1)),
+                Stage('transcribe', self._transcribe_item, workers.get('transcribe', 1)),
+                Stage('process', self._process_item, workers.get('process', 1)),
+                Stage('caption', self._caption_item, workers.get('caption', 2)),
+                Stage('upload', self._upload_item, workers.get('upload', 1)),
+            ],
+            queue_size=self.pipeline_settings.get('queue_size', 2)
+        )
+
+        self.log.info("Streaming videos through the pipeline")
+        return await pipeline.run({'source': video_path} for video_path in video_paths)
+
+    async def _filter_item(self, item: dict) -> Optional[dict]:
+        """Skip finished videos and drop black, blurry or static clips before any expensive stage."""
+        try:
+            # The source is hashed once here; later stages reuse its checksum
+            job_id = await self._in_executor(self.jobs.start, item['source'])
+            source = await self._in_executor(self.jobs.get, job_id, 'downloaded')
+            item = {**item, 'job': job_id, 'hash': source['checksum']}
+
+            if await self._in_executor(self.jobs.state, job_id) == 'uploaded':
+                self.log.info(f"Skipping already uploaded video: {item['source']}")
+                self.skipped.append(item['source'])
+                return None
+
+            report = await self.quality_filter.check_video(item['source'])
+            return item if report['passed'] else None
+        except Exception as e:
+            self.log.error(f"Error checking video {item['source']}: {str(e)}")
+        return None
+
+    async def _process_item(self, item: dict) -> Optional[dict]:
+        """Watermark, subtitle and encode a downloaded video."""
+        try:
+            done = await self._in_executor(self.jobs.get, item['job'], 'processed')
+            if done:
+                self.log.info(f"Resuming {item['source']} after processing")
+                return {**item, 'video': done['path'], **(done['data'] or {})}
+
+            # Timed segments are written next to the plain transcript
+            subtitles = None
+            if self.processor.burn_subtitles:
+                subtitles = await self._in_executor(
+                    parse_srt, str(Path(item['subtitle']).with_suffix('.srt'))
+                )
+
+            outputs = await self.processor.process_video_outputs(
+                item['source'], self._log_progress, subtitles=subtitles, input_hash=item['hash']
+            )
+            if outputs:
+                renditions = {'renditions': outputs}
+                await self._in_executor(self.jobs.complete, item['job'], 'processed', outputs['main'], renditions)
+                return {**item, 'video': outputs['main'], **renditions}
+        except Exception as e:
+            self.log.error(f"Error processing video {item['source']}: {str(e)}")
+        return None
+
+    def _log_progress(self, progress: dict) -> None:
+        """Log how far a video has rendered."""
+        self.log.info(
+            f"Processing {progress['video']}: {progress['frames']}/{progress['total']} frames "
+            f"({progress['fps']:.1f} frames/sec)"
+        )
+
+    async def _transcribe_item(self, item: dict) -> Optional[dict]:
+        """Transcribe the audio of the original download."""
+        try:
+            done = await self._in_executor(self.jobs.get, item['job'], 'transcribed')
+            if done:
+                self.log.info(f"Resuming {item['source']} after transcription")
+                return {**item, 'subtitle': done['path']}
+
+            subtitle_path = await self.transcriber.transcribe_video(item['source'], item['hash'])
+            if subtitle_path:
+                await self._in_executor(self.jobs.complete, item['job'], 'transcribed', subtitle_path)
+                return {**item, 'subtitle': subtitle_path}
+        except Exception as e:
+            self.log.error(f"Error transcribing video {item['source']}: {str(e)}")
+        return None
+
+    async def _caption_item(self, item: dict) -> Optional[dict]:
+        """Generate a caption and hashtags from the transcript."""
+        try:
+            done = await self._in_executor(self.jobs.get, item['job'], 'captioned')
+            if done:
+                self.log.info(f"Resuming {item['source']} after captioning")
+                return {**item, **done['data']}
+
+            caption, hashtags = await self.caption_generator.generate_caption(
+                item['video'], item['subtitle']
+            )
+            if caption and hashtags:
+                result = {'caption': caption, 'hashtags': hashtags}
+                await self._in_executor(self.jobs.complete, item['job'], 'captioned', None, result)
+                return {**item, **result}
+        except Exception as e:
+            self.log.error(f"Error generating caption for {item['video']}: {str(e)}")
+        return None
+
+    async def _upload_item(self, item: dict) -> Optional[dict]:
+        """Upload a captioned video to TikTok."""
+        try:
+            success = await self.uploader.upload_video(
+                item['video'], item['caption'], item['hashtags']
+            )
+            if success:
+                await self._in_executor(self.jobs.complete, item['job'], 'uploaded')
+                await self.logger.log_event(
+                    f"Successfully uploaded {item['video']}",
+                    "success"
+                )
+                return item
+        except Exception as e:
+            self.log.error(f"Error uploading video {item['video']}: {str(e)}")
+        return None
+
+    async def _in_executor(self, func, *args):
+        """Run a blocking call (hashing, SQLite) without stalling the event loop."""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, func, *args)
+
 async def main():
     """Main entry point."""
     try:
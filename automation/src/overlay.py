@@ -0,0 +1,186 @@
+"""
+Pre-rendered overlays for TikTok content automation.
+
+Overlays are rasterized once into a small premultiplied BGR patch with an
+alpha mask. Applying them to a frame is a vectorized blend over the region
+they cover, instead of re-rasterizing the overlay on every frame.
+"""
+
+import logging
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import cv2
+import numpy as np
+
+class Sprite:
+    def __init__(self, premultiplied: np.ndarray, alpha: np.ndarray):
+        """
+        Build a sprite from a premultiplied colour patch and its alpha mask.
+
+        Args:
+            premultiplied: HxWx3 uint8 colour already multiplied by alpha
+            alpha: HxW uint8 opacity (255 = opaque)
+        """
+        self.premultiplied = premultiplied
+        self.alpha = alpha
+        self.height, self.width = alpha.shape
+
+        # How much of the background shows through, per colour channel
+        self._inverse_alpha = np.repeat((255 - alpha)[:, :, None], 3, axis=2)
+
+    @classmethod
+    def from_straight(cls, bgr: np.ndarray, alpha: np.ndarray) -> 'Sprite':
+        """Build a sprite from an unpremultiplied colour patch, e.g. a BGRA image."""
+        premultiplied = (bgr.astype(np.uint16) * alpha[:, :, None] + 127) // 255
+        return cls(premultiplied.astype(np.uint8), alpha)
+
+    def to_bgra(self) -> np.ndarray:
+        """Return the sprite as a straight-alpha BGRA image, e.g. for FFmpeg's overlay filter."""
+        alpha = self.alpha.astype(np.uint16)[:, :, None]
+        bgr = (self.premultiplied.astype(np.uint16) * 255 + alpha // 2) // np.maximum(alpha, 1)
+        return np.dstack([bgr.clip(0, 255).astype(np.uint8), self.alpha])
+
+    def blend(self, frame: np.ndarray, x: int, y: int) -> np.ndarray:
+        """
+        Alpha-blend the sprite onto frame in place with its top left corner at (x, y).
+
+        Parts of the sprite that fall outside the frame are clipped.
+        """
+        frame_height, frame_width = frame.shape[:2]
+        if x < 0 or y < 0 or x + self.width > frame_width or y + self.height > frame_height:
+            left, top = max(x, 0), max(y, 0)
+            right = min(x + self.width, frame_width)
+            bottom = min(y + self.height, frame_height)
+            if right <= left or bottom <= top:
+                return frame
+
+            rows = slice(top - y, bottom - y)
+            cols = slice(left - x, right - x)
+            return Sprite(self.premultiplied[rows, cols], self.alpha[rows, cols]).blend(frame, left, top)
+
+        # out = premultiplied + background * (1 - alpha), on the covered region only.
+        # OpenCV's saturating uint8 arithmetic does this without widening to
+        # 16-bit or float temporaries the way plain NumPy expressions would
+        roi = frame[y:y + self.height, x:x + self.width]
+        background = cv2.multiply(roi, self._inverse_alpha, scale=1 / 255)
+        roi[:] = cv2.add(background, self.premultiplied)
+        return frame
+
+def render_text_sprite(
+    text: str,
+    font_scale: float = 1.0,
+    thickness: int = 2,
+    color: Tuple[int, int, int] = (255, 255, 255),
+    stroke_color: Tuple[int, int, int] = (0, 0, 0)
+) -> Tuple[Sprite, Tuple[int, int]]:
+    """
+    Rasterize outlined text into a sprite.
+
+    Returns:
+        The sprite and the offset of the text baseline origin inside it
+    """
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    (text_width, text_height), baseline = cv2.getTextSize(
+        text, font, font_scale, thickness
+    )
+
+    # Leave room for the stroke, which is drawn one pixel thicker than the text
+    pad = thickness + 2
+    origin = (pad, pad + text_height)
+    size = (text_height + baseline + 2 * pad, text_width + 2 * pad, 3)
+
+    # Rendering over black and white recovers the exact (anti-aliased)
+    # coverage: on black the result is the premultiplied colour, and the
+    # difference between the two is what the background still shows through
+    on_black = np.zeros(size, dtype=np.uint8)
+    on_white = np.full(size, 255, dtype=np.uint8)
+    for canvas in (on_black, on_white):
+        cv2.putText(canvas, text, origin, font, font_scale, stroke_color, thickness + 1)
+        cv2.putText(canvas, text, origin, font, font_scale, color, thickness)
+
+    transmitted = on_white.astype(np.int16) - on_black.astype(np.int16)
+    alpha = (255 - transmitted.max(axis=2)).clip(0, 255).astype(np.uint8)
+    return Sprite(on_black, alpha), origin
+
+def load_image_sprite(path: str, width: int) -> Sprite:
+    """
+    Load a (possibly transparent) image as a sprite scaled to width pixels.
+
+    Raises:
+        IOError: If the image cannot be read
+    """
+    image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+    if image is None:
+        raise IOError(f"Error reading watermark image: {path}")
+
+    if image.ndim == 2:
+        image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGRA)
+    elif image.shape[2] == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
+
+    height = max(1, round(image.shape[0] * width / image.shape[1]))
+    image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+    return Sprite.from_straight(image[:, :, :3], image[:, :, 3])
+
+class WatermarkOverlay:
+    def __init__(
+        self,
+        text: str,
+        image_path: Optional[str] = None,
+        image_scale: float = 0.2,
+        margin: int = 10
+    ):
+        """
+        Describe the watermark drawn in the bottom right corner of every frame.
+
+        Args:
+            text: Watermark text, used when no image is available
+            image_path: Optional PNG watermark, preferred over the text
+            image_scale: Image width as a fraction of the frame width
+            margin: Distance from the frame edges in pixels
+        """
+        self.logger = logging.getLogger(__name__)
+        self.text = text
+        self.image_path = image_path if image_path and Path(image_path).exists() else None
+        self.image_scale = image_scale
+        self.margin = margin
+
+        # Placed sprites, rendered once per frame resolution
+        self._placements: Dict[Tuple[int, int], Tuple[Sprite, int, int]] = {}
+
+    def apply(self, frame: np.ndarray) -> np.ndarray:
+        """Blend the watermark onto frame in place."""
+        height, width = frame.shape[:2]
+        sprite, x, y = self.placement(width, height)
+        return sprite.blend(frame, x, y)
+
+    def placement(self, width: int, height: int) -> Tuple[Sprite, int, int]:
+        """Return the watermark sprite for a frame size and its top left position."""
+        placement = self._placements.get((width, height))
+        if placement is None:
+            placement = self._render(width, height)
+            self._placements[(width, height)] = placement
+        return placement
+
+    def _render(self, width: int, height: int) -> Tuple[Sprite, int, int]:
+        """Rasterize the watermark for one frame size and compute its position."""
+        if self.image_path:
+            try:
+                sprite = load_image_sprite(
+                    self.image_path, max(1, int(width * self.image_scale))
+                )
+                return (
+                    sprite,
+                    width - sprite.width - self.margin,
+                    height - sprite.height - self.margin
+                )
+            except IOError as e:
+                self.logger.error(f"Falling back to text watermark: {str(e)}")
+
+        sprite, (origin_x, origin_y) = render_text_sprite(self.text)
+
+        # Text baseline sits margin pixels above the bottom right corner
+        text_width = sprite.width - 2 * origin_x
+        x = width - text_width - self.margin
+        y = height - self.margin
+        return sprite, x - origin_x, y - origin_y
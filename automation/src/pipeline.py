@@ -0,0 +1,101 @@
+"""
+Streaming stage pipeline for TikTok content automation.
+
+Each stage runs a fixed number of asyncio workers. Stages are connected by
+bounded queues, so a slow stage applies backpressure to the ones in front of
+it instead of letting work pile up in memory.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Iterable, List, Optional
+
+# Marker that tells a worker its input queue is drained
+_DONE = object()
+
+StageHandler = Callable[[Any], Awaitable[Optional[Any]]]
+
+class Stage:
+    def __init__(self, name: str, handler: StageHandler, workers: int = 1):
+        """
+        Describe a single pipeline stage.
+
+        Args:
+            name: Stage name used in log messages
+            handler: Coroutine taking an item and returning the item for the
+                next stage, or None to drop it
+            workers: Number of concurrent workers for this stage
+        """
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, int(workers))
+
+class StagePipeline:
+    def __init__(self, stages: List[Stage], queue_size: int = 2):
+        """
+        Initialize the pipeline.
+
+        Args:
+            stages: Stages in execution order
+            queue_size: Maximum number of items waiting in front of each stage
+        """
+        if not stages:
+            raise ValueError("StagePipeline requires at least one stage")
+
+        self.stages = stages
+        self.queue_size = max(1, int(queue_size))
+        self.logger = logging.getLogger(__name__)
+
+    async def run(self, items: Iterable[Any]) -> List[Any]:
+        """
+        Stream items through every stage.
+
+        Args:
+            items: Inputs for the first stage
+
+        Returns:
+            Items that made it through the last stage, in completion order
+        """
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        results = []
+
+        async def feed():
+            for item in items:
+                await queues[0].put(item)
+            for _ in range(self.stages[0].workers):
+                await queues[0].put(_DONE)
+
+        async def work(index: int, stage: Stage):
+            while True:
+                item = await queues[index].get()
+                if item is _DONE:
+                    return
+
+                try:
+                    result = await stage.handler(item)
+                except Exception as e:
+                    self.logger.error(f"Error in {stage.name} stage: {str(e)}")
+                    result = None
+
+                if result is None:
+                    continue
+
+                if index + 1 < len(self.stages):
+                    await queues[index + 1].put(result)
+                else:
+                    results.append(result)
+
+        async def run_stage(index: int, stage: Stage):
+            await asyncio.gather(*(work(index, stage) for _ in range(stage.workers)))
+
+            # Only close the next stage once every worker here has finished
+            if index + 1 < len(self.stages):
+                for _ in range(self.stages[index + 1].workers):
+                    await queues[index + 1].put(_DONE)
+
+        await asyncio.gather(
+            feed(),
+            *(run_stage(index, stage) for index, stage in enumerate(self.stages))
+        )
+
+        return results
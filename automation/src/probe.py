@@ -0,0 +1,192 @@
+"""
+Video metadata probe index for TikTok content automation.
+
+Container metadata (size, frame rate, frame count, duration) is read once
+per file, with ffprobe when it is installed and OpenCV otherwise, and kept in
+a persistent SQLite index keyed by path, file size and modification time.
+Later lookups are answered from memory after a single stat() call, so stages
+can filter or estimate work across many downloads without reopening them.
+"""
+
+import os
+import json
+import shutil
+import logging
+import sqlite3
+import threading
+import subprocess
+from fractions import Fraction
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+import cv2
+
+class ProbeIndex:
+    def __init__(self, db_path: str):
+        """
+        Open (or create) the probe index.
+
+        Args:
+            db_path: Path to the SQLite file
+        """
+        self.logger = logging.getLogger(__name__)
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Entries already read from disk, keyed by resolved path
+        self._memory: Dict[str, Tuple[int, int, Dict[str, Any]]] = {}
+
+        # Probes run from executor threads
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS probes (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    info TEXT NOT NULL
+                )
+                """
+            )
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'ProbeIndex':
+        """Open the index described by the 'state' section of the config."""
+        db_path = config.get('state', {}).get('probe_db_path', 'state/probe.db')
+        return cls(str(Path(__file__).resolve().parent.parent / db_path))
+
+    def probe(self, video_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the metadata of a video.
+
+        Returns:
+            Dict with width, height, fps, frame_count and duration (seconds),
+            or None if the file is missing or cannot be read as a video
+        """
+        try:
+            stat = os.stat(video_path)
+        except OSError:
+            return None
+
+        key = str(Path(video_path).resolve())
+        cached = self._memory.get(key)
+        if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+            return cached[2]
+
+        info = self._load(key, stat.st_size, stat.st_mtime_ns)
+        if info is None:
+            info = read_metadata(video_path)
+            if info is None:
+                return None
+            self._save(key, stat.st_size, stat.st_mtime_ns, info)
+
+        self._memory[key] = (stat.st_size, stat.st_mtime_ns, info)
+        return info
+
+    def probe_many(self, video_paths: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Probe several videos, leaving out the ones that cannot be read."""
+        results = {}
+        for video_path in video_paths:
+            info = self.probe(video_path)
+            if info is not None:
+                results[video_path] = info
+        return results
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _load(self, key: str, size: int, mtime_ns: int) -> Optional[Dict[str, Any]]:
+        """Return the stored metadata if the file has not changed since it was probed."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, info FROM probes WHERE path = ?", (key,)
+            ).fetchone()
+        if row is None or (row[0], row[1]) != (size, mtime_ns):
+            return None
+        return json.loads(row[2])
+
+    def _save(self, key: str, size: int, mtime_ns: int, info: Dict[str, Any]) -> None:
+        """Store the metadata of a file."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO probes (path, size, mtime_ns, info) VALUES (?, ?, ?, ?)",
+                (key, size, mtime_ns, json.dumps(info))
+            )
+
+def read_metadata(video_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Read the metadata of a video from its container, without an index.
+
+    ffprobe only parses headers; OpenCV is the fallback when it is missing
+    or fails.
+    """
+    if shutil.which('ffprobe'):
+        try:
+            info = _read_metadata_ffprobe(video_path)
+            if info is not None:
+                return info
+        except (OSError, ValueError, subprocess.CalledProcessError) as e:
+            logging.getLogger(__name__).warning(f"ffprobe failed for {video_path}, using OpenCV: {str(e)}")
+
+    return _read_metadata_opencv(video_path)
+
+def _read_metadata_ffprobe(video_path: str) -> Optional[Dict[str, Any]]:
+    """Read the first video stream and the container duration with ffprobe."""
+    result = subprocess.run(
+        [
+            'ffprobe', '-v', 'error', '-select_streams', 'v:0',
+            '-show_entries', 'stream=width,height,avg_frame_rate,r_frame_rate,nb_frames:format=duration',
+            '-of', 'json', video_path
+        ],
+        capture_output=True, check=True
+    )
+    data = json.loads(result.stdout)
+    streams = data.get('streams') or []
+    if not streams:
+        return None
+
+    stream = streams[0]
+    fps = _parse_rate(stream.get('avg_frame_rate')) or _parse_rate(stream.get('r_frame_rate'))
+    duration = float(data.get('format', {}).get('duration') or 0.0)
+
+    # Not every container records a frame count; estimate it from the duration
+    frame_count = int(stream.get('nb_frames') or 0) or int(round(duration * fps))
+    return _metadata(int(stream.get('width', 0)), int(stream.get('height', 0)), fps, frame_count, duration)
+
+def _read_metadata_opencv(video_path: str) -> Optional[Dict[str, Any]]:
+    """Read the metadata OpenCV exposes after opening the container."""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            return None
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        return _metadata(
+            int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            fps, frame_count,
+            frame_count / fps if fps > 0 else 0.0
+        )
+    finally:
+        cap.release()
+
+def _metadata(width: int, height: int, fps: float, frame_count: int, duration: float) -> Dict[str, Any]:
+    return {
+        'width': width,
+        'height': height,
+        'fps': fps,
+        'frame_count': frame_count,
+        'duration': duration
+    }
+
+def _parse_rate(rate: Optional[str]) -> float:
+    """Parse an FFmpeg rational such as '30000/1001'."""
+    try:
+        return float(Fraction(rate)) if rate else 0.0
+    except (ValueError, ZeroDivisionError):
+        return 0.0
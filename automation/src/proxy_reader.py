@@ -0,0 +1,142 @@
+"""
+Proxy decoding for TikTok content automation.
+
+The analysis passes (quality filter, highlight window, reframing and scene
+detection) only look at small greyscale copies of some frames of a source.
+They are all decoded here. FFmpeg decodes, subsamples and shrinks the frames
+in one pass and can skip decoding work a coarse picture does not need;
+OpenCV is the fallback and only converts the frames that are kept.
+"""
+
+import re
+import subprocess
+from typing import Optional, Sequence, Tuple
+import cv2
+import numpy as np
+
+_PTS_TIME = re.compile(rb'pts_time:\s*(-?[\d.]+)')
+
+def read_proxies_ffmpeg(
+    video_path: str,
+    size: Tuple[int, int],
+    analysis_fps: Optional[float] = None,
+    start: float = 0.0,
+    duration: Optional[float] = None,
+    fast: bool = False,
+    keyframes: bool = False
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decode proxies with FFmpeg.
+
+    Args:
+        video_path: Video file
+        size: Proxy (width, height)
+        analysis_fps: Samples per second; required unless keyframes is set
+        start: Seconds into the video to start from
+        duration: Seconds to decode; None reads to the end
+        fast: Skip the loop filter and B-frames, for a coarser picture sooner
+        keyframes: Decode only the keyframes, at their own times
+
+    Returns:
+        Proxies as a (count, height, width) uint8 array, and their times in
+        seconds from start
+
+    Raises:
+        OSError, subprocess.CalledProcessError: If FFmpeg cannot run or fails
+    """
+    width, height = size
+    command = ['ffmpeg', '-hide_banner', '-nostats', '-loglevel', 'info' if keyframes else 'error']
+    if fast:
+        command += ['-skip_loop_filter', 'all', '-skip_frame', 'bidir']
+    if keyframes:
+        command += ['-skip_frame', 'nokey']
+    if start > 0:
+        command += ['-ss', f"{start:.3f}"]
+    if duration is not None:
+        command += ['-t', f"{duration:.3f}"]
+
+    filters = [] if keyframes else [f"fps={analysis_fps}"]
+    filters += [f"scale={width}:{height}:flags=area", 'format=gray']
+    if keyframes:
+        # showinfo logs one pts_time per frame it passes on
+        filters.append('showinfo')
+
+    command += ['-i', video_path, '-an', '-sn', '-dn', '-vf', ','.join(filters)]
+    if keyframes:
+        command += ['-fps_mode', 'passthrough']
+    command += ['-f', 'rawvideo', '-']
+
+    result = subprocess.run(command, capture_output=True, check=True)
+    proxies = frames_from_raw(result.stdout, size)
+    if not keyframes:
+        return proxies, np.arange(len(proxies)) / analysis_fps
+
+    times = np.array([float(value) for value in _PTS_TIME.findall(result.stderr)])
+    count = min(len(proxies), len(times))
+    return proxies[:count], times[:count]
+
+def read_proxies_opencv(
+    video_path: str,
+    size: Tuple[int, int],
+    indices: Sequence[int],
+    seek: bool = False
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decode proxies of some frames with OpenCV.
+
+    Args:
+        video_path: Video file
+        size: Proxy (width, height)
+        indices: Frame numbers to sample, in increasing order
+        seek: Seek to every sampled frame instead of decoding the frames in
+            between; faster when the samples are far apart
+
+    Returns:
+        Proxies of the frames that could be read, and their frame numbers
+    """
+    proxies = []
+    read = []
+
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if seek:
+            for index in indices:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+                ret, frame = cap.read()
+                if ret:
+                    proxies.append(_proxy(frame, size))
+                    read.append(index)
+        elif len(indices):
+            wanted = set(indices)
+            first = indices[0]
+            if first > 0:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, first)
+
+            # Frames in between are only grabbed, which skips the colour conversion
+            for index in range(first, indices[-1] + 1):
+                if not cap.grab():
+                    break
+                if index not in wanted:
+                    continue
+
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                proxies.append(_proxy(frame, size))
+                read.append(index)
+    finally:
+        cap.release()
+
+    if not proxies:
+        return np.empty((0, size[1], size[0]), dtype=np.uint8), np.empty(0, dtype=np.int64)
+    return np.stack(proxies), np.array(read)
+
+def frames_from_raw(data: bytes, size: Tuple[int, int]) -> np.ndarray:
+    """Split raw greyscale output into proxies, dropping a trailing partial frame."""
+    width, height = size
+    count = len(data) // (width * height)
+    return np.frombuffer(data[:count * width * height], dtype=np.uint8).reshape(count, height, width)
+
+def _proxy(frame: np.ndarray, size: Tuple[int, int]) -> np.ndarray:
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
@@ -0,0 +1,240 @@
+"""
+Vertical reframing for TikTok content automation.
+
+Landscape sources are cropped to the target aspect ratio (9:16 by default)
+before being scaled once to the target resolution. The crop window follows
+the interesting part of each shot: small greyscale proxies are sampled a few
+times per second, scored for motion and edge energy in NumPy batches, and the
+best window position is smoothed over time within each shot.
+"""
+
+import shutil
+import logging
+import subprocess
+from typing import Tuple
+import numpy as np
+from .proxy_reader import read_proxies_ffmpeg, read_proxies_opencv
+
+# Width of the analysis proxies, in pixels
+PROXY_WIDTH = 160
+
+class CropPlan:
+    def __init__(
+        self,
+        crop_width: int,
+        crop_height: int,
+        start_frame: int,
+        fps: float,
+        sample_times: np.ndarray,
+        offsets: np.ndarray,
+        axis: str = 'x'
+    ):
+        """
+        Describe how the crop window moves over the kept frame range.
+
+        Args:
+            crop_width: Width of the crop window in source pixels
+            crop_height: Height of the crop window in source pixels
+            start_frame: First source frame the plan applies to
+            fps: Source frame rate
+            sample_times: Seconds since start_frame at which offsets are known
+            offsets: Crop offset along axis at each sample time
+            axis: 'x' to pan horizontally, 'y' to pan vertically
+        """
+        self.crop_width = crop_width
+        self.crop_height = crop_height
+        self.start_frame = start_frame
+        self.fps = fps
+        self.sample_times = sample_times
+        self.offsets = offsets
+        self.axis = axis
+
+    @classmethod
+    def static(cls, crop_width: int, crop_height: int, x: int, y: int) -> 'CropPlan':
+        """A crop window that never moves."""
+        axis = 'x' if x else 'y'
+        return cls(crop_width, crop_height, 0, 1.0, np.zeros(1), np.array([x or y]), axis)
+
+    def offset(self, frame_index: int) -> Tuple[int, int]:
+        """Return the (x, y) crop offset for a source frame."""
+        t = (frame_index - self.start_frame) / self.fps
+        value = int(round(float(np.interp(t, self.sample_times, self.offsets))))
+        return (value, 0) if self.axis == 'x' else (0, value)
+
+    def crop(self, frame: np.ndarray, frame_index: int) -> np.ndarray:
+        """Cut the crop window out of a source frame."""
+        x, y = self.offset(frame_index)
+        return frame[y:y + self.crop_height, x:x + self.crop_width]
+
+    def write_sendcmd(self, path: str, frame_count: int) -> None:
+        """
+        Write an FFmpeg sendcmd script that moves a crop filter like this plan.
+
+        Times are relative to the first kept frame, which is where FFmpeg's
+        timeline starts after input seeking.
+        """
+        with open(path, 'w') as f:
+            previous = None
+            for index in range(frame_count):
+                x, y = self.offset(self.start_frame + index)
+                value = x if self.axis == 'x' else y
+                if value != previous:
+                    f.write(f"{index / self.fps:.4f} crop {self.axis} {value};\n")
+                    previous = value
+
+def crop_size(width: int, height: int, target_width: int, target_height: int) -> Tuple[int, int]:
+    """Largest even-sized window of the target aspect ratio that fits the source."""
+    if width * target_height > height * target_width:
+        crop_width = min(width, int(round(height * target_width / target_height)))
+        return crop_width - crop_width % 2, height
+    crop_height = min(height, int(round(width * target_height / target_width)))
+    return width, crop_height - crop_height % 2
+
+def plan_reframe(
+    video_path: str,
+    width: int,
+    height: int,
+    fps: float,
+    start_frame: int,
+    frame_count: int,
+    target_width: int,
+    target_height: int,
+    analysis_fps: float = 5.0,
+    smoothing_seconds: float = 1.0,
+    shot_threshold: float = 30.0
+) -> CropPlan:
+    """
+    Plan the crop window for the kept part of a video.
+
+    Args:
+        video_path: Source video
+        width: Source frame width
+        height: Source frame height
+        fps: Source frame rate
+        start_frame: First kept frame
+        frame_count: Number of kept frames
+        target_width: Output width
+        target_height: Output height
+        analysis_fps: Proxy frames sampled per second
+        smoothing_seconds: Length of the temporal smoothing window
+        shot_threshold: Mean proxy difference (0-255) treated as a shot cut
+
+    Returns:
+        CropPlan covering the kept frames
+    """
+    crop_width, crop_height = crop_size(width, height, target_width, target_height)
+    if crop_width == width and crop_height == height:
+        return CropPlan.static(width, height, 0, 0)
+
+    axis = 'x' if crop_width < width else 'y'
+    slack = (width - crop_width) if axis == 'x' else (height - crop_height)
+
+    proxy_height = max(2, int(round(height * PROXY_WIDTH / width)))
+    frames = _read_proxies(
+        video_path, fps, start_frame, frame_count, analysis_fps, PROXY_WIDTH, proxy_height
+    )
+    if len(frames) == 0:
+        center = slack // 2
+        return CropPlan.static(crop_width, crop_height, *((center, 0) if axis == 'x' else (0, center)))
+
+    sample_times = np.arange(len(frames)) / analysis_fps
+    scale = (width / PROXY_WIDTH) if axis == 'x' else (height / proxy_height)
+    window = max(1, int(round((crop_width if axis == 'x' else crop_height) / scale)))
+
+    saliency, cuts = _score_frames(frames, shot_threshold)
+    profile = saliency.sum(axis=1 if axis == 'x' else 2)
+
+    # Assign every sample to a shot; the crop never smooths across a cut
+    shots = np.cumsum(cuts)
+    smoothing = max(1, int(round(smoothing_seconds * analysis_fps)))
+    positions = np.empty(len(frames))
+    for shot in np.unique(shots):
+        members = np.flatnonzero(shots == shot)
+        smoothed = _moving_average(profile[members], smoothing)
+        best = _best_window_starts(smoothed, window)
+        positions[members] = _moving_average(best[:, None].astype(np.float64), smoothing)[:, 0]
+
+    offsets = np.clip(np.round(positions * scale), 0, slack).astype(int)
+
+    # Duplicate the last position of each shot just before the cut, so
+    # interpolation jumps at cuts instead of panning across them
+    cut_indices = np.flatnonzero(cuts)
+    if cut_indices.size:
+        epsilon = 0.5 / fps
+        sample_times = np.insert(sample_times, cut_indices, sample_times[cut_indices] - epsilon)
+        offsets = np.insert(offsets, cut_indices, offsets[cut_indices - 1])
+
+    return CropPlan(crop_width, crop_height, start_frame, fps, sample_times, offsets, axis)
+
+def _score_frames(frames: np.ndarray, shot_threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Score a batch of greyscale proxies.
+
+    Returns:
+        Per-pixel saliency (motion plus edge energy) for every frame, and a
+        boolean array marking frames that start a new shot
+    """
+    batch = frames.astype(np.float32)
+
+    # Motion: difference to the previous sample (the first sample borrows the second's)
+    motion = np.abs(np.diff(batch, axis=0))
+    motion = np.concatenate([motion[:1], motion], axis=0) if len(motion) else np.zeros_like(batch)
+
+    # Edges keep static but detailed regions (faces, text) in frame
+    edges = np.zeros_like(batch)
+    edges[:, :, 1:] += np.abs(np.diff(batch, axis=2))
+    edges[:, 1:, :] += np.abs(np.diff(batch, axis=1))
+
+    frame_difference = motion.mean(axis=(1, 2))
+    cuts = frame_difference > shot_threshold
+    cuts[0] = False
+
+    return motion + 0.5 * edges, cuts
+
+def _best_window_starts(profile: np.ndarray, window: int) -> np.ndarray:
+    """Start index of the window with the largest total for every row of profile."""
+    length = profile.shape[1]
+    if window >= length:
+        return np.zeros(len(profile), dtype=int)
+
+    cumulative = np.concatenate([np.zeros((len(profile), 1)), np.cumsum(profile, axis=1)], axis=1)
+    totals = cumulative[:, window:] - cumulative[:, :-window]
+    return np.argmax(totals, axis=1)
+
+def _moving_average(values: np.ndarray, size: int) -> np.ndarray:
+    """Centered moving average along the first axis, shrinking at the edges."""
+    if size <= 1 or len(values) <= 1:
+        return values.astype(np.float64)
+
+    cumulative = np.concatenate([np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0)])
+    index = np.arange(len(values))
+    low = np.clip(index - size // 2, 0, len(values))
+    high = np.clip(index + size - size // 2, 0, len(values))
+    counts = (high - low).reshape((-1,) + (1,) * (values.ndim - 1))
+    return (cumulative[high] - cumulative[low]) / counts
+
+def _read_proxies(
+    video_path: str,
+    fps: float,
+    start_frame: int,
+    frame_count: int,
+    analysis_fps: float,
+    proxy_width: int,
+    proxy_height: int
+) -> np.ndarray:
+    """Decode the kept range as small greyscale frames at analysis_fps."""
+    if shutil.which('ffmpeg'):
+        try:
+            proxies, _ = read_proxies_ffmpeg(
+                video_path, (proxy_width, proxy_height), analysis_fps,
+                start_frame / fps, frame_count / fps
+            )
+            return proxies
+        except (OSError, subprocess.CalledProcessError) as e:
+            logging.getLogger(__name__).warning(f"FFmpeg proxy decode failed, using OpenCV: {str(e)}")
+
+    step = max(1, int(round(fps / analysis_fps)))
+    proxies, _ = read_proxies_opencv(
+        video_path, (proxy_width, proxy_height), range(start_frame, start_frame + frame_count, step)
+    )
+    return proxies
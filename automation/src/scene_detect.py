@@ -0,0 +1,174 @@
+"""
+Scene-cut detection for TikTok content automation.
+
+Each source is decoded once into tiny greyscale proxies. When its keyframes
+are close enough together, FFmpeg decodes only the keyframes (encoders also
+place keyframes at cuts); otherwise it samples a few frames per second while
+skipping the loop filter and B-frames, since only a coarse picture is needed.
+Consecutive proxies are compared in NumPy batches by histogram distance and
+mean absolute difference; where both jump there is a cut. The scenes between
+cuts are ranked by how much happens in them, and the highlight window is cut
+from the best stretch of scenes.
+"""
+
+import shutil
+import logging
+import subprocess
+from typing import Dict, List, Tuple
+import numpy as np
+from .proxy_reader import read_proxies_ffmpeg, read_proxies_opencv
+
+# Proxy size; the aspect ratio does not matter for histograms and differences
+PROXY_SIZE = (64, 36)
+
+HISTOGRAM_BINS = 32
+
+class SceneDetector:
+    def __init__(
+        self,
+        analysis_fps: float = 2.0,
+        keyframe_gap: float = 3.0,
+        cut_threshold: float = 0.3,
+        difference_threshold: float = 20.0
+    ):
+        """
+        Describe how scenes are found.
+
+        Args:
+            analysis_fps: Frames per second sampled when keyframes are too sparse
+            keyframe_gap: Largest gap between keyframes (seconds) for which
+                decoding only the keyframes is accurate enough
+            cut_threshold: Histogram distance (0-1) a cut must exceed
+            difference_threshold: Mean absolute difference (0-255) a cut must exceed
+        """
+        self.logger = logging.getLogger(__name__)
+        self.analysis_fps = analysis_fps
+        self.keyframe_gap = keyframe_gap
+        self.cut_threshold = cut_threshold
+        self.difference_threshold = difference_threshold
+
+    def detect(self, video_path: str, fps: float, total_frames: int) -> List[Dict[str, float]]:
+        """
+        Find the scenes of a video.
+
+        Returns:
+            Scenes as dicts of 'start' and 'end' (seconds) and 'score' (mean
+            difference between samples inside the scene), best first
+        """
+        duration = total_frames / fps
+        proxies, times = self._read(video_path, fps, total_frames, duration)
+        if len(proxies) == 0:
+            return []
+
+        scenes = find_scenes(
+            proxies, times, duration, self.cut_threshold, self.difference_threshold
+        )
+        return sorted(scenes, key=lambda scene: scene['score'], reverse=True)
+
+    def _read(
+        self,
+        video_path: str,
+        fps: float,
+        total_frames: int,
+        duration: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Decode proxies and their timestamps as cheaply as the source allows."""
+        if shutil.which('ffmpeg'):
+            try:
+                proxies, times = read_proxies_ffmpeg(video_path, PROXY_SIZE, keyframes=True)
+                if len(times) > 1:
+                    gaps = np.diff(np.concatenate([[0.0], times, [duration]]))
+                    if gaps.max() <= self.keyframe_gap:
+                        return proxies, times
+
+                return read_proxies_ffmpeg(video_path, PROXY_SIZE, self.analysis_fps, fast=True)
+            except (OSError, subprocess.CalledProcessError) as e:
+                self.logger.warning(f"FFmpeg scene decode failed, using OpenCV: {str(e)}")
+
+        step = max(1, int(round(fps / self.analysis_fps)))
+        proxies, indices = read_proxies_opencv(video_path, PROXY_SIZE, range(0, total_frames, step))
+        return proxies, indices / fps
+
+def find_scenes(
+    proxies: np.ndarray,
+    times: np.ndarray,
+    duration: float,
+    cut_threshold: float = 0.3,
+    difference_threshold: float = 20.0
+) -> List[Dict[str, float]]:
+    """
+    Split a proxy sequence into scenes.
+
+    Args:
+        proxies: NxHxW uint8 greyscale frames
+        times: Timestamp of each proxy in seconds
+        duration: Length of the video in seconds
+
+    Returns:
+        Scenes in order, as dicts of 'start', 'end' and 'score'
+    """
+    histogram, difference = score_changes(proxies)
+    cuts = np.flatnonzero((histogram >= cut_threshold) & (difference >= difference_threshold))
+
+    # A cut is placed at the first sample of the new shot, so a window
+    # starting there never opens on the tail of the previous one
+    bounds = [0, *cuts.tolist(), len(proxies)]
+    scenes = []
+    for first, last in zip(bounds[:-1], bounds[1:]):
+        inside = difference[first + 1:last]
+        scenes.append({
+            'start': float(times[first]) if first else 0.0,
+            'end': float(times[last]) if last < len(times) else duration,
+            'score': float(inside.mean()) if len(inside) else 0.0
+        })
+    return scenes
+
+def score_changes(proxies: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compare every proxy with the previous one.
+
+    Returns:
+        Histogram distance (half the L1 distance of the normalized
+        histograms, 0-1) and mean absolute difference (0-255); both are 0
+        for the first proxy
+    """
+    count = len(proxies)
+    flat = proxies.reshape(count, -1)
+
+    # One bincount for all histograms: offset each frame's bins into its own range
+    bins = (flat >> (8 - int(np.log2(HISTOGRAM_BINS)))).astype(np.int64)
+    bins += (np.arange(count) * HISTOGRAM_BINS)[:, None]
+    histograms = np.bincount(bins.ravel(), minlength=count * HISTOGRAM_BINS)
+    histograms = histograms.reshape(count, HISTOGRAM_BINS) / flat.shape[1]
+
+    histogram = np.zeros(count)
+    difference = np.zeros(count)
+    if count > 1:
+        histogram[1:] = 0.5 * np.abs(np.diff(histograms, axis=0)).sum(axis=1)
+        difference[1:] = np.abs(np.diff(flat.astype(np.int16), axis=0)).mean(axis=1)
+    return histogram, difference
+
+def highlight_start(scenes: List[Dict[str, float]], duration: float, window: float) -> float:
+    """
+    Choose where a window of window seconds starts.
+
+    Windows start at a scene start (or end at the end of the video) and are
+    scored by the activity of the scenes they cover, weighted by overlap.
+
+    Returns:
+        Start of the best window in seconds
+    """
+    if duration <= window or not scenes:
+        return 0.0
+
+    starts = sorted({min(scene['start'], duration - window) for scene in scenes})
+    scene_starts = np.array([scene['start'] for scene in scenes])
+    scene_ends = np.array([scene['end'] for scene in scenes])
+    scores = np.array([scene['score'] for scene in scenes])
+
+    candidates = np.array(starts)[:, None]
+    overlap = np.minimum(scene_ends, candidates + window) - np.maximum(scene_starts, candidates)
+    totals = (np.clip(overlap, 0, None) * scores).sum(axis=1)
+
+    # argmax keeps the earliest of equally good windows
+    return float(starts[int(np.argmax(totals))])
@@ -116,15 +116,23 @@ class ContentScraper:
             filename = f"pexels_{Path(video_url).stem}.mp4"
             output_path = self.content_dir / filename
             
+            # A finished download from an earlier run can be reused as-is
+            if output_path.exists():
+                return str(output_path)
+            
+            # Download to a temporary name so a crash never leaves a truncated video behind
+            partial_path = output_path.with_suffix('.mp4.part')
+            
             async with aiohttp.ClientSession() as session:
                 async with session.get(video_url) as response:
                     if response.status == 200:
-                        with open(output_path, 'wb') as f:
+                        with open(partial_path, 'wb') as f:
                             while True:
                                 chunk = await response.content.read(8192)
                                 if not chunk:
                                     break
                                 f.write(chunk)
+                        os.replace(partial_path, output_path)
                         return str(output_path)
             
             return None
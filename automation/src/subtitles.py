@@ -0,0 +1,236 @@
+"""
+Burned-in subtitles for TikTok content automation.
+
+Transcript segments are rasterized into outlined text sprites once per
+segment and output width, then cached. While a video renders, each frame only
+looks up the segment on screen and blends its sprite, the same way the
+watermark is applied; the FFmpeg backend overlays the same sprites as a timed
+image sequence inside its single filtergraph.
+"""
+
+import re
+import bisect
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import cv2
+import numpy as np
+from .overlay import Sprite, render_text_sprite
+
+# Font sizes are given for a 1080 pixel wide frame and scaled with the output
+REFERENCE_WIDTH = 1080
+
+_SRT_TIME = re.compile(r'(\d+):(\d{2}):(\d{2})[,.](\d{3})')
+
+class SubtitleTrack:
+    def __init__(
+        self,
+        segments: List[dict],
+        font_scale: float = 1.8,
+        thickness: int = 3,
+        max_width: float = 0.9,
+        bottom_margin: float = 0.2
+    ):
+        """
+        Describe the subtitles burned into a video.
+
+        Args:
+            segments: Transcript segments with 'start' and 'end' (seconds into
+                the source video) and 'text'
+            font_scale: Font scale at a frame width of 1080 pixels
+            thickness: Stroke thickness at a frame width of 1080 pixels
+            max_width: Widest a line may be, as a fraction of the frame width
+            bottom_margin: Gap below the text, as a fraction of the frame height,
+                keeping it clear of the app's own controls
+        """
+        self.segments = sorted(
+            (
+                {'start': float(s['start']), 'end': float(s['end']), 'text': ' '.join(s['text'].split())}
+                for s in segments
+                if s['text'].strip() and s['end'] > s['start']
+            ),
+            key=lambda s: s['start']
+        )
+        self.font_scale = font_scale
+        self.thickness = thickness
+        self.max_width = max_width
+        self.bottom_margin = bottom_margin
+
+        self._starts = [segment['start'] for segment in self.segments]
+
+        # Rasterized text, keyed by (segment index, frame width)
+        self._sprites: Dict[Tuple[int, int], Sprite] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.segments)
+
+    def segment_at(self, time: float) -> Optional[int]:
+        """Index of the segment on screen at time (seconds into the source), or None."""
+        index = bisect.bisect_right(self._starts, time) - 1
+        if index >= 0 and time < self.segments[index]['end']:
+            return index
+        return None
+
+    def apply(self, frame: np.ndarray, time: float) -> np.ndarray:
+        """Blend the subtitle on screen at time onto frame in place."""
+        index = self.segment_at(time)
+        if index is None:
+            return frame
+
+        height, width = frame.shape[:2]
+        sprite = self.sprite(index, width)
+        return sprite.blend(
+            frame, (width - sprite.width) // 2, self._bottom(height) - sprite.height
+        )
+
+    def sprite(self, index: int, width: int) -> Sprite:
+        """Return the sprite of one segment for a frame width, rasterizing it on first use."""
+        sprite = self._sprites.get((index, width))
+        if sprite is None:
+            sprite = self._render(self.segments[index]['text'], width)
+            self._sprites[(index, width)] = sprite
+        return sprite
+
+    def write_ffconcat(
+        self,
+        directory: str,
+        width: int,
+        height: int,
+        start_time: float = 0.0,
+        duration: Optional[float] = None
+    ) -> Optional[Tuple[str, int]]:
+        """
+        Write the subtitles of a window as an image sequence for FFmpeg's concat demuxer.
+
+        Every segment becomes one full-width transparent PNG band, shown from
+        its start to its end relative to start_time, with a blank band in the
+        gaps. Overlaying the sequence at the returned y position (with
+        shortest=1, as it outlasts the window) draws the same text, in the
+        same place, as apply().
+
+        Returns:
+            Path to the ffconcat script and the band's y position, or None if
+            no subtitle falls inside the window
+        """
+        end_time = start_time + duration if duration is not None else float('inf')
+        shown = [
+            (index, max(segment['start'], start_time) - start_time, min(segment['end'], end_time) - start_time)
+            for index, segment in enumerate(self.segments)
+            if segment['end'] > start_time and segment['start'] < end_time
+        ]
+        if not shown:
+            return None
+
+        sprites = {index: self.sprite(index, width) for index, _, _ in shown}
+        band_height = max(sprite.height for sprite in sprites.values())
+        band_y = self._bottom(height) - band_height
+
+        directory = Path(directory)
+        blank = directory / 'subtitle_blank.png'
+        cv2.imwrite(str(blank), np.zeros((band_height, width, 4), dtype=np.uint8))
+
+        entries = []
+        position = 0.0
+        for index, start, end in shown:
+            if end <= position:
+                continue
+            if start > position:
+                entries.append((blank, start - position))
+
+            band = np.zeros((band_height, width, 4), dtype=np.uint8)
+            sprite = sprites[index]
+            x = (width - sprite.width) // 2
+            band[band_height - sprite.height:, x:x + sprite.width] = sprite.to_bgra()
+
+            path = directory / f"subtitle_{index:04d}.png"
+            cv2.imwrite(str(path), band)
+            entries.append((path, end - max(start, position)))
+            position = end
+
+        # A blank band lasts past the end of the window, so the sequence never
+        # ends first; the concat demuxer ignores the duration of the last
+        # entry, so the blank is listed twice
+        tail = duration - position + 1.0 if duration is not None else 86400.0
+        lines = ['ffconcat version 1.0']
+        for path, length in entries + [(blank, tail)]:
+            lines += [f"file '{path.resolve()}'", f"duration {length:.3f}"]
+        lines.append(f"file '{blank.resolve()}'")
+
+        script = directory / 'subtitles.ffconcat'
+        script.write_text('\n'.join(lines) + '\n')
+        return str(script), band_y
+
+    def _bottom(self, height: int) -> int:
+        """Row the bottom of the subtitle sprites sits on."""
+        return height - int(round(height * self.bottom_margin))
+
+    def _render(self, text: str, width: int) -> Sprite:
+        """Rasterize one segment as centered, word-wrapped lines."""
+        scale = self.font_scale * width / REFERENCE_WIDTH
+        thickness = max(1, int(round(self.thickness * width / REFERENCE_WIDTH)))
+        lines = wrap_text(text, scale, thickness, int(width * self.max_width))
+        sprites = [render_text_sprite(line, scale, thickness)[0] for line in lines]
+
+        sprite_width = max(sprite.width for sprite in sprites)
+        sprite_height = sum(sprite.height for sprite in sprites)
+        premultiplied = np.zeros((sprite_height, sprite_width, 3), dtype=np.uint8)
+        alpha = np.zeros((sprite_height, sprite_width), dtype=np.uint8)
+
+        y = 0
+        for line in sprites:
+            x = (sprite_width - line.width) // 2
+            premultiplied[y:y + line.height, x:x + line.width] = line.premultiplied
+            alpha[y:y + line.height, x:x + line.width] = line.alpha
+            y += line.height
+
+        return Sprite(premultiplied, alpha)
+
+def wrap_text(text: str, font_scale: float, thickness: int, max_width: int) -> List[str]:
+    """Greedily break text into lines no wider than max_width pixels; long words get a line of their own."""
+    lines = []
+    line = ''
+    for word in text.split():
+        candidate = f"{line} {word}" if line else word
+        (candidate_width, _), _ = cv2.getTextSize(
+            candidate, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness
+        )
+        if line and candidate_width > max_width:
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    if line:
+        lines.append(line)
+    return lines or ['']
+
+def parse_srt(path: str) -> List[dict]:
+    """
+    Read the segments of an SRT file.
+
+    Returns:
+        List of dicts with 'start' and 'end' in seconds and 'text'
+    """
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        blocks = re.split(r'\n\s*\n', f.read().replace('\r\n', '\n').strip())
+
+    segments = []
+    for block in blocks:
+        lines = block.split('\n')
+        for number, line in enumerate(lines):
+            if '-->' not in line:
+                continue
+            start, _, end = line.partition('-->')
+            segments.append({
+                'start': _parse_timestamp(start),
+                'end': _parse_timestamp(end),
+                'text': ' '.join(text.strip() for text in lines[number + 1:])
+            })
+            break
+    return segments
+
+def _parse_timestamp(value: str) -> float:
+    """Parse an SRT timestamp (HH:MM:SS,mmm) into seconds."""
+    match = _SRT_TIME.search(value)
+    if match is None:
+        raise ValueError(f"Invalid SRT timestamp: {value.strip()}")
+    hours, minutes, seconds, milliseconds = (int(part) for part in match.groups())
+    return hours * 3600 + minutes * 60 + seconds + milliseconds / 1000
@@ -0,0 +1,130 @@
+"""
+Transcript store for TikTok content automation.
+
+Transcripts are kept in the artifact cache under the fingerprint of the
+decoded audio plus everything that affects the output (backend, model,
+precision, detector and probe settings), so the same audio is transcribed
+once no matter how often it is re-uploaded, re-encoded or retried.
+
+Identical fingerprints are found by key. Re-encoded copies have slightly
+different fingerprints; they are found through an index of fingerprints
+grouped by whole seconds of duration, and match when few enough bits
+differ in the frames that are not silent. Audio with too little sound for
+that comparison to mean anything only ever matches exactly. Eviction is the artifact cache's: least recently used first.
+"""
+
+import base64
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional
+import numpy as np
+from .artifact_cache import ArtifactCache
+from .audio import active_frames, bit_error_rate
+
+# Leading sub-fingerprints kept in the index (about two minutes of audio)
+INDEX_FRAMES = 2048
+
+# Sub-fingerprints with sound (about four seconds) needed for a fuzzy match
+MIN_ACTIVE_FRAMES = 64
+
+class TranscriptStore:
+    def __init__(
+        self,
+        cache: ArtifactCache,
+        params: Dict[str, Any],
+        max_bit_error: float = 0.2,
+        duration_tolerance: float = 1.0,
+        index_limit: int = 200
+    ):
+        """
+        Describe the store.
+
+        Args:
+            cache: Cache holding the transcripts and the index
+            params: Backend identity and settings that affect transcripts
+            max_bit_error: Largest fraction of differing fingerprint bits for a match
+            duration_tolerance: Largest difference in duration (seconds) for a match
+            index_limit: Fingerprints kept per second of duration; the oldest are dropped
+        """
+        self.logger = logging.getLogger(__name__)
+        self.cache = cache
+        self.params = params
+        self.max_bit_error = max_bit_error
+        self.duration_tolerance = duration_tolerance
+        self.index_limit = index_limit
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Lookup hits and misses since the store was created."""
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def lookup(self, fingerprint: np.ndarray, duration: float) -> Optional[dict]:
+        """
+        Find the transcript of the same audio.
+
+        Returns:
+            The stored transcript, or None on a miss
+        """
+        transcript = self.cache.get_json(self._transcript_key(digest(fingerprint)))
+        if transcript is None and len(fingerprint):
+            transcript = self._lookup_similar(fingerprint, duration)
+
+        if transcript is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return transcript
+
+    def store(self, fingerprint: np.ndarray, duration: float, transcript: dict) -> None:
+        """Keep the transcript of the audio with this fingerprint."""
+        key = digest(fingerprint)
+        self.cache.put_json(self._transcript_key(key), transcript)
+        if not len(fingerprint):
+            return
+
+        index_key = self._index_key(int(duration))
+        entries = [entry for entry in self.cache.get_json(index_key) or [] if entry['digest'] != key]
+        entries.append({
+            'digest': key,
+            'duration': duration,
+            'fingerprint': base64.b64encode(fingerprint[:INDEX_FRAMES].tobytes()).decode('ascii')
+        })
+        self.cache.put_json(index_key, entries[-self.index_limit:])
+
+    def _lookup_similar(self, fingerprint: np.ndarray, duration: float) -> Optional[dict]:
+        """Search the index for a fingerprint with few enough differing bits."""
+        prefix = fingerprint[:INDEX_FRAMES]
+        if active_frames(prefix) < MIN_ACTIVE_FRAMES:
+            return None
+
+        for second in (int(duration), int(duration) - 1, int(duration) + 1):
+            for entry in self._index(second):
+                if abs(entry['duration'] - duration) > self.duration_tolerance:
+                    continue
+
+                stored = np.frombuffer(base64.b64decode(entry['fingerprint']), dtype='<u4')
+                if bit_error_rate(prefix, stored) > self.max_bit_error:
+                    continue
+
+                # The transcript may have been evicted before its index entry
+                transcript = self.cache.get_json(self._transcript_key(entry['digest']))
+                if transcript is not None:
+                    return transcript
+        return None
+
+    def _index(self, second: int) -> List[dict]:
+        if second < 0:
+            return []
+        return self.cache.get_json(self._index_key(second)) or []
+
+    def _transcript_key(self, fingerprint_digest: str) -> str:
+        return self.cache.make_key('transcript', fingerprint_digest, self.params)
+
+    def _index_key(self, second: int) -> str:
+        return self.cache.make_key('transcript-index', str(second), self.params)
+
+def digest(fingerprint: np.ndarray) -> str:
+    """Hex digest identifying a fingerprint exactly."""
+    return hashlib.sha256(fingerprint.astype('<u4').tobytes()).hexdigest()
@@ -0,0 +1,74 @@
+"""
+Transcript files for TikTok content automation.
+
+Segments are appended to the plain-text, SRT and WebVTT files as soon as
+they are decoded, and every write is flushed, so readers of the files can
+start on the beginning of a transcript while the rest is still being
+transcribed. If transcription fails, the partial files are removed.
+"""
+
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+FORMATS = ('.txt', '.srt', '.vtt')
+
+class TranscriptWriter:
+    def __init__(self, base_path: str):
+        """
+        Open the transcript files.
+
+        Args:
+            base_path: Path without suffix; FORMATS are appended to it
+        """
+        base = Path(base_path)
+        self.paths = [base.with_name(base.name + suffix) for suffix in FORMATS]
+        self.files = [open(path, 'w', encoding='utf-8') for path in self.paths]
+        self.count = 0
+
+        self.files[2].write("WEBVTT\n\n")
+        self._flush()
+
+    def write(self, segment: Dict[str, Any]) -> None:
+        """Append one segment (with 'start', 'end' in seconds and 'text') to every file."""
+        text, srt, vtt = self.files
+        self.count += 1
+        start, end = segment['start'], segment['end']
+
+        text.write(segment['text'])
+        srt.write(f"{self.count}\n")
+        srt.write(f"{format_timestamp(start)} --> {format_timestamp(end)}\n")
+        srt.write(f"{segment['text'].strip()}\n\n")
+        vtt.write(f"{format_timestamp(start, '.')} --> {format_timestamp(end, '.')}\n")
+        vtt.write(f"{segment['text'].strip()}\n\n")
+        self._flush()
+
+    def close(self, remove: bool = False) -> None:
+        """Close the files, deleting them if remove is set."""
+        for file in self.files:
+            file.close()
+        if remove:
+            for path in self.paths:
+                if path.exists():
+                    os.unlink(path)
+
+    def _flush(self) -> None:
+        for file in self.files:
+            file.flush()
+
+    def __enter__(self) -> 'TranscriptWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        # An incomplete transcript must not be mistaken for a finished one
+        self.close(remove=exc_type is not None)
+
+def format_timestamp(seconds: float, separator: str = ',') -> str:
+    """Convert seconds to an SRT (HH:MM:SS,mmm) or, with '.', a WebVTT timestamp."""
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    seconds = seconds % 60
+    milliseconds = int((seconds % 1) * 1000)
+    seconds = int(seconds)
+
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{milliseconds:03d}"
@@ -1,12 +1,37 @@
-import os
+"""
+Transcription service for TikTok content automation.
+
+Each video's transcript is written to subtitles/ as <video name>-<first 8
+characters of its checksum> with .txt (for captions), .srt (for burned-in
+subtitles) and .vtt, appended segment by segment as each chunk finishes,
+plus a .json with the detected language and the probe decision.
+
+Before the full transcription, the model looks once at the first
+probe_seconds of speech. Videos whose no-speech probability reaches
+no_speech_threshold (stock footage, music) get an empty transcript; a
+language detected with at least language_threshold confidence, or the
+configured language, is forced on every chunk.
+
+Creating the service does not wait for the model. The workers load it in
+the background, the pipeline starts warmup() before the downloads so the
+two overlap, and the first model call waits until the workers are ready;
+cached transcripts never wait.
+"""
+
 import asyncio
 import json
 import logging
 from pathlib import Path
-from typing import List, Optional
-import whisper
-import torch
-from .utils import load_config
+from typing import AsyncIterator, List, Optional, Tuple
+from .artifact_cache import ArtifactCache
+from .chunking import plan_chunks, SegmentStitcher
+from .audio import AudioStore, PcmRef, SAMPLE_RATE, fingerprint
+from .transcription_backends import create_backend
+from .transcription_pool import TranscriptionPool
+from .transcript_store import TranscriptStore
+from .transcript_writer import TranscriptWriter
+from .utils import load_config, file_checksum
+from .vad import create_vad, offset_segments
 
 class TranscriptionService:
     def __init__(self, config_path: Optional[str] = None):
@@ -21,97 +46,325 @@ class TranscriptionService:
         self.subtitles_dir = Path(__file__).resolve().parent.parent / 'subtitles'
         self.subtitles_dir.mkdir(exist_ok=True)
         
-        # Initialize Whisper model
-        self.model = whisper.load_model("base")
+        # The speech-recognition backend runs in worker processes that each load the model once
+        self.settings = self.config.get('transcription', {})
+        self.model_name = self.settings.get('model', 'base')
+        self.backend = create_backend(
+            self.settings.get('backend', 'whisper'),
+            self.model_name,
+            compute_type=self.settings.get('compute_type')
+        )
+        self.pool = TranscriptionPool(
+            self.model_name,
+            self.settings.get('workers', 1),
+            self.settings.get('threads_per_worker', 0),
+            self.settings.get('device'),
+            backend=self.backend.name,
+            compute_type=self.backend.compute_type
+        )
+        
+        # Workers start loading the model now, in their own processes, so
+        # construction returns at once; model work first awaits readiness
+        self.pool.start()
+        self._ready: Optional[asyncio.Future] = None
+        
+        # Decoded audio and transcripts are kept in the artifact cache
+        self.cache = ArtifactCache.from_config(self.config)
+        
+        # Each video's audio is decoded once and memory-mapped by every consumer
+        self.audio = AudioStore(self.cache)
         
-        # Set device (GPU if available, else CPU)
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.model.to(self.device)
+        # Only the speech found by the voice-activity detector is transcribed
+        self.vad = create_vad(self.settings)
+        
+        # Long audio is split into chunks that the workers transcribe at the same time
+        self.chunk_seconds = self.settings.get('chunk_seconds', 60)
+        self.chunk_overlap = self.settings.get('chunk_overlap', 1.0)
+        
+        # A short probe decides whether there is speech to transcribe and in which language
+        self.probe_seconds = self.settings.get('probe_seconds', 30)
+        self.no_speech_threshold = self.settings.get('no_speech_threshold', 0.6)
+        self.language_threshold = self.settings.get('language_threshold', 0.5)
+        self.language = self.settings.get('language')
+        
+        # The same audio (re-uploads, re-encodes, retries) is transcribed once per model and settings
+        self.transcripts = TranscriptStore(
+            self.cache,
+            {
+                **self.backend.identity,
+                'vad': self.settings.get('vad', 'energy'),
+                'vad_aggressiveness': self.settings.get('vad_aggressiveness', 2),
+                'chunk_seconds': self.chunk_seconds,
+                'chunk_overlap': self.chunk_overlap,
+                'probe_seconds': self.probe_seconds,
+                'no_speech_threshold': self.no_speech_threshold,
+                'language_threshold': self.language_threshold,
+                'language': self.language
+            },
+            self.settings.get('fingerprint_max_bit_error', 0.2)
+        )
 
     async def transcribe_videos(self, video_paths: List[str]) -> List[str]:
-        """Transcribe multiple videos."""
-        subtitle_paths = []
-        
-        for video_path in video_paths:
+        """Transcribe multiple videos, as many at once as there are workers."""
+        async def transcribe(video_path: str) -> Optional[str]:
             try:
-                subtitle_path = await self.transcribe_video(video_path)
-                if subtitle_path:
-                    subtitle_paths.append(subtitle_path)
+                return await self.transcribe_video(video_path)
             except Exception as e:
                 self.logger.error(f"Error transcribing video {video_path}: {str(e)}")
+                return None
         
-        return subtitle_paths
+        subtitle_paths = await asyncio.gather(*(transcribe(path) for path in video_paths))
+        return [path for path in subtitle_paths if path]
     
-    async def transcribe_video(self, video_path: str) -> Optional[str]:
-        """Transcribe a single video."""
+    async def transcribe_video(self, video_path: str, input_hash: Optional[str] = None) -> Optional[str]:
+        """
+        Transcribe a single video, or any other file with an audio track.
+
+        Writes the plain transcript and, next to it, the timed segments as
+        .srt and .vtt and the detected language as .json. Segments are
+        appended to the files as they are decoded.
+
+        Args:
+            video_path: Path to the video file
+            input_hash: Checksum of video_path, if the caller already has it
+
+        Returns:
+            Path to the plain-text transcript, or None if transcription failed
+        """
         try:
-            # Generate subtitle path
-            video_name = Path(video_path).stem
+            # Videos with the same name from different sources must not overwrite each other
+            loop = asyncio.get_event_loop()
+            input_hash = input_hash or await loop.run_in_executor(None, file_checksum, video_path)
+            video_name = f"{Path(video_path).stem}-{input_hash[:8]}"
             subtitle_path = self.subtitles_dir / f"{video_name}.txt"
             
-            # Run transcription in a thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                self._run_transcription,
-                video_path,
-                subtitle_path
-            )
+            # Opening, writing and flushing the files happens on executor threads
+            metadata = {}
+            writer = await loop.run_in_executor(None, TranscriptWriter, str(subtitle_path.with_suffix('')))
+            try:
+                async for segment in self.stream_video(video_path, metadata, input_hash):
+                    await loop.run_in_executor(None, writer.write, segment)
+            except BaseException:
+                # An incomplete transcript must not be mistaken for a finished one
+                await loop.run_in_executor(None, writer.close, True)
+                raise
+            await loop.run_in_executor(None, writer.close)
             
-            if result:
-                self.logger.info(f"Successfully transcribed video: {video_path}")
-                return str(subtitle_path)
-            else:
-                self.logger.error(f"Failed to transcribe video: {video_path}")
-                return None
+            # How the transcript was made: detected language and the speech probe
+            await loop.run_in_executor(None, _write_json, subtitle_path.with_suffix('.json'), metadata)
+            return str(subtitle_path)
             
         except Exception as e:
             self.logger.error(f"Error transcribing video {video_path}: {str(e)}")
             return None
+
+    async def stream_video(
+        self,
+        video_path: str,
+        metadata: Optional[dict] = None,
+        input_hash: Optional[str] = None
+    ) -> AsyncIterator[dict]:
+        """
+        Yield the transcript segments of a video in order, as soon as they are decoded.
+
+        transcribe_video writes these segments to the transcript files. The
+        pipeline's caption stage needs the whole transcript, so only callers
+        of this API consume the segments while later chunks are still running.
+
+        Chunks are transcribed in parallel; the segments of a chunk are
+        yielded once it and every chunk before it are done.
+
+        Args:
+            metadata: Filled with the transcript's 'language' and 'probe' decision
+            input_hash: Checksum of video_path, if the caller already has it
+
+        Raises:
+            RuntimeError: If a chunk could not be transcribed
+        """
+        metadata = metadata if metadata is not None else {}
+
+        loop = asyncio.get_event_loop()
+        input_hash = input_hash or await loop.run_in_executor(None, file_checksum, video_path)
+        audio = await loop.run_in_executor(None, self.audio.extract, video_path, input_hash)
+
+        # Reuse the transcript of the same audio, however it was encoded
+        pcm = audio.load()
+        duration = len(pcm) / SAMPLE_RATE
+        audio_fingerprint = await loop.run_in_executor(None, fingerprint, pcm, SAMPLE_RATE)
+        result = await loop.run_in_executor(None, self.transcripts.lookup, audio_fingerprint, duration)
+        if result is not None:
+            self.logger.info(
+                f"Using cached transcript for {video_path} "
+                f"({self.transcripts.hits} hits, {self.transcripts.misses} misses)"
+            )
+            metadata.update(language=result.get('language'), probe=result.get('probe'))
+            for segment in result['segments']:
+                yield segment
+            return
+
+        regions = await loop.run_in_executor(None, self._speech_regions, audio)
+        probe = await self._probe(audio, regions)
+        metadata.update(language=probe.get('language'), probe=probe)
+
+        segments = []
+        if probe['decision'] == 'skip':
+            # No audio track or no speech, nothing for the model to do
+            self.logger.info(f"No speech detected in {video_path} ({probe['reason']})")
+        else:
+            options = {'language': probe['language']} if probe.get('forced') else {}
+            async for segment in self._stream_speech(audio, regions, options, metadata):
+                segments.append(segment)
+                yield segment
+
+        await loop.run_in_executor(None, self.transcripts.store, audio_fingerprint, duration, {
+            'text': ''.join(segment['text'] for segment in segments),
+            'segments': segments,
+            **metadata
+        })
+        self.logger.info(
+            f"Successfully transcribed video: {video_path} "
+            f"(transcript cache: {self.transcripts.hits} hits, {self.transcripts.misses} misses)"
+        )
     
-    def _run_transcription(self, video_path: str, output_path: str) -> bool:
-        """Run the Whisper transcription model."""
+    def _speech_regions(self, audio: PcmRef) -> List[Tuple[int, int]]:
+        """Find the sample ranges to transcribe: the speech, or all of the audio without a detector."""
+        pcm = audio.load()
+        if len(pcm) == 0:
+            return []
+        if self.vad is None:
+            return [(0, len(pcm))]
+        return self.vad.detect(pcm, SAMPLE_RATE)
+
+    async def _probe(self, audio: PcmRef, regions: List[Tuple[int, int]]) -> dict:
+        """
+        Decide from the first probe_seconds of speech whether and how to transcribe.
+
+        Returns:
+            Dict with 'decision' ('skip' or 'transcribe') and its 'reason'; when
+            the model was asked, also its 'language', 'language_probability'
+            and 'no_speech_prob', and whether the language is 'forced' on
+            the transcription
+        """
+        if not regions:
+            return {'decision': 'skip', 'reason': 'no speech detected'}
+        if self.probe_seconds <= 0:
+            return {'decision': 'transcribe', 'reason': 'probe disabled',
+                    'language': self.language, 'forced': bool(self.language)}
+
+        refs = []
+        remaining = int(self.probe_seconds * SAMPLE_RATE)
+        for start, end in regions:
+            if remaining <= 0:
+                break
+            refs.append(audio.slice(start, min(end, start + remaining)))
+            remaining -= refs[-1].end - start
+
         try:
-            # Transcribe the video
-            result = self.model.transcribe(video_path)
-            
-            # Save transcription to file
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(result['text'])
-            
-            return True
-            
+            await self.warmup()
+            detection = await self.pool.detect(refs)
         except Exception as e:
-            self.logger.error(f"Error in transcription process: {str(e)}")
-            return False
+            self.logger.error(f"Error probing audio: {str(e)}")
+            return {'decision': 'transcribe', 'reason': 'probe failed',
+                    'language': self.language, 'forced': bool(self.language)}
 
-    async def _save_srt(self, result: dict, output_path: Path) -> None:
-        """Save transcription results in SRT format."""
+        probe = {
+            **detection,
+            'decision': 'transcribe',
+            'reason': 'speech detected',
+            'forced': bool(self.language) or detection['language_probability'] >= self.language_threshold
+        }
+        if self.language:
+            probe['language'] = self.language
+        if detection['no_speech_prob'] >= self.no_speech_threshold:
+            probe.update(decision='skip', reason='no_speech_prob above threshold', forced=False)
+        return probe
+
+    async def _stream_speech(
+        self,
+        audio: PcmRef,
+        regions: List[Tuple[int, int]],
+        options: dict,
+        metadata: dict
+    ) -> AsyncIterator[dict]:
+        """
+        Transcribe the speech regions of the audio in chunks on as many workers
+        as are free, yielding segments on the video's timeline in order.
+
+        Args:
+            options: Decoding options for every chunk, e.g. a forced 'language'
+            metadata: Gets the 'language' the first chunk was transcribed in
+        """
+        await self.warmup()
+        loop = asyncio.get_event_loop()
+        chunks = await loop.run_in_executor(
+            None, plan_chunks, audio.load(), regions, SAMPLE_RATE,
+            self.chunk_seconds, self.chunk_overlap
+        )
+        tasks = [
+            asyncio.ensure_future(self._run_transcription(
+                [audio.slice(start, end) for start, end in chunk.regions], options
+            ))
+            for chunk in chunks
+        ]
+        stitcher = SegmentStitcher()
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                for i, segment in enumerate(result['segments'], 1):
-                    # Convert timestamps to SRT format (HH:MM:SS,mmm)
-                    start = self._format_timestamp(segment['start'])
-                    end = self._format_timestamp(segment['end'])
-                    
-                    # Write SRT entry
-                    f.write(f"{i}\n")
-                    f.write(f"{start} --> {end}\n")
-                    f.write(f"{segment['text'].strip()}\n\n")
-                    
+            for chunk, task in zip(chunks, tasks):
+                result = await task
+                if not result:
+                    raise RuntimeError("Failed to transcribe a chunk of the audio")
+                if chunk is chunks[0] and result.get('language'):
+                    metadata['language'] = result['language']
+
+                # Timestamps are relative to the transcribed speech of the chunk, not the video
+                segments = offset_segments(
+                    [{'start': s['start'], 'end': s['end'], 'text': s['text']} for s in result.get('segments', [])],
+                    chunk.regions, SAMPLE_RATE
+                )
+                for segment in stitcher.add(chunk, segments):
+                    yield segment
+        finally:
+            # The consumer stopped early or a chunk failed
+            for task in tasks:
+                task.cancel()
+
+    async def _run_transcription(self, audio: List[PcmRef], options: Optional[dict] = None) -> Optional[dict]:
+        """Run the backend over the joined audio ranges on a free worker and return its result."""
+        try:
+            return await self.pool.transcribe(audio, options)
+            
         except Exception as e:
-            self.logger.error(f"Error saving SRT file: {str(e)}")
-            raise
-
-    def _format_timestamp(self, seconds: float) -> str:
-        """Convert seconds to SRT timestamp format (HH:MM:SS,mmm)."""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        seconds = seconds % 60
-        milliseconds = int((seconds % 1) * 1000)
-        seconds = int(seconds)
+            self.logger.error(f"Error in transcription process: {str(e)}")
+            return None
+
+    async def warmup(self) -> bool:
+        """
+        Wait until every worker has loaded its model.
+
+        Call it early (e.g. while videos download) to overlap the model load
+        with other work. Concurrent callers share one readiness check, and
+        a failed check is retried by the next caller.
+
+        Returns:
+            True if the workers answered
+        """
+        if self._ready is None or (self._ready.done() and (
+            self._ready.cancelled() or self._ready.exception() is not None or not self._ready.result()
+        )):
+            self._ready = asyncio.ensure_future(self.pool.warmup())
         
-        return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
+        # One caller being cancelled must not cancel the check for the others
+        return await asyncio.shield(self._ready)
+
+    def close(self) -> None:
+        """Stop waiting for the workers and shut them down."""
+        if self._ready is not None and not self._ready.done():
+            self._ready.cancel()
+        self.pool.close()
+
+def _write_json(path: Path, data: dict) -> None:
+    """Write a JSON file."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
 
 async def main():
     transcriber = TranscriptionService()
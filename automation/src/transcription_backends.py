@@ -0,0 +1,189 @@
+"""
+Speech-recognition engines for TikTok content automation.
+
+A backend loads one model and transcribes 16 kHz mono float32 PCM into
+timestamped segments. The transcription workers hold one backend each;
+which one is chosen by `transcription.backend` in the configuration:
+
+- whisper: openai-whisper in PyTorch (fp32 on the CPU, fp16 on CUDA;
+  compute_type is ignored)
+- faster-whisper: the same models converted for CTranslate2 and run with
+  int8 weights by default, several times faster on the CPU (optional
+  dependency: pip install faster-whisper)
+
+scripts/benchmark_transcription.py prints the real-time factor of each
+installed backend on the current hardware.
+"""
+
+import abc
+import logging
+from typing import Any, Dict, Optional
+import numpy as np
+
+class TranscriptionBackend(abc.ABC):
+    """Interface of a speech-recognition engine."""
+    name = ''
+
+    def __init__(
+        self,
+        model_name: str = 'base',
+        device: Optional[str] = None,
+        threads: int = 1,
+        compute_type: Optional[str] = None
+    ):
+        """
+        Describe the model to load.
+
+        Args:
+            model_name: Model name (or checkpoint path)
+            device: 'cpu' or 'cuda'; None picks CUDA when it is available
+            threads: CPU threads the engine may use
+            compute_type: Numeric precision, for engines that offer a choice
+        """
+        self.logger = logging.getLogger(__name__)
+        self.model_name = model_name
+        self.device = device
+        self.threads = threads
+        self.compute_type = compute_type
+
+    @property
+    def identity(self) -> Dict[str, Any]:
+        """Everything that affects the output, for cache keys."""
+        return {'backend': self.name, 'model': self.model_name, 'compute_type': self.compute_type}
+
+    @abc.abstractmethod
+    def load(self) -> None:
+        """Load the model; called once per worker process."""
+
+    @abc.abstractmethod
+    def transcribe(self, audio: Any, options: Dict[str, Any]) -> dict:
+        """
+        Transcribe audio.
+
+        Args:
+            audio: 16 kHz mono float32 PCM (some engines also accept a file path)
+            options: Decoding options such as 'language'
+
+        Returns:
+            Dict with 'text', 'segments' (dicts with at least 'start', 'end'
+            in seconds and 'text') and, when detected, 'language'
+        """
+
+    @abc.abstractmethod
+    def detect(self, audio: np.ndarray) -> dict:
+        """
+        Probe up to 30 seconds of PCM for speech and its language.
+
+        Returns:
+            Dict with the most likely 'language', its 'language_probability'
+            and 'no_speech_prob', the model's probability that there is no speech
+        """
+
+class WhisperBackend(TranscriptionBackend):
+    name = 'whisper'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # The precision follows the device, so it must not end up in cache keys
+        if self.compute_type:
+            self.logger.warning(f"The whisper backend ignores compute_type {self.compute_type}")
+            self.compute_type = None
+
+    def load(self) -> None:
+        import torch
+        import whisper
+
+        torch.set_num_threads(self.threads)
+        self.device = self.device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.model = whisper.load_model(self.model_name, device=self.device)
+
+    def transcribe(self, audio: Any, options: Dict[str, Any]) -> dict:
+        # Half precision is only supported on the GPU
+        return self.model.transcribe(audio, **{'fp16': self.device == 'cuda', **options})
+
+    def detect(self, audio: np.ndarray) -> dict:
+        import whisper
+
+        # One 30-second window; decoding a single token yields both probabilities
+        mel = whisper.log_mel_spectrogram(
+            whisper.pad_or_trim(np.asarray(audio, dtype=np.float32)), self.model.dims.n_mels
+        ).to(self.model.device)
+        result = whisper.decode(self.model, mel, whisper.DecodingOptions(
+            fp16=self.device == 'cuda', without_timestamps=True, sample_len=1
+        ))
+
+        # English-only models do not detect the language
+        probabilities = result.language_probs or {result.language: 1.0}
+        language = max(probabilities, key=probabilities.get)
+        return {
+            'language': language,
+            'language_probability': float(probabilities[language]),
+            'no_speech_prob': float(result.no_speech_prob)
+        }
+
+class FasterWhisperBackend(TranscriptionBackend):
+    name = 'faster-whisper'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.compute_type = self.compute_type or 'int8'
+
+    def load(self) -> None:
+        from faster_whisper import WhisperModel
+
+        self.model = WhisperModel(
+            self.model_name,
+            device=self.device or 'auto',
+            compute_type=self.compute_type,
+            cpu_threads=self.threads
+        )
+
+    def transcribe(self, audio: Any, options: Dict[str, Any]) -> dict:
+        if isinstance(audio, np.ndarray) and audio.dtype != np.float32:
+            audio = audio.astype(np.float32)
+
+        # Segments are generated lazily as the audio is decoded
+        segments, info = self.model.transcribe(audio, **options)
+        segments = [
+            {'start': segment.start, 'end': segment.end, 'text': segment.text}
+            for segment in segments
+        ]
+        return {
+            'text': ''.join(segment['text'] for segment in segments),
+            'segments': segments,
+            'language': info.language
+        }
+
+    def detect(self, audio: np.ndarray) -> dict:
+        # Language detection runs eagerly; the first segment carries no_speech_prob
+        segments, info = self.model.transcribe(
+            np.asarray(audio, dtype=np.float32)[:30 * 16000],
+            beam_size=1,
+            without_timestamps=True,
+            max_new_tokens=1,
+            no_speech_threshold=None,
+            condition_on_previous_text=False
+        )
+        first = next(iter(segments), None)
+        return {
+            'language': info.language,
+            'language_probability': float(info.language_probability),
+            'no_speech_prob': float(first.no_speech_prob) if first else 1.0
+        }
+
+BACKENDS = {
+    WhisperBackend.name: WhisperBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend
+}
+
+def create_backend(name: str = 'whisper', *args, **kwargs) -> TranscriptionBackend:
+    """
+    Build a backend by its configuration name.
+
+    Raises:
+        ValueError: If there is no backend of that name
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown transcription backend: {name}")
+    return BACKENDS[name](*args, **kwargs)
@@ -0,0 +1,221 @@
+"""
+Transcription worker pool for TikTok content automation.
+
+Each worker process loads the model of the configured backend once when it
+starts and pins it to a fixed number of threads, so several videos are transcribed at once without
+sharing one model object between threads or oversubscribing the cores. Jobs
+go to whichever worker is free; a pool whose worker died is replaced and the
+job retried once. The pipeline's transcribe stage should have as many
+workers as the pool, so none of them sits idle.
+"""
+
+import os
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Set
+import numpy as np
+from .audio import PcmRef
+from .transcription_backends import create_backend
+
+# The backend of the current worker process, loaded by _init_worker
+_backend = None
+
+class TranscriptionPool:
+    def __init__(
+        self,
+        model_name: str = 'base',
+        workers: int = 1,
+        threads: int = 0,
+        device: Optional[str] = None,
+        ping_timeout: float = 300.0,
+        backend: str = 'whisper',
+        compute_type: Optional[str] = None
+    ):
+        """
+        Describe the worker pool.
+
+        Args:
+            model_name: Model name (or checkpoint path) every worker loads
+            workers: Number of worker processes
+            threads: Threads per worker (0 splits the cores between workers)
+            device: 'cpu' or 'cuda'; None picks CUDA when it is available
+            ping_timeout: Seconds a worker may take to answer a health check,
+                including loading its model
+            backend: Name of the transcription backend
+            compute_type: Numeric precision, for backends that offer a choice
+        """
+        self.logger = logging.getLogger(__name__)
+        self.model_name = model_name
+        self.workers = max(1, workers)
+        self.threads = threads or max(1, (os.cpu_count() or 1) // self.workers)
+        self.device = device
+        self.ping_timeout = ping_timeout
+        self.backend = backend
+        self.compute_type = compute_type
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pids: Set[int] = set()
+
+    def start(self) -> None:
+        """Start the workers; each begins loading its model in the background."""
+        if self._pool is not None:
+            return
+
+        # Spawned workers avoid forking a process that holds torch and event loop threads
+        children = set(multiprocessing.active_children())
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(self.model_name, self.device, self.threads, self.backend, self.compute_type)
+        )
+
+        # The executor only spawns a process when no idle one is left, so
+        # one ping per worker starts all of them
+        for _ in range(self.workers):
+            self._pool.submit(_ping)
+
+        # Remember the new processes, so even a worker that never answers can be killed
+        self._pids = {
+            process.pid for process in multiprocessing.active_children()
+            if process not in children
+        }
+
+    async def warmup(self) -> bool:
+        """Start the workers and wait until every one of them has its model loaded."""
+        self.start()
+        return await self.check_health()
+
+    async def check_health(self) -> bool:
+        """
+        Ping every worker.
+
+        A pool that has lost a worker, or whose workers do not answer within
+        ping_timeout, is replaced.
+
+        Returns:
+            True if the workers answered (after a restart, if one was needed)
+        """
+        self.start()
+        try:
+            await asyncio.wait_for(self._ping_workers(), self.ping_timeout)
+            return True
+        except (BrokenProcessPool, asyncio.TimeoutError) as e:
+            self.logger.error(f"Transcription workers are unhealthy, restarting: {str(e) or type(e).__name__}")
+            self.restart()
+            return False
+
+    async def _ping_workers(self) -> None:
+        """Ping until every worker process has answered, i.e. has its model loaded."""
+        loop = asyncio.get_event_loop()
+        answered = set()
+        while True:
+            # A free worker may take several pings while another is still loading;
+            # a worker that dies breaks the pool, so each PID that answers is a live worker
+            pids = await asyncio.gather(*(
+                loop.run_in_executor(self._pool, _ping) for _ in range(self.workers)
+            ))
+            answered.update(pids)
+            if len(answered) >= self.workers:
+                self._pids |= answered
+                return
+            await asyncio.sleep(0.1)
+
+    async def transcribe(self, audio: Any, options: Optional[Dict[str, Any]] = None) -> dict:
+        """
+        Transcribe audio (a path, 16 kHz PCM, or PcmRefs) on the first free worker.
+
+        PcmRefs are memory-mapped by the worker, so only the references are
+        sent between processes; a list of them is transcribed as one
+        stretch of audio joined in order.
+
+        Returns:
+            The model's transcription result
+        """
+        return await self._run(_transcribe, audio, options or {})
+
+    async def detect(self, audio: Any) -> dict:
+        """
+        Probe up to 30 seconds of audio (PCM or PcmRefs) for speech and its language.
+
+        Returns:
+            The backend's 'language', 'language_probability' and 'no_speech_prob'
+        """
+        return await self._run(_detect, audio)
+
+    async def _run(self, function, *args) -> Any:
+        """Run a job on the first free worker, retrying once on a fresh pool if a worker died."""
+        self.start()
+        loop = asyncio.get_event_loop()
+        try:
+            return await loop.run_in_executor(self._pool, function, *args)
+        except BrokenProcessPool:
+            self.logger.error("A transcription worker died, restarting the pool and retrying")
+            self.restart()
+            return await loop.run_in_executor(self._pool, function, *args)
+
+    def restart(self) -> None:
+        """Replace the workers, killing the old ones so a hung worker cannot linger."""
+        self.close(terminate=True)
+        self.start()
+
+    def close(self, terminate: bool = False) -> None:
+        """
+        Shut down the workers.
+
+        Args:
+            terminate: Kill the worker processes instead of letting them finish their current job
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            if terminate:
+                for process in multiprocessing.active_children():
+                    if process.pid in self._pids:
+                        process.terminate()
+            self._pool = None
+            self._pids = set()
+
+def _init_worker(
+    model_name: str,
+    device: Optional[str],
+    threads: int,
+    backend: str = 'whisper',
+    compute_type: Optional[str] = None
+) -> None:
+    """Pin the thread count and load the model, once per worker process."""
+    global _backend
+
+    # Set before the engine starts its thread pools
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    os.environ['MKL_NUM_THREADS'] = str(threads)
+
+    _backend = create_backend(backend, model_name, device, threads, compute_type)
+    _backend.load()
+
+def _ping() -> int:
+    """Answer a health check once the model is loaded."""
+    if _backend is None:
+        raise RuntimeError("Transcription model is not loaded")
+    return os.getpid()
+
+def _transcribe(audio: Any, options: Dict[str, Any]) -> dict:
+    """Run the worker's model."""
+    if _backend is None:
+        raise RuntimeError("Transcription model is not loaded")
+    return _backend.transcribe(_load(audio), options)
+
+def _detect(audio: Any) -> dict:
+    """Probe with the worker's model."""
+    if _backend is None:
+        raise RuntimeError("Transcription model is not loaded")
+    return _backend.detect(_load(audio))
+
+def _load(audio: Any) -> Any:
+    """Map PcmRefs (a list of them is joined in order); other audio is passed through."""
+    if isinstance(audio, PcmRef):
+        return audio.load()
+    if isinstance(audio, list):
+        return np.concatenate([ref.load() for ref in audio])
+    return audio
@@ -1,5 +1,6 @@
 import os
 import json
+import hashlib
 from pathlib import Path
 from typing import Dict, Any
 from dotenv import load_dotenv
@@ -49,4 +50,12 @@ def load_config(config_path: str = None) -> Dict[str, Any]:
     if missing_vars:
         raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
     
-    return config 
\ No newline at end of file
+    return config 
+
+def file_checksum(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Compute the SHA-256 checksum of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,246 @@
+"""
+Voice-activity detection for TikTok content automation.
+
+Before Whisper runs, the decoded PCM is split into short frames and each
+frame is classified as speech or not. Runs of speech frames become regions;
+short gaps are bridged, short blips dropped and every region padded a
+little so no word is clipped. Only the regions are transcribed, and the
+segment timestamps are mapped back to the original timeline afterwards.
+
+The default detector is vectorized in NumPy: a frame is speech when it is
+well above the clip's noise floor, its zero-crossing rate is not that of
+hiss, and its loudness fluctuates the way syllables do (steady music and
+tones do not). WebRTC's model-based detector is used instead when the
+optional webrtcvad package is installed and selected. With no detector
+('none') all of the audio is transcribed.
+"""
+
+import abc
+import logging
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+# Frames classified per block, to bound the temporary arrays on long audio
+BLOCK_FRAMES = 10000
+
+class VoiceActivityDetector(abc.ABC):
+    def __init__(
+        self,
+        frame_ms: int = 30,
+        min_speech: float = 0.25,
+        min_silence: float = 0.3,
+        padding: float = 0.2
+    ):
+        """
+        Describe how speech frames are grouped into regions.
+
+        Args:
+            frame_ms: Frame length in milliseconds
+            min_speech: Shortest region kept, in seconds
+            min_silence: Shortest gap that splits two regions, in seconds
+            padding: Seconds added before and after every region
+        """
+        self.logger = logging.getLogger(__name__)
+        self.frame_ms = frame_ms
+        self.min_speech = min_speech
+        self.min_silence = min_silence
+        self.padding = padding
+
+    def detect(self, pcm: np.ndarray, sample_rate: int) -> List[Tuple[int, int]]:
+        """
+        Find the speech in mono PCM.
+
+        Returns:
+            Speech regions as (start, end) sample indices, in order and not
+            overlapping; empty when there is no speech
+        """
+        frame = sample_rate * self.frame_ms // 1000
+        count = len(pcm) // frame
+        if count == 0:
+            return []
+
+        # Frames are a view of the (memory-mapped) samples, not a copy
+        frames = pcm[:count * frame].reshape(count, frame)
+        flags = self.speech_frames(frames, sample_rate)
+
+        seconds = self.frame_ms / 1000
+        regions = merge_runs(
+            flags,
+            min_gap=int(round(self.min_silence / seconds)),
+            min_length=int(round(self.min_speech / seconds))
+        )
+
+        pad = int(self.padding * sample_rate)
+        padded = []
+        for start, end in regions:
+            start = max(0, start * frame - pad)
+            end = min(len(pcm), end * frame + pad)
+            if padded and start <= padded[-1][1]:
+                padded[-1] = (padded[-1][0], end)
+            else:
+                padded.append((start, end))
+        return padded
+
+    @abc.abstractmethod
+    def speech_frames(self, frames: np.ndarray, sample_rate: int) -> np.ndarray:
+        """Classify frames (N x samples) as speech; returns N booleans."""
+
+class EnergyVad(VoiceActivityDetector):
+    def __init__(
+        self,
+        margin_db: float = 10.0,
+        min_energy_db: float = -45.0,
+        max_zero_crossings: float = 0.4,
+        min_modulation_db: float = 3.0,
+        modulation_window: float = 1.0,
+        **kwargs
+    ):
+        """
+        Describe the energy and zero-crossing detector.
+
+        Args:
+            margin_db: How far above the noise floor (10th percentile of frame
+                energy) a speech frame must be
+            min_energy_db: Energy (dBFS) a speech frame must exceed regardless of the floor
+            max_zero_crossings: Highest zero-crossing rate (crossings per
+                sample) of a speech frame; broadband noise is near 0.5
+            min_modulation_db: Smallest standard deviation of frame energy over
+                modulation_window around a speech frame; syllables make speech
+                fluctuate, steady music and tones do not
+            modulation_window: Seconds over which the fluctuation is measured
+        """
+        super().__init__(**kwargs)
+        self.margin_db = margin_db
+        self.min_energy_db = min_energy_db
+        self.max_zero_crossings = max_zero_crossings
+        self.min_modulation_db = min_modulation_db
+        self.modulation_window = modulation_window
+
+    def speech_frames(self, frames: np.ndarray, sample_rate: int) -> np.ndarray:
+        energy = np.empty(len(frames))
+        crossings = np.empty(len(frames))
+        for first in range(0, len(frames), BLOCK_FRAMES):
+            block = frames[first:first + BLOCK_FRAMES]
+            power = np.einsum('ij,ij->i', block, block, dtype=np.float64) / block.shape[1]
+            energy[first:first + len(block)] = 10 * np.log10(power + 1e-10)
+            changes = np.count_nonzero(np.diff(np.signbit(block), axis=1), axis=1)
+            crossings[first:first + len(block)] = changes / block.shape[1]
+
+        floor = np.percentile(energy, 10)
+        threshold = max(floor + self.margin_db, self.min_energy_db)
+        flags = (energy > threshold) & (crossings < self.max_zero_crossings)
+
+        if self.min_modulation_db > 0:
+            window = max(3, int(round(self.modulation_window * 1000 / self.frame_ms)))
+            flags &= sliding_std(np.maximum(energy, floor), window) >= self.min_modulation_db
+        return flags
+
+class WebRtcVad(VoiceActivityDetector):
+    def __init__(self, aggressiveness: int = 2, **kwargs):
+        """
+        Describe the WebRTC detector.
+
+        Args:
+            aggressiveness: 0 (keeps the most audio) to 3 (keeps the least)
+
+        Raises:
+            ImportError: If webrtcvad is not installed
+        """
+        import webrtcvad
+
+        super().__init__(**kwargs)
+        if self.frame_ms not in (10, 20, 30):
+            raise ValueError("WebRTC VAD frames must be 10, 20 or 30 ms")
+        self.vad = webrtcvad.Vad(aggressiveness)
+
+    def speech_frames(self, frames: np.ndarray, sample_rate: int) -> np.ndarray:
+        flags = np.zeros(len(frames), dtype=bool)
+        for first in range(0, len(frames), BLOCK_FRAMES):
+            block = frames[first:first + BLOCK_FRAMES]
+            samples = (np.clip(block, -1, 1) * 32767).astype('<i2')
+            for index, frame in enumerate(samples):
+                flags[first + index] = self.vad.is_speech(frame.tobytes(), sample_rate)
+        return flags
+
+def create_vad(settings: Dict[str, Any]) -> Optional[VoiceActivityDetector]:
+    """
+    Build the detector selected by the transcription settings.
+
+    'vad' is 'energy' (default), 'webrtc' or 'none'. WebRTC falls back to the
+    energy detector when webrtcvad is not installed.
+    """
+    kind = settings.get('vad', 'energy')
+    if not kind or kind == 'none':
+        return None
+
+    if kind == 'webrtc':
+        try:
+            return WebRtcVad(settings.get('vad_aggressiveness', 2))
+        except ImportError:
+            logging.getLogger(__name__).warning(
+                "webrtcvad is not installed, using the energy voice-activity detector"
+            )
+    elif kind != 'energy':
+        raise ValueError(f"Unknown voice-activity detector: {kind}")
+
+    return EnergyVad()
+
+def merge_runs(flags: np.ndarray, min_gap: int, min_length: int) -> List[Tuple[int, int]]:
+    """
+    Turn per-frame flags into (start, end) frame runs.
+
+    Runs separated by fewer than min_gap frames are joined, then runs
+    shorter than min_length frames are dropped.
+    """
+    edges = np.diff(np.concatenate([[0], flags.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    runs: List[Tuple[int, int]] = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        if runs and start - runs[-1][1] < min_gap:
+            runs[-1] = (runs[-1][0], end)
+        else:
+            runs.append((start, end))
+    return [(start, end) for start, end in runs if end - start >= min_length]
+
+def sliding_std(values: np.ndarray, window: int) -> np.ndarray:
+    """Standard deviation of values over a centred window, via cumulative sums."""
+    half = window // 2
+    padded = np.pad(values, half, mode='edge')
+    sums = np.concatenate([[0.0], np.cumsum(padded)])
+    squares = np.concatenate([[0.0], np.cumsum(padded * padded)])
+    width = 2 * half + 1
+    mean = (sums[width:] - sums[:-width]) / width
+    variance = (squares[width:] - squares[:-width]) / width - mean * mean
+    return np.sqrt(np.clip(variance, 0, None))
+
+def offset_segments(
+    segments: List[Dict[str, Any]],
+    regions: List[Tuple[int, int]],
+    sample_rate: int
+) -> List[Dict[str, Any]]:
+    """
+    Map segments timed on the concatenated regions back to the original timeline.
+
+    Args:
+        segments: Segments with 'start' and 'end' in seconds of the
+            concatenated speech
+        regions: The (start, end) sample ranges that were concatenated
+    """
+    offsets = [0]
+    for start, end in regions:
+        offsets.append(offsets[-1] + end - start)
+
+    def original(seconds: float, is_end: bool) -> float:
+        position = min(max(seconds * sample_rate, 0), offsets[-1])
+        # An end exactly on a join belongs to the region before it
+        index = (bisect_left if is_end else bisect_right)(offsets, position) - 1
+        index = min(max(index, 0), len(regions) - 1)
+        return (regions[index][0] + position - offsets[index]) / sample_rate
+
+    return [
+        {**segment, 'start': original(segment['start'], False), 'end': original(segment['end'], True)}
+        for segment in segments
+    ]
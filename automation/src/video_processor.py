@@ -3,133 +3,1203 @@ Video processing module for TikTok content automation.
 """
 
 import os
+import shutil
+import time
+import queue
 import asyncio
 import logging
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional, List
+from typing import Callable, Dict, Optional, List, Tuple
 import cv2
 import numpy as np
+from .artifact_cache import ArtifactCache
+from .overlay import WatermarkOverlay
+from .probe import ProbeIndex
+from .proxy_reader import read_proxies_opencv
+from .frame_ring import FrameRing
+from .reframe import CropPlan, plan_reframe
+from .scene_detect import SceneDetector, highlight_start
+from .subtitles import SubtitleTrack
+from .utils import load_config, file_checksum
+
+# Receives {'video', 'frames', 'total', 'fps'} while a video renders
+ProgressCallback = Callable[[dict], None]
 
 class VideoProcessor:
-    def __init__(self):
+    def __init__(self, config_path: Optional[str] = None):
         """Initialize the video processor."""
         self.logger = logging.getLogger(__name__)
+        
+        # Load configuration
+        self.config = load_config(config_path)
+        self.video_settings = self.config.get('video_settings', {})
+        self.processing_settings = self.config.get('processing', {})
+        
+        # Watermark is rendered once per resolution and blended onto each frame
+        self.watermark_text = self.video_settings.get('watermark_text', '@YourTikTokHandle')
+        self.watermark_path = self._resolve_watermark_path()
+        self.overlay = WatermarkOverlay(
+            self.watermark_text,
+            self.watermark_path,
+            self.video_settings.get('watermark_scale', 0.2)
+        )
+        
+        # Transcript segments handed to process_video are drawn in the same pass
+        self.burn_subtitles = self.video_settings.get('burn_subtitles', False)
+        
         self.processed_dir = Path('processed')
         self.processed_dir.mkdir(exist_ok=True)
+        
+        # Identical clips with identical settings are served from the cache
+        self.cache = ArtifactCache.from_config(self.config)
+        
+        # Container metadata, read once per file
+        self.probes = ProbeIndex.from_config(self.config)
+        
+        # Finds the cuts long sources are trimmed at
+        self.scene_detector = SceneDetector(
+            self.video_settings.get('scene_analysis_fps', 2.0),
+            self.video_settings.get('scene_keyframe_gap', 3.0),
+            self.video_settings.get('scene_cut_threshold', 0.3),
+            self.video_settings.get('scene_difference_threshold', 20.0)
+        )
+        
+        # Worker processes for segment encoding, created on first use
+        self._pool = None
+        
+        # Carries progress from the workers back to this process, created on first use
+        self._manager = None
+        
+        # Render throughput across every video processed so far
+        self.frames_rendered = 0
+        self.render_seconds = 0.0
 
-    async def process_video(self, video_path: str) -> Optional[str]:
+    @property
+    def frames_per_second(self) -> float:
+        """Average render throughput (decode, process and encode) in frames/sec."""
+        if self.render_seconds <= 0:
+            return 0.0
+        return self.frames_rendered / self.render_seconds
+
+    async def process_video(
+        self,
+        video_path: str,
+        progress: Optional[ProgressCallback] = None,
+        subtitles: Optional[List[dict]] = None,
+        input_hash: Optional[str] = None
+    ) -> Optional[str]:
         """
         Process a single video file.
         
+        Frames are decoded and encoded in worker processes (or by FFmpeg), so
+        the event loop stays free for other stages while a video renders.
+        
         Args:
             video_path: Path to the video file
+            progress: Optional callback, called on the event loop with a dict of
+                video, frames (done), total (expected) and fps while rendering
+            subtitles: Optional transcript segments ('start' and 'end' in seconds
+                into the source, 'text'), burned in when video_settings.burn_subtitles
+                is enabled
+            input_hash: Checksum of video_path, if the caller already has it
             
         Returns:
             Path to the processed video file, or None if processing failed
         """
+        outputs = await self.process_video_outputs(
+            video_path, progress, subtitles=subtitles, input_hash=input_hash
+        )
+        return outputs['main'] if outputs else None
+
+    async def process_video_outputs(
+        self,
+        video_path: str,
+        progress: Optional[ProgressCallback] = None,
+        renditions: Optional[List[dict]] = None,
+        subtitles: Optional[List[dict]] = None,
+        input_hash: Optional[str] = None
+    ) -> Optional[Dict[str, str]]:
+        """
+        Process a video into the main output and its renditions from one decode.
+        
+        Every decoded frame is reframed, watermarked and subtitled once, then fanned out
+        to the main encoder and to one scaled encoder per video rendition;
+        poster renditions save a single JPEG.
+        
+        Args:
+            video_path: Path to the video file
+            progress: Optional progress callback, see process_video
+            renditions: Rendition specs, defaulting to video_settings.renditions.
+                Each has a 'name', an optional 'type' ('video' or 'poster'),
+                'width' and/or 'height' (the other side keeps the aspect ratio),
+                'crf' for videos and 'at' (seconds into the output) for posters
+            subtitles: Optional transcript segments, see process_video
+            input_hash: Checksum of video_path, if the caller already has it
+            
+        Returns:
+            Paths keyed by rendition name, with the full-size video under
+            'main', or None if processing failed
+        """
         try:
             # Verify video file exists and is readable
             if not os.path.exists(video_path):
                 self.logger.error(f"Video file not found: {video_path}")
                 return None
 
-            # Open video file
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
-                self.logger.error(f"Error opening video file: {video_path}")
-                return None
+            # Create output paths (always MP4, whatever container the source used)
+            output_path = self.processed_dir / f"processed_{Path(video_path).stem}.mp4"
+            specs = self._rendition_specs(renditions)
+            track = self._subtitle_track(subtitles)
+            paths = {'main': str(output_path)}
+            paths.update({spec['name']: self._rendition_path(video_path, spec) for spec in specs})
+
+            # Reuse a previous result for byte-identical input and settings
+            loop = asyncio.get_event_loop()
+            input_hash = input_hash or await loop.run_in_executor(None, file_checksum, video_path)
+            cache_key = self.cache.make_key(
+                'process', input_hash, {
+                    **self._cache_params(),
+                    'renditions': specs,
+                    'subtitles': track.segments if track else None
+                }
+            )
+            if await loop.run_in_executor(None, self._restore_outputs, cache_key, paths):
+                self.logger.info(f"Using cached processed video for {video_path}")
+                return paths
 
             # Get video properties
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            fps = int(cap.get(cv2.CAP_PROP_FPS))
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            properties = await loop.run_in_executor(None, self._probe, video_path)
+            if properties is None:
+                self.logger.error(f"Error opening video file: {video_path}")
+                return None
+            width, height, fps, total_frames = properties
 
             # Verify video has valid properties
             if width <= 0 or height <= 0 or fps <= 0 or total_frames <= 0:
                 self.logger.error(f"Invalid video properties for {video_path}")
-                cap.release()
                 return None
 
-            # Create output path
-            output_path = self.processed_dir / f"processed_{Path(video_path).name}"
+            try:
+                # Only decode and encode the part of the video that will be kept
+                start_frame, end_frame = await loop.run_in_executor(
+                    None, self._select_window, video_path, fps, total_frames
+                )
 
-            # Create video writer
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            out = cv2.VideoWriter(
-                str(output_path),
-                fourcc,
-                fps,
-                (width, height)
-            )
+                # Follow the action with a vertical crop window, then scale once to the target size
+                frame_count = (end_frame if end_frame is not None else total_frames) - start_frame
+                crop_plan = await loop.run_in_executor(
+                    None, self._plan_reframe, video_path, width, height, fps, start_frame, frame_count
+                )
+                output_size = self._output_size(width, height)
 
-            try:
-                while True:
-                    ret, frame = cap.read()
-                    if not ret:
-                        break
+                expected_frames = min(frame_count, total_frames - start_frame)
+                extra_outputs = self._plan_outputs(
+                    specs, paths, output_size, start_frame, expected_frames, fps
+                )
+                reporter = None
+                if progress is not None:
+                    reporter = _ProgressReporter(
+                        video_path, expected_frames, progress,
+                        self.processing_settings.get('progress_interval', 1.0)
+                    )
 
-                    # Add watermark to frame
-                    frame = self._add_watermark(frame, width, height)
+                render_started = time.perf_counter()
+                if self._use_ffmpeg():
+                    frames = await self._render_ffmpeg(
+                        video_path, str(output_path), output_size,
+                        start_frame / fps,
+                        (end_frame - start_frame) / fps if end_frame is not None else None,
+                        crop_plan, frame_count, reporter, extra_outputs, track
+                    ) or expected_frames
+                else:
+                    segments = self._plan_segments(start_frame, end_frame, total_frames, fps)
+                    if len(segments) > 1:
+                        frames = await self._render_parallel(
+                            video_path, str(output_path), segments, fps, output_size,
+                            crop_plan, reporter, extra_outputs, track
+                        )
+                    else:
+                        frames = await self._render_serial(
+                            video_path, str(output_path), start_frame, end_frame,
+                            fps, output_size, crop_plan, reporter, extra_outputs, track
+                        )
+                self._record_throughput(video_path, frames, time.perf_counter() - render_started)
+                if reporter is not None:
+                    reporter.finish(frames)
 
-                    # Write frame
-                    out.write(frame)
+                for name, path in list(paths.items()):
+                    if name != 'main' and not os.path.exists(path):
+                        self.logger.warning(f"Rendition {name} was not produced for {video_path}")
+                        del paths[name]
 
-                return str(output_path)
+                await loop.run_in_executor(None, self._store_outputs, cache_key, paths)
+                return paths
 
             except Exception as e:
                 self.logger.error(f"Error processing video {video_path}: {str(e)}")
                 return None
 
-            finally:
-                # Clean up
-                cap.release()
-                out.release()
-
         except Exception as e:
             self.logger.error(f"Unexpected error processing video {video_path}: {str(e)}")
             return None
 
-    def _add_watermark(self, frame: np.ndarray, width: int, height: int) -> np.ndarray:
-        """Add watermark to a frame."""
-        try:
-            # Create watermark text
-            text = "@YourTikTokHandle"
-            font = cv2.FONT_HERSHEY_SIMPLEX
-            font_scale = 1.0
-            thickness = 2
-            color = (255, 255, 255)  # White
-            stroke_color = (0, 0, 0)  # Black
-
-            # Get text size
-            (text_width, text_height), baseline = cv2.getTextSize(
-                text, font, font_scale, thickness
+    def close(self) -> None:
+        """Shut down the segment worker pool."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+    def _probe(self, video_path: str) -> Optional[Tuple[int, int, float, int]]:
+        """
+        Read the properties of a video.
+
+        Returns:
+            (width, height, fps, frame_count), or None if the video cannot be opened
+        """
+        info = self.probes.probe(video_path)
+        if info is None:
+            return None
+        return info['width'], info['height'], info['fps'], info['frame_count']
+
+    def _rendition_specs(self, renditions: Optional[List[dict]] = None) -> List[dict]:
+        """Return the valid rendition specs, from the argument or the configuration."""
+        if renditions is None:
+            renditions = self.video_settings.get('renditions', [])
+
+        specs = []
+        for spec in renditions:
+            name = spec.get('name')
+            if not name or name == 'main' or spec.get('type', 'video') not in ('video', 'poster'):
+                self.logger.warning(f"Ignoring invalid rendition: {spec}")
+                continue
+            specs.append(spec)
+        return specs
+
+    def _rendition_path(self, video_path: str, spec: dict) -> str:
+        """Where a rendition of video_path is written."""
+        extension = 'jpg' if spec.get('type', 'video') == 'poster' else 'mp4'
+        return str(self.processed_dir / f"processed_{Path(video_path).stem}_{spec['name']}.{extension}")
+
+    def _plan_outputs(
+        self,
+        specs: List[dict],
+        paths: Dict[str, str],
+        output_size: Tuple[int, int],
+        start_frame: int,
+        frame_count: int,
+        fps: float
+    ) -> List[dict]:
+        """
+        Resolve rendition specs against the main output.
+
+        Returns:
+            One dict per rendition with its kind ('video' or 'poster'), path
+            and size; videos carry their crf, posters the time ('at', seconds
+            into the output) and source frame they are taken from
+        """
+        outputs = []
+        for spec in specs:
+            output = {
+                'kind': spec.get('type', 'video'),
+                'path': paths[spec['name']],
+                'size': _rendition_size(spec, output_size)
+            }
+            if output['kind'] == 'poster':
+                # Posters past the end of a short clip come from its last frame
+                at = min(float(spec.get('at', 1.0)), max(0.0, (frame_count - 1) / fps))
+                output['at'] = at
+                output['frame'] = start_frame + int(round(at * fps))
+            else:
+                output['crf'] = spec.get('crf')
+            outputs.append(output)
+        return outputs
+
+    def _restore_outputs(self, cache_key: str, paths: Dict[str, str]) -> bool:
+        """
+        Restore the outputs a previous render produced; a partial hit counts as a miss.
+
+        Renditions that render did not produce are removed from paths.
+        """
+        produced = self.cache.get_json(self._manifest_key(cache_key))
+        if not produced or 'main' not in produced:
+            return False
+
+        if not all(
+            self.cache.restore(self._output_key(cache_key, name), paths[name])
+            for name in produced if name in paths
+        ):
+            return False
+
+        for name in list(paths):
+            if name not in produced:
+                del paths[name]
+        return True
+
+    def _store_outputs(self, cache_key: str, paths: Dict[str, str]) -> None:
+        """Cache every output of a render, then the manifest naming them."""
+        for name, path in paths.items():
+            self.cache.store(self._output_key(cache_key, name), path)
+        self.cache.put_json(self._manifest_key(cache_key), sorted(paths))
+
+    def _output_key(self, cache_key: str, name: str) -> str:
+        """Cache key of one named output of a render."""
+        return cache_key if name == 'main' else self.cache.make_key('rendition', cache_key, {'name': name})
+
+    def _manifest_key(self, cache_key: str) -> str:
+        """Cache key of the names of the outputs a render produced."""
+        return self.cache.make_key('rendition-manifest', cache_key, {})
+
+    def _record_throughput(self, video_path: str, frames: int, seconds: float) -> None:
+        """Add one render to the frames/sec counter."""
+        self.frames_rendered += frames
+        self.render_seconds += seconds
+        rate = frames / seconds if seconds > 0 else 0.0
+        self.logger.info(f"Rendered {frames} frames of {video_path} at {rate:.1f} frames/sec")
+
+    def _use_ffmpeg(self) -> bool:
+        """Whether to render with the FFmpeg filtergraph backend."""
+        if self.processing_settings.get('backend', 'ffmpeg') != 'ffmpeg':
+            return False
+        if not shutil.which('ffmpeg'):
+            self.logger.warning("FFmpeg not found, falling back to the OpenCV backend")
+            return False
+        return True
+
+    def _select_window(
+        self,
+        video_path: str,
+        fps: float,
+        total_frames: int
+    ) -> Tuple[int, Optional[int]]:
+        """
+        Choose the frame range to keep so the output fits max_duration.
+
+        With window_selection 'start' the beginning is kept; 'motion' keeps
+        the most active window; 'scenes' starts the window at the scene cut
+        that leads into the most active run of scenes.
+
+        Returns:
+            (start_frame, end_frame); end_frame is None when the whole video is kept
+        """
+        max_duration = self.video_settings.get('max_duration')
+        if not max_duration:
+            return 0, None
+
+        budget = max(1, int(round(fps * max_duration)))
+        selection = self.video_settings.get('window_selection', 'start')
+        if total_frames <= budget or selection not in ('motion', 'scenes'):
+            return 0, budget
+
+        if selection == 'scenes':
+            scenes = self.scene_detector.detect(video_path, fps, total_frames)
+            start = highlight_start(scenes, total_frames / fps, max_duration)
+            start_frame = min(int(round(start * fps)), total_frames - budget)
+        else:
+            start_frame = _find_active_window(
+                video_path, fps, total_frames, budget,
+                self.video_settings.get('window_sample_seconds', 2.0)
             )
+        self.logger.info(f"Keeping {max_duration}s from {start_frame / fps:.1f}s of {video_path}")
+        return start_frame, start_frame + budget
+
+    def _output_size(self, width: int, height: int) -> Tuple[int, int]:
+        """Size of the processed video: the target resolution when reframing."""
+        if not self.video_settings.get('reframe', True):
+            return width, height
+
+        target = self.video_settings.get('target_resolution', {})
+        return int(target.get('width', 1080)), int(target.get('height', 1920))
+
+    def _plan_reframe(
+        self,
+        video_path: str,
+        width: int,
+        height: int,
+        fps: float,
+        start_frame: int,
+        frame_count: int
+    ) -> Optional[CropPlan]:
+        """
+        Plan the crop window for the kept frames.
+
+        Returns:
+            The crop plan, or None when reframing is disabled
+        """
+        if not self.video_settings.get('reframe', True):
+            return None
+
+        target_width, target_height = self._output_size(width, height)
+        return plan_reframe(
+            video_path, width, height, fps, start_frame, frame_count,
+            target_width, target_height,
+            self.video_settings.get('reframe_analysis_fps', 5.0),
+            self.video_settings.get('reframe_smoothing_seconds', 1.0),
+            self.video_settings.get('reframe_shot_threshold', 30.0)
+        )
+
+    def _subtitle_track(self, subtitles: Optional[List[dict]]) -> Optional[SubtitleTrack]:
+        """Subtitles to burn in, or None when burning is disabled or there is nothing to draw."""
+        if not self.burn_subtitles or not subtitles:
+            return None
+
+        track = SubtitleTrack(
+            subtitles,
+            self.video_settings.get('subtitle_font_scale', 1.8),
+            self.video_settings.get('subtitle_thickness', 3),
+            self.video_settings.get('subtitle_max_width', 0.9),
+            self.video_settings.get('subtitle_bottom_margin', 0.2)
+        )
+        return track if track else None
+
+    async def _render_ffmpeg(
+        self,
+        video_path: str,
+        output_path: str,
+        output_size: Tuple[int, int],
+        start_time: float = 0.0,
+        duration: Optional[float] = None,
+        crop_plan: Optional[CropPlan] = None,
+        frame_count: int = 0,
+        reporter: Optional['_ProgressReporter'] = None,
+        extra_outputs: Optional[List[dict]] = None,
+        subtitles: Optional[SubtitleTrack] = None
+    ) -> int:
+        """
+        Render the video with one FFmpeg filtergraph, without decoding frames in Python.
+
+        Extra outputs (see _plan_outputs) are split off the finished frames
+        inside the same filtergraph, so the source is decoded only once.
+        Subtitles are overlaid from their pre-rendered sprites in the same graph.
+
+        Returns:
+            Number of frames FFmpeg reported writing
+        """
+        work_dir = Path(tempfile.mkdtemp(prefix='ffmpeg_', dir=self.processed_dir))
+
+        try:
+            # Reuse the pre-rendered watermark so both backends produce the same overlay
+            sprite, x, y = self.overlay.placement(*output_size)
+            watermark_image = work_dir / 'watermark.png'
+            cv2.imwrite(str(watermark_image), sprite.to_bgra())
+
+            # Subtitle sprites become a timed image sequence on the same output timeline
+            subtitle_input = []
+            subtitle_y = None
+            if subtitles:
+                sequence = subtitles.write_ffconcat(
+                    str(work_dir), output_size[0], output_size[1], start_time, duration
+                )
+                if sequence is not None:
+                    subtitle_input = ['-f', 'concat', '-safe', '0', '-i', sequence[0]]
+                    subtitle_y = sequence[1]
+
+            # A moving crop window is driven by a sendcmd script
+            video_filters = []
+            if crop_plan is not None:
+                crop_x, crop_y = crop_plan.offset(crop_plan.start_frame)
+                if len(crop_plan.offsets) > 1:
+                    commands_path = work_dir / 'crop.cmd'
+                    crop_plan.write_sendcmd(str(commands_path), frame_count)
+                    video_filters.append(f"sendcmd=f='{commands_path}'")
+                video_filters += [
+                    f"crop={crop_plan.crop_width}:{crop_plan.crop_height}:{crop_x}:{crop_y}",
+                    f"scale={output_size[0]}:{output_size[1]}",
+                    'setsar=1'
+                ]
+
+            # Input seeking and limits stop FFmpeg from decoding anything outside the window
+            input_options = []
+            if start_time > 0:
+                input_options += ['-ss', f"{start_time:.3f}"]
+            if duration is not None:
+                input_options += ['-t', f"{duration:.3f}"]
+
+            # One filtergraph branch and one set of output options per rendition
+            branches = []
+            rendition_options = []
+            for index, output in enumerate(extra_outputs or []):
+                scale = f"scale={output['size'][0]}:{output['size'][1]},setsar=1"
+                if output['kind'] == 'poster':
+                    branches.append(f"trim=start={output['at']:.3f},setpts=PTS-STARTPTS,{scale}")
+                    rendition_options += [
+                        '-map', f"[r{index}]", '-frames:v', '1', '-update', '1', '-q:v', '2',
+                        output['path']
+                    ]
+                else:
+                    branches.append(scale)
+                    rendition_options += [
+                        '-map', f"[r{index}]", *self._audio_output_options(0),
+                        *self._x264_options(output.get('crf')),
+                        output['path']
+                    ]
+
+            command = [
+                'ffmpeg', '-y', '-loglevel', 'error',
+                *input_options, '-i', video_path,
+                '-i', str(watermark_image),
+                *subtitle_input,
+                '-filter_complex', self._build_filtergraph(x, y, video_filters, branches, subtitle_y),
+                '-progress', 'pipe:1', '-nostats',
+                '-map', '[out]', *self._audio_output_options(0),
+                *self._x264_options(),
+                output_path,
+                *rendition_options
+            ]
+
+            written = [0]
+
+            def on_frames(frames: int) -> None:
+                written[0] = frames
+                if reporter is not None:
+                    reporter.update(0, frames)
+
+            await self._run_ffmpeg_command(command, on_frames)
+            return written[0]
+
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _build_filtergraph(
+        self,
+        watermark_x: int,
+        watermark_y: int,
+        video_filters: Optional[List[str]] = None,
+        branches: Optional[List[str]] = None,
+        subtitle_y: Optional[int] = None
+    ) -> str:
+        """
+        Build the FFmpeg filtergraph for one video.
+
+        Input 0 is the source video and input 1 the watermark image; the
+        video_filters chain (e.g. crop and scale) runs before the overlay and
+        the result is labelled [out]. When subtitle_y is set, input 2 is the
+        subtitle image sequence, overlaid full width at that row after the
+        watermark until the video ends. Each of the branches is a filter chain applied to a copy
+        of the result, labelled [r0], [r1], ...
+        """
+        overlay = f"[1:v]overlay={watermark_x}:{watermark_y}"
+        if video_filters:
+            graph = f"[0:v]{','.join(video_filters)}[v];[v]{overlay}"
+        else:
+            graph = f"[0:v]{overlay}"
+
+        if subtitle_y is not None:
+            graph += f"[w];[w][2:v]overlay=0:{subtitle_y}:shortest=1"
+
+        if not branches:
+            return f"{graph}[out]"
+
+        labels = ''.join(f"[s{index}]" for index in range(len(branches)))
+        graph += f"[main];[main]split={len(branches) + 1}[out]{labels}"
+        return graph + ''.join(
+            f";[s{index}]{chain}[r{index}]" for index, chain in enumerate(branches)
+        )
+
+    def _x264_options(self, crf: Optional[int] = None) -> List[str]:
+        """FFmpeg output options for an H.264 rendition."""
+        return [
+            '-c:v', 'libx264',
+            '-preset', self.processing_settings.get('x264_preset', 'veryfast'),
+            '-crf', str(crf if crf is not None else self.processing_settings.get('crf', 20)),
+            '-pix_fmt', 'yuv420p',
+            '-movflags', '+faststart'
+        ]
+
+    def _plan_segments(
+        self,
+        start_frame: int,
+        end_frame: Optional[int],
+        total_frames: int,
+        fps: float
+    ) -> List[Tuple[int, Optional[int]]]:
+        """
+        Split the kept frame range into ranges for parallel encoding.
 
-            # Calculate position (bottom right corner)
-            x = width - text_width - 10
-            y = height - 10
+        Returns:
+            List of (start_frame, end_frame) ranges; when end_frame is None the
+            last range is open-ended because the container frame count is only
+            an estimate
+        """
+        whole = [(start_frame, end_frame)]
+
+        workers = self._worker_count()
+        if not self.processing_settings.get('parallel_segments', True) or workers < 2:
+            return whole
+        if not shutil.which('ffmpeg'):
+            self.logger.warning("FFmpeg not found, encoding segments serially")
+            return whole
+
+        # Segments shorter than this spend more time seeking than encoding
+        span = (end_frame if end_frame is not None else total_frames) - start_frame
+        min_frames = max(1, int(fps * self.processing_settings.get('min_segment_seconds', 5)))
+        count = min(workers, span // min_frames)
+        if count < 2:
+            return whole
+
+        bounds = [start_frame + round(i * span / count) for i in range(count + 1)]
+        segments = [(bounds[i], bounds[i + 1]) for i in range(count)]
+        segments[-1] = (bounds[-2], end_frame)
+        return segments
+
+    async def _render_parallel(
+        self,
+        video_path: str,
+        output_path: str,
+        segments: List[Tuple[int, Optional[int]]],
+        fps: float,
+        output_size: Tuple[int, int],
+        crop_plan: Optional[CropPlan] = None,
+        reporter: Optional['_ProgressReporter'] = None,
+        extra_outputs: Optional[List[dict]] = None,
+        subtitles: Optional[SubtitleTrack] = None
+    ) -> int:
+        """
+        Encode segments in worker processes and concatenate them losslessly.
+
+        Returns:
+            Number of frames written
+        """
+        extra_outputs = extra_outputs or []
+        segment_dir = Path(tempfile.mkdtemp(prefix='segments_', dir=self.processed_dir))
+
+        try:
+            # Every segment writes its own piece of the main video and of each video rendition
+            output_paths = [output_path] + [o['path'] for o in extra_outputs if o['kind'] == 'video']
+            pieces = [[] for _ in output_paths]
+            jobs = []
+            for index, (start, end) in enumerate(segments):
+                tag = str((segment_dir / f"segment_{index:04d}").resolve())
+                local_outputs = _local_outputs(extra_outputs, tag)
+                jobs.append((
+                    video_path, f"{tag}.mp4", start, end,
+                    fps, output_size, self.overlay, crop_plan, self._ring_size(), local_outputs,
+                    subtitles
+                ))
+
+                local_videos = [f"{tag}.mp4"] + [o['path'] for o in local_outputs if o['kind'] == 'video']
+                for output_pieces, piece in zip(pieces, local_videos):
+                    output_pieces.append(piece)
+
+            written = await self._run_segments(jobs, reporter)
 
-            # Draw stroke (outline)
-            cv2.putText(
-                frame, text, (x, y),
-                font, font_scale, stroke_color,
-                thickness + 1
+            # Stream-copy the pieces of each video into one file per output
+            video_inputs = []
+            for index, output_pieces in enumerate(pieces):
+                list_path = segment_dir / f"segments_{index}.txt"
+                list_path.write_text(''.join(f"file '{piece}'\n" for piece in output_pieces))
+                video_inputs.append(['-f', 'concat', '-safe', '0', '-i', str(list_path)])
+
+            await self._mux(video_inputs, output_paths, video_path, segments[0][0], segments[-1][1], fps)
+            return sum(written)
+
+        finally:
+            shutil.rmtree(segment_dir, ignore_errors=True)
+
+    async def _render_serial(
+        self,
+        video_path: str,
+        output_path: str,
+        start_frame: int,
+        end_frame: Optional[int],
+        fps: float,
+        output_size: Tuple[int, int],
+        crop_plan: Optional[CropPlan] = None,
+        reporter: Optional['_ProgressReporter'] = None,
+        extra_outputs: Optional[List[dict]] = None,
+        subtitles: Optional[SubtitleTrack] = None
+    ) -> int:
+        """
+        Encode the kept range in a worker process, then stream-copy the source audio into it.
+
+        Returns:
+            Number of frames written
+        """
+        extra_outputs = extra_outputs or []
+        mux_audio = self.processing_settings.get('keep_audio', True)
+        if mux_audio and not shutil.which('ffmpeg'):
+            self.logger.warning(f"FFmpeg not found, {output_path} will have no audio")
+            mux_audio = False
+
+        if not mux_audio:
+            written = await self._run_segments([(
+                video_path, output_path, start_frame, end_frame,
+                fps, output_size, self.overlay, crop_plan, self._ring_size(), extra_outputs,
+                subtitles
+            )], reporter)
+            return written[0]
+
+        work_dir = Path(tempfile.mkdtemp(prefix='render_', dir=self.processed_dir))
+
+        try:
+            # OpenCV only writes video; the remux copies both streams without re-encoding
+            tag = str(work_dir / 'video')
+            local_outputs = _local_outputs(extra_outputs, tag)
+            written = await self._run_segments([(
+                video_path, f"{tag}.mp4", start_frame, end_frame,
+                fps, output_size, self.overlay, crop_plan, self._ring_size(), local_outputs,
+                subtitles
+            )], reporter)
+
+            videos = [(f"{tag}.mp4", output_path)] + [
+                (local['path'], output['path'])
+                for local, output in zip(local_outputs, extra_outputs)
+                if output['kind'] == 'video'
+            ]
+            await self._mux(
+                [['-i', local] for local, _ in videos], [path for _, path in videos],
+                video_path, start_frame, end_frame, fps
             )
+            return written[0]
+
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
 
-            # Draw text
-            cv2.putText(
-                frame, text, (x, y),
-                font, font_scale, color,
-                thickness
+    async def _mux(
+        self,
+        video_inputs: List[List[str]],
+        output_paths: List[str],
+        video_path: str,
+        start_frame: int,
+        end_frame: Optional[int],
+        fps: float
+    ) -> None:
+        """
+        Stream-copy video-only inputs into their outputs in one FFmpeg pass.
+
+        Args:
+            video_inputs: FFmpeg input options of each video-only input
+            output_paths: Output for each input
+            video_path: Source whose audio for the kept window is added to every output
+        """
+        command = ['ffmpeg', '-y', '-loglevel', 'error']
+        for options in video_inputs:
+            command += options
+        command += self._audio_input(
+            video_path, start_frame / fps,
+            (end_frame - start_frame) / fps if end_frame is not None else None
+        )
+
+        audio_index = len(video_inputs)
+        for index, output_path in enumerate(output_paths):
+            command += [
+                '-map', f"{index}:v", '-c:v', 'copy', *self._audio_output_options(audio_index),
+                output_path
+            ]
+        await self._run_ffmpeg_command(command)
+
+    async def _run_segments(
+        self,
+        jobs: List[tuple],
+        reporter: Optional['_ProgressReporter'] = None
+    ) -> List[int]:
+        """
+        Run _render_segment jobs in the worker pool, forwarding their progress.
+
+        Args:
+            jobs: _render_segment arguments, up to and including subtitles
+            reporter: Receives the frame counts the workers report
+
+        Returns:
+            Number of frames written by each job
+        """
+        loop = asyncio.get_event_loop()
+        pool = self._get_pool()
+
+        progress_queue = None
+        watcher = None
+        finished = asyncio.Event()
+        if reporter is not None:
+            manager = await loop.run_in_executor(None, self._get_manager)
+            progress_queue = manager.Queue()
+            watcher = asyncio.ensure_future(self._watch_progress(progress_queue, reporter, finished))
+
+        try:
+            return await asyncio.gather(*(
+                loop.run_in_executor(pool, _render_segment, *args, progress_queue, key)
+                for key, args in enumerate(jobs)
+            ))
+        finally:
+            finished.set()
+            if watcher is not None:
+                await watcher
+
+    async def _watch_progress(
+        self,
+        progress_queue,
+        reporter: '_ProgressReporter',
+        finished: asyncio.Event
+    ) -> None:
+        """Forward (job, frames) updates from the workers until rendering finishes."""
+        loop = asyncio.get_event_loop()
+        while not finished.is_set():
+            try:
+                key, frames = await loop.run_in_executor(None, progress_queue.get, True, 0.2)
+            except queue.Empty:
+                continue
+            reporter.update(key, frames)
+
+    def _audio_input(
+        self,
+        video_path: str,
+        start_time: float = 0.0,
+        duration: Optional[float] = None
+    ) -> List[str]:
+        """FFmpeg input options that add the source audio for the kept window."""
+        if not self.processing_settings.get('keep_audio', True):
+            return []
+
+        options = []
+        if start_time > 0:
+            options += ['-ss', f"{start_time:.3f}"]
+        if duration is not None:
+            options += ['-t', f"{duration:.3f}"]
+        return [*options, '-i', video_path]
+
+    def _audio_output_options(self, input_index: int) -> List[str]:
+        """
+        FFmpeg output options that map the audio of input input_index.
+
+        The audio is stream-copied by default; sources without audio are
+        allowed and produce a silent output.
+        """
+        if not self.processing_settings.get('keep_audio', True):
+            return ['-an']
+        return [
+            '-map', f"{input_index}:a?",
+            '-c:a', self.processing_settings.get('audio_codec', 'copy')
+        ]
+
+    async def _run_ffmpeg_command(
+        self,
+        command: List[str],
+        on_frames: Optional[Callable[[int], None]] = None
+    ) -> bytes:
+        """
+        Run an FFmpeg command and return its stdout.
+
+        Args:
+            command: FFmpeg command line
+            on_frames: Called with the frame count from every block of
+                '-progress pipe:1' output the command writes to stdout
+        """
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+
+        if on_frames is None:
+            stdout, stderr = await process.communicate()
+        else:
+            # Drain stderr alongside stdout so neither pipe can fill up and stall FFmpeg
+            stderr_task = asyncio.ensure_future(process.stderr.read())
+            lines = []
+            async for line in process.stdout:
+                lines.append(line)
+                key, _, value = line.decode(errors='ignore').strip().partition('=')
+                if key == 'frame' and value.isdigit():
+                    on_frames(int(value))
+            stderr = await stderr_task
+            await process.wait()
+            stdout = b''.join(lines)
+
+        if process.returncode != 0:
+            raise Exception(f"FFmpeg error: {stderr.decode(errors='ignore').strip()}")
+
+        return stdout
+
+    def _worker_count(self) -> int:
+        """Number of worker processes to encode with (0 means one per core)."""
+        return self.processing_settings.get('workers', 0) or os.cpu_count() or 1
+
+    def _ring_size(self) -> int:
+        """Number of preallocated frames shared by the decode, process and encode threads."""
+        return self.processing_settings.get('ring_size', 8)
+
+    def _get_manager(self):
+        """Start the manager process that hosts progress queues on first use."""
+        if self._manager is None:
+            self._manager = multiprocessing.get_context('spawn').Manager()
+        return self._manager
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Create the segment worker pool on first use."""
+        if self._pool is None:
+            # Spawned workers avoid forking a process that holds OpenCV and event loop threads
+            self._pool = ProcessPoolExecutor(
+                max_workers=self._worker_count(),
+                mp_context=multiprocessing.get_context('spawn')
             )
+        return self._pool
 
-            return frame
+    def _cache_params(self) -> dict:
+        """Settings that change the processed output, used in the cache key."""
+        return {
+            'backend': 'ffmpeg' if self._use_ffmpeg() else 'opencv',
+            'x264_preset': self.processing_settings.get('x264_preset', 'veryfast'),
+            'crf': self.processing_settings.get('crf', 20),
+            'keep_audio': self.processing_settings.get('keep_audio', True),
+            'audio_codec': self.processing_settings.get('audio_codec', 'copy'),
+            'watermark_text': self.watermark_text,
+            'watermark_image': file_checksum(self.watermark_path) if self.watermark_path else None,
+            'video_settings': self.video_settings
+        }
+
+    def _resolve_watermark_path(self) -> Optional[str]:
+        """Locate the configured watermark image, relative to the config directory."""
+        watermark_path = self.video_settings.get('watermark_path')
+        if not watermark_path:
+            return None
+
+        config_dir = Path(__file__).resolve().parent.parent / 'config'
+        path = (config_dir / watermark_path).resolve()
+        if not path.exists():
+            self.logger.warning(f"Watermark image not found, using text watermark: {path}")
+            return None
+
+        return str(path)
 
+    def _add_watermark(self, frame: np.ndarray, width: int, height: int) -> np.ndarray:
+        """Add watermark to a frame."""
+        try:
+            return self.overlay.apply(frame)
         except Exception as e:
             self.logger.error(f"Error adding watermark: {str(e)}")
             return frame
 
+class _ProgressReporter:
+    def __init__(
+        self,
+        video_path: str,
+        total_frames: int,
+        callback: ProgressCallback,
+        interval: float = 1.0
+    ):
+        """
+        Turn frame counts from one or more render jobs into progress callbacks.
+
+        Args:
+            video_path: Video being rendered
+            total_frames: Number of frames expected
+            callback: Receives the progress dict
+            interval: Minimum seconds between callbacks
+        """
+        self.logger = logging.getLogger(__name__)
+        self.video_path = video_path
+        self.total_frames = total_frames
+        self.callback = callback
+        self.interval = interval
+        self.started = time.perf_counter()
+        self._done: Dict[int, int] = {}
+        self._last_report = 0.0
+
+    def update(self, key: int, frames: int) -> None:
+        """Record the frames written by one job and report if the interval has passed."""
+        self._done[key] = frames
+        if time.perf_counter() - self._last_report >= self.interval:
+            self._report(sum(self._done.values()))
+
+    def finish(self, frames: int) -> None:
+        """Report the final frame count."""
+        self._report(frames)
+
+    def _report(self, frames: int) -> None:
+        now = time.perf_counter()
+        self._last_report = now
+        elapsed = now - self.started
+        try:
+            self.callback({
+                'video': self.video_path,
+                'frames': frames,
+                'total': self.total_frames,
+                'fps': frames / elapsed if elapsed > 0 else 0.0
+            })
+        except Exception as e:
+            self.logger.error(f"Error reporting progress for {self.video_path}: {str(e)}")
+
+def _find_active_window(
+    video_path: str,
+    fps: float,
+    total_frames: int,
+    budget: int,
+    sample_seconds: float
+) -> int:
+    """
+    Find the start of the budget-frame window with the most motion.
+
+    This is a cheap pre-pass: it samples one frame every sample_seconds,
+    shrinks it to a tiny greyscale proxy and scores the mean absolute
+    difference to the previous sample.
+
+    Returns:
+        Start frame of the chosen window
+    """
+    step = max(1, int(round(fps * sample_seconds)))
+    proxies, indices = read_proxies_opencv(video_path, (64, 36), range(0, total_frames, step), seek=True)
+    scores = np.zeros(len(proxies))
+    if len(proxies) > 1:
+        scores[1:] = np.abs(np.diff(proxies.astype(np.int16), axis=0)).mean(axis=(1, 2))
+
+    window = max(1, budget // step)
+    if len(scores) <= window:
+        return 0
+
+    # Total motion of every window of consecutive samples
+    totals = np.convolve(scores, np.ones(window), mode='valid')
+    return min(int(indices[int(np.argmax(totals))]), total_frames - budget)
+
+def _render_segment(
+    input_path: str,
+    output_path: str,
+    start_frame: int,
+    end_frame: Optional[int],
+    fps: float,
+    output_size: Tuple[int, int],
+    overlay: WatermarkOverlay,
+    crop_plan: Optional[CropPlan] = None,
+    ring_size: int = 8,
+    outputs: Optional[List[dict]] = None,
+    subtitles: Optional[SubtitleTrack] = None,
+    progress_queue=None,
+    progress_key: int = 0
+) -> int:
+    """
+    Decode, reframe, watermark, subtitle and encode one frame range of a video.
+
+    Runs inside worker processes, so it only takes picklable arguments and
+    opens its own capture and writer. Decoding and encoding run on their own
+    threads around a ring of preallocated frames (see FrameRing).
+
+    Args:
+        input_path: Source video
+        output_path: Where to write the encoded range
+        start_frame: First frame of the range
+        end_frame: Frame after the last one in the range, or None to read to the end
+        fps: Output frame rate
+        output_size: Output (width, height)
+        overlay: Watermark blended onto every frame
+        crop_plan: Crop window to cut out and scale to output_size, or None
+        ring_size: Number of frames in flight between the threads
+        outputs: Renditions (see VideoProcessor._plan_outputs) scaled from each
+            finished frame; posters are only written by the range containing their frame
+        subtitles: Subtitles drawn after the watermark; each segment's sprite is
+            rasterized once per worker and reused for all of its frames
+        progress_queue: Optional queue that receives (progress_key, frames written)
+            about once per second of video
+        progress_key: Identifies this range in progress updates
+
+    Returns:
+        Number of frames written
+    """
+    cap = cv2.VideoCapture(input_path)
+    if not cap.isOpened():
+        raise IOError(f"Error opening video file: {input_path}")
+
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    out = cv2.VideoWriter(output_path, fourcc, fps, output_size)
+
+    # Area averaging when shrinking the crop, bilinear when enlarging it
+    interpolation = cv2.INTER_LINEAR
+    if crop_plan is not None and crop_plan.crop_width > output_size[0]:
+        interpolation = cv2.INTER_AREA
+
+    source_shape = (
+        int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), 3
+    )
+    ring = FrameRing(source_shape, ring_size)
+
+    # Reframed frames are scaled into a second set of buffers, one per ring slot
+    scaled = None
+    if crop_plan is not None:
+        scaled = [
+            np.empty((output_size[1], output_size[0], 3), dtype=np.uint8)
+            for _ in range(ring.size)
+        ]
+
+    def process(slot: int, frame: np.ndarray, index: int) -> np.ndarray:
+        if scaled is not None:
+            frame = cv2.resize(
+                crop_plan.crop(frame, start_frame + index), output_size,
+                dst=scaled[slot], interpolation=interpolation
+            )
+        overlay.apply(frame)
+        if subtitles:
+            subtitles.apply(frame, (start_frame + index) / fps)
+        return frame
+
+    # Video renditions get their own writer and a scaling buffer each
+    renditions = [
+        (
+            cv2.VideoWriter(output['path'], fourcc, fps, output['size']),
+            output['size'],
+            np.empty((output['size'][1], output['size'][0], 3), dtype=np.uint8)
+        )
+        for output in outputs or [] if output['kind'] == 'video'
+    ]
+    posters = {
+        output['frame']: output for output in outputs or []
+        if output['kind'] == 'poster'
+    }
+
+    report_every = max(1, int(round(fps)))
+    written = 0
+
+    def write(frame: np.ndarray) -> None:
+        nonlocal written
+        out.write(frame)
+        for writer, size, buffer in renditions:
+            writer.write(cv2.resize(frame, size, dst=buffer, interpolation=cv2.INTER_AREA))
+
+        poster = posters.get(start_frame + written)
+        if poster is not None:
+            image = cv2.resize(frame, poster['size'], interpolation=cv2.INTER_AREA)
+            cv2.imwrite(poster['path'], image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+
+        written += 1
+        if progress_queue is not None and written % report_every == 0:
+            progress_queue.put((progress_key, written))
+
+    try:
+        if start_frame > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+        return ring.run(
+            cap, process, write,
+            end_frame - start_frame if end_frame is not None else None
+        )
+
+    finally:
+        cap.release()
+        out.release()
+        for writer, _, _ in renditions:
+            writer.release()
+
+def _rendition_size(spec: dict, output_size: Tuple[int, int]) -> Tuple[int, int]:
+    """Size of a rendition; a missing side keeps the output's aspect ratio, rounded to even."""
+    width, height = spec.get('width'), spec.get('height')
+    if width and height:
+        return int(width), int(height)
+    if width:
+        height = int(round(int(width) * output_size[1] / output_size[0]))
+        return int(width), height + height % 2
+    if height:
+        width = int(round(int(height) * output_size[0] / output_size[1]))
+        return width + width % 2, int(height)
+    return output_size
+
+def _local_outputs(outputs: List[dict], tag: str) -> List[dict]:
+    """Redirect video renditions to temporary files named after tag; posters keep their path."""
+    return [
+        {**output, 'path': f"{tag}_r{index}.mp4"} if output['kind'] == 'video' else output
+        for index, output in enumerate(outputs)
+    ]
+
 async def main():
     processor = VideoProcessor()
     # Example usage
@@ -0,0 +1,103 @@
+import pytest
+import os
+import time
+from pathlib import Path
+from unittest.mock import patch
+from src.artifact_cache import ArtifactCache
+
+@pytest.fixture
+def cache(temp_dir):
+    """Create an ArtifactCache in a temporary directory."""
+    return ArtifactCache(str(Path(temp_dir) / 'cache'), max_size_mb=1)
+
+def test_make_key_depends_on_input_and_params():
+    """Test that keys change with the input hash and the stage parameters."""
+    key = ArtifactCache.make_key('process', 'abc', {'watermark_text': '@me'})
+
+    # Verify
+    assert key == ArtifactCache.make_key('process', 'abc', {'watermark_text': '@me'})
+    assert key != ArtifactCache.make_key('process', 'abd', {'watermark_text': '@me'})
+    assert key != ArtifactCache.make_key('process', 'abc', {'watermark_text': '@you'})
+    assert key != ArtifactCache.make_key('transcribe', 'abc', {'watermark_text': '@me'})
+
+def test_store_and_restore(cache, temp_dir):
+    """Test round-tripping a file through the cache."""
+    source = Path(temp_dir) / 'output.mp4'
+    source.write_bytes(b"processed content")
+    key = cache.make_key('process', 'abc')
+
+    cache.store(key, str(source))
+    dest = Path(temp_dir) / 'restored' / 'output.mp4'
+
+    # Verify
+    assert cache.restore(key, str(dest))
+    assert dest.read_bytes() == b"processed content"
+
+def test_store_move_and_path(cache, temp_dir):
+    """Test moving a file into the cache and reading it in place."""
+    source = Path(temp_dir) / 'pcm.tmp'
+    source.write_bytes(b"samples")
+    key = cache.make_key('pcm', 'abc')
+
+    assert cache.path(key) is None
+    cache.store(key, str(source), move=True)
+
+    # Verify
+    assert not source.exists()
+    assert Path(cache.path(key)).read_bytes() == b"samples"
+
+def test_restore_miss(cache, temp_dir):
+    """Test that unknown keys are reported as misses."""
+    dest = Path(temp_dir) / 'missing.mp4'
+
+    assert not cache.restore(cache.make_key('process', 'nope'), str(dest))
+    assert not dest.exists()
+
+def test_json_round_trip(cache):
+    """Test caching JSON values."""
+    key = cache.make_key('caption', 'abc')
+
+    assert cache.get_json(key) is None
+    cache.put_json(key, {'caption': 'Hi', 'hashtags': ['#fyp']})
+    assert cache.get_json(key) == {'caption': 'Hi', 'hashtags': ['#fyp']}
+
+def test_evict_removes_least_recently_used(cache, temp_dir):
+    """Test that eviction keeps the cache under its size limit, oldest first."""
+    source = Path(temp_dir) / 'chunk.bin'
+    source.write_bytes(b"x" * 300 * 1024)
+
+    keys = [cache.make_key('process', str(i)) for i in range(3)]
+    for index, key in enumerate(keys):
+        cache.store(key, str(source))
+        entry = cache._entry_path(key)
+        os.utime(entry, (time.time() - 100 + index, time.time() - 100 + index))
+
+    # Touch the oldest entry so it becomes the most recently used
+    assert cache.restore(keys[0], str(Path(temp_dir) / 'restored.bin'))
+
+    cache.store(cache.make_key('process', 'new'), str(source))
+
+    # Verify the least recently used entry was evicted and the total fits
+    assert not cache._entry_path(keys[1]).exists()
+    assert cache._entry_path(keys[0]).exists()
+    total = sum(p.stat().st_size for p in Path(cache.cache_dir).glob('*/*'))
+    assert total <= cache.max_bytes
+
+def test_writes_under_the_limit_do_not_rescan(cache, temp_dir):
+    """Test that the cache directory is scanned on the first write and again only when it may be full."""
+    source = Path(temp_dir) / 'chunk.bin'
+    source.write_bytes(b"x" * 300 * 1024)
+
+    with patch.object(cache, 'evict', wraps=cache.evict) as mock_evict:
+        # Call function
+        for index in range(3):
+            cache.store(cache.make_key('process', str(index)), str(source))
+        cache.put_json(cache.make_key('caption', 'abc'), {'caption': 'Hi'})
+        assert mock_evict.call_count == 1
+
+        cache.store(cache.make_key('process', 'new'), str(source))
+
+    # Verify
+    assert mock_evict.call_count == 2
+    assert cache._size == sum(p.stat().st_size for p in Path(cache.cache_dir).glob('*/*'))
+    assert cache._size <= cache.max_bytes
@@ -0,0 +1,143 @@
+import pytest
+import shutil
+import subprocess
+import numpy as np
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+from src.artifact_cache import ArtifactCache
+from src.audio import AudioStore, PcmRef, decode_pcm, fingerprint, bit_error_rate, active_frames, SAMPLE_RATE
+
+@pytest.fixture
+def store(temp_dir):
+    """Create an AudioStore over a temporary cache."""
+    return AudioStore(ArtifactCache(str(Path(temp_dir) / 'cache')))
+
+@pytest.fixture
+def pcm():
+    """One second of a rising ramp."""
+    return np.linspace(-1, 1, SAMPLE_RATE, dtype=np.float32)
+
+def test_extract_decodes_once(store, temp_dir, pcm):
+    """Test that a video is decoded once and memory-mapped afterwards."""
+    with patch('src.audio.decode_pcm') as mock_decode:
+        mock_decode.return_value = pcm
+
+        # Call function
+        first = store.extract('clip.mp4', 'abc')
+        second = store.extract('clip.mp4', 'abc')
+
+    # Verify
+    mock_decode.assert_called_once_with('clip.mp4', SAMPLE_RATE)
+    assert first == second
+    loaded = second.load()
+    assert isinstance(loaded, np.memmap)
+    np.testing.assert_array_equal(loaded, pcm)
+    assert not list(Path(temp_dir, 'cache').glob('*.tmp'))
+
+def test_slices_share_the_file(store, pcm):
+    """Test that slices of a reference read the same mapped samples."""
+    with patch('src.audio.decode_pcm') as mock_decode:
+        mock_decode.return_value = pcm
+        audio = store.extract('clip.mp4', 'abc')
+
+    # Call function
+    part = audio.slice(100, 200)
+    inner = part.slice(50)
+
+    # Verify
+    assert part == PcmRef(audio.path, 100, 200)
+    np.testing.assert_array_equal(inner.load(), pcm[150:200])
+
+    # Copy-on-write: writes stay in the process that made them
+    loaded = part.load()
+    loaded[:] = 0
+    np.testing.assert_array_equal(part.load(), pcm[100:200])
+
+def test_decode_without_audio_track():
+    """Test that a file without audio decodes to no samples."""
+    with patch('src.audio.subprocess.run') as mock_run:
+        mock_run.return_value = MagicMock(
+            returncode=1, stdout=b'', stderr=b'Output file does not contain any stream'
+        )
+
+        # Call function
+        pcm = decode_pcm('silent.mp4')
+
+    # Verify
+    assert pcm.dtype == np.float32
+    assert len(pcm) == 0
+
+def test_decode_failure():
+    """Test that other decode errors are raised."""
+    with patch('src.audio.subprocess.run') as mock_run:
+        mock_run.return_value = MagicMock(returncode=1, stdout=b'', stderr=b'Invalid data')
+
+        # Call function / Verify
+        with pytest.raises(IOError):
+            decode_pcm('broken.mp4')
+
+@pytest.mark.skipif(not shutil.which('ffmpeg'), reason="requires ffmpeg")
+def test_decode_pcm(temp_dir):
+    """Test decoding a real audio track to 16 kHz mono."""
+    path = str(Path(temp_dir) / 'tone.wav')
+    subprocess.run(
+        ['ffmpeg', '-loglevel', 'error', '-f', 'lavfi', '-i', 'sine=frequency=440:duration=2',
+         '-ac', '2', '-ar', '44100', path],
+        check=True
+    )
+
+    # Call function
+    pcm = decode_pcm(path)
+
+    # Verify
+    assert abs(len(pcm) - 2 * SAMPLE_RATE) < 100
+    assert 0.05 < np.abs(pcm).max() <= 1.0
+
+def test_fingerprint_ignores_volume_and_silence():
+    """Test that fingerprints do not depend on level, and silence sets no bits."""
+    rng = np.random.default_rng(0)
+    noise = (0.1 * rng.standard_normal(10 * SAMPLE_RATE)).astype(np.float32)
+
+    # Call function
+    prints = fingerprint(noise)
+
+    # Verify
+    assert prints.dtype == np.uint32
+    assert len(prints) == (len(noise) - 2048) // 1024
+    assert bit_error_rate(prints, fingerprint(noise * 0.3)) < 0.01
+    assert bit_error_rate(prints, fingerprint(np.roll(noise, SAMPLE_RATE))) > 0.4
+    assert not fingerprint(np.zeros(SAMPLE_RATE, dtype=np.float32)).any()
+    assert len(fingerprint(noise[:1000])) == 0
+
+def test_bit_error_rate_skips_shared_silence():
+    """Test that frames silent in both fingerprints do not count as matching bits."""
+    rng = np.random.default_rng(0)
+    first, second = rng.integers(1, 2 ** 32, (2, 50), dtype=np.uint32)
+    silence = np.zeros(1000, dtype=np.uint32)
+
+    # Call function
+    error = bit_error_rate(np.concatenate([first, silence]), np.concatenate([second, silence]))
+
+    # Verify
+    assert error == pytest.approx(bit_error_rate(first, second))
+    assert error > 0.4
+    assert bit_error_rate(silence, silence) == 1.0
+    assert active_frames(np.concatenate([first, silence])) == 50
+
+@pytest.mark.skipif(not shutil.which('ffmpeg'), reason="requires ffmpeg")
+def test_fingerprint_survives_reencoding(temp_dir):
+    """Test that a lossy re-encode keeps the fingerprint close."""
+    source = str(Path(temp_dir) / 'source.wav')
+    copy = str(Path(temp_dir) / 'copy.mp3')
+    subprocess.run(
+        ['ffmpeg', '-loglevel', 'error', '-f', 'lavfi', '-i', 'anoisesrc=color=pink:duration=10:seed=3',
+         '-af', 'volume=0.3,tremolo=f=2:d=0.8', '-ar', '16000', source],
+        check=True
+    )
+    subprocess.run(['ffmpeg', '-loglevel', 'error', '-i', source, '-b:a', '64k', '-ar', '44100', copy], check=True)
+
+    # Call function
+    error = bit_error_rate(fingerprint(decode_pcm(source)), fingerprint(decode_pcm(copy)))
+
+    # Verify
+    assert error < 0.2
@@ -13,10 +13,11 @@ def test_config():
         return json.load(f)
 
 @pytest.fixture
-def generator(test_config):
+def generator(test_config, temp_dir):
     """Create a CaptionGenerator instance with test configuration."""
+    config = {**test_config, 'cache': {'dir': temp_dir}}
     with patch('src.caption_generator.load_config') as mock_load:
-        mock_load.return_value = test_config
+        mock_load.return_value = config
         return CaptionGenerator()
 
 @pytest.mark.asyncio
@@ -187,4 +188,26 @@ def test_clean_caption(generator):
     ]
     
     for caption, expected in test_cases:
-        assert generator._clean_caption(caption) == expected 
\ No newline at end of file
+        assert generator._clean_caption(caption) == expected 
+
+@pytest.fixture
+def cached_generator(test_config, temp_dir, mock_env_vars):
+    """Create a CaptionGenerator whose artifact cache lives in a temp directory."""
+    config = {**test_config, 'cache': {'dir': temp_dir}}
+    with patch('src.caption_generator.load_config') as mock_load:
+        mock_load.return_value = config
+        return CaptionGenerator()
+
+@pytest.mark.asyncio
+async def test_generate_single_caption_uses_cache(cached_generator):
+    """Test that an identical transcript is only sent to the API once."""
+    with patch('src.caption_generator.CaptionGenerator._call_api') as mock_api:
+        mock_api.return_value = "CAPTION: Cached caption\nHASHTAGS: #one #two"
+        
+        # Call function twice with the same transcript
+        first = await cached_generator._generate_single_caption("a.mp4", "Same words")
+        second = await cached_generator._generate_single_caption("b.mp4", "Same words")
+        
+        # Verify
+        assert first == second == ("Cached caption", ["#one", "#two"])
+        mock_api.assert_called_once()
@@ -0,0 +1,74 @@
+import numpy as np
+from src.chunking import Chunk, SegmentStitcher, plan_chunks, split_region
+
+RATE = 1000
+
+def test_chunks_split_at_silence():
+    """Test that regions are grouped into chunks without cutting any of them."""
+    pcm = np.ones(100 * RATE, dtype=np.float32)
+    regions = [(0, 20 * RATE), (25 * RATE, 45 * RATE), (50 * RATE, 70 * RATE), (80 * RATE, 90 * RATE)]
+
+    # Call function
+    chunks = plan_chunks(pcm, regions, RATE, chunk_seconds=45)
+
+    # Verify
+    assert [chunk.regions for chunk in chunks] == [regions[:2], regions[2:]]
+    assert chunks[0].keep_until == chunks[1].keep_from == 47.5
+
+def test_one_chunk_when_disabled():
+    """Test that chunking can be turned off."""
+    regions = [(0, 200 * RATE)]
+
+    # Call function
+    chunks = plan_chunks(np.ones(200 * RATE, dtype=np.float32), regions, RATE, chunk_seconds=0)
+
+    # Verify
+    assert chunks == [Chunk(regions, float('-inf'), float('inf'))]
+
+def test_long_region_cut_at_quietest_point():
+    """Test that continuous speech is cut at a quiet moment, with overlap."""
+    pcm = np.ones(100 * RATE, dtype=np.float32)
+    pcm[57 * RATE:57 * RATE + 100] = 0
+
+    # Call function
+    pieces = split_region(pcm, 0, 100 * RATE, RATE, limit=60 * RATE, overlap=RATE, search=5 * RATE)
+
+    # Verify
+    assert len(pieces) == 2
+    (first_start, first_end), (second_start, second_end) = pieces
+    cut = (first_end + second_start) / 2
+    assert 57 * RATE <= cut <= 57 * RATE + 100
+    assert first_end - second_start == RATE
+    assert (first_start, second_end) == (0, 100 * RATE)
+
+    chunks = plan_chunks(pcm, [(0, 100 * RATE)], RATE, chunk_seconds=60)
+    assert [chunk.regions for chunk in chunks] == [[pieces[0]], [pieces[1]]]
+
+def test_stitch_drops_duplicates_at_seam():
+    """Test that each chunk keeps only the segments it owns."""
+    chunks = [Chunk([(0, 61)], float('-inf'), 60.5), Chunk([(60, 100)], 60.5, float('inf'))]
+    results = [
+        [{'start': 0.0, 'end': 58.0, 'text': ' one'}, {'start': 58.0, 'end': 61.0, 'text': ' two'}],
+        [{'start': 59.5, 'end': 61.0, 'text': ' two'}, {'start': 60.5, 'end': 70.0, 'text': ' three'}]
+    ]
+
+    # Call function
+    stitcher = SegmentStitcher()
+    segments = [segment for chunk, found in zip(chunks, results) for segment in stitcher.add(chunk, found)]
+
+    # Verify
+    assert [s['text'] for s in segments] == [' one', ' two', ' three']
+    assert segments[2]['start'] == 61.0
+
+def test_stitcher_takes_chunks_one_at_a_time():
+    """Test that segments can be released as each chunk finishes."""
+    chunks = [Chunk([(0, 61)], float('-inf'), 60.5), Chunk([(60, 100)], 60.5, float('inf'))]
+    stitcher = SegmentStitcher()
+
+    # Call function
+    first = stitcher.add(chunks[0], [{'start': 58.0, 'end': 61.0, 'text': ' two'}])
+    second = stitcher.add(chunks[1], [{'start': 60.5, 'end': 70.0, 'text': ' three'}])
+
+    # Verify
+    assert [s['text'] for s in first] == [' two']
+    assert second == [{'start': 61.0, 'end': 70.0, 'text': ' three'}]
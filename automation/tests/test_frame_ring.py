@@ -0,0 +1,102 @@
+import pytest
+import numpy as np
+from src.frame_ring import FrameRing
+
+class FakeCapture:
+    """Capture that decodes numbered frames into the buffer it is given."""
+
+    def __init__(self, count, shape=(4, 6, 3)):
+        self.count = count
+        self.shape = shape
+        self.index = 0
+
+    def read(self, image=None):
+        if self.index >= self.count:
+            return False, None
+        if image is None or image.shape != self.shape:
+            image = np.empty(self.shape, dtype=np.uint8)
+        image[:] = self.index
+        self.index += 1
+        return True, image
+
+def test_run_keeps_frame_order():
+    """Test that every frame is processed and written once, in order."""
+    ring = FrameRing((4, 6, 3), size=3)
+    written = []
+
+    # Call function
+    count = ring.run(FakeCapture(20), lambda slot, frame, index: frame, lambda frame: written.append(int(frame[0, 0, 0])))
+
+    # Verify
+    assert count == 20
+    assert written == list(range(20))
+
+def test_run_reuses_buffers():
+    """Test that decoding never allocates beyond the ring."""
+    ring = FrameRing((4, 6, 3), size=4)
+    buffers = {id(buffer) for buffer in ring.buffers}
+    seen = set()
+
+    def process(slot, frame, index):
+        seen.add(id(frame))
+        return frame
+
+    # Call function
+    ring.run(FakeCapture(50), process, lambda frame: None)
+
+    # Verify
+    assert seen <= buffers
+
+def test_run_stops_at_frame_count():
+    """Test reading only the requested number of frames."""
+    ring = FrameRing((4, 6, 3), size=2)
+    indices = []
+
+    def process(slot, frame, index):
+        indices.append(index)
+        return frame
+
+    # Call function
+    count = ring.run(FakeCapture(20), process, lambda frame: None, frame_count=5)
+
+    # Verify
+    assert count == 5
+    assert indices == [0, 1, 2, 3, 4]
+
+def test_run_processes_into_slot_buffers():
+    """Test that process can fill a caller-owned buffer per slot."""
+    ring = FrameRing((4, 6, 3), size=3)
+    outputs = [np.empty((2, 3, 3), dtype=np.uint8) for _ in range(ring.size)]
+    written = []
+
+    def process(slot, frame, index):
+        outputs[slot][:] = frame[:2, :3] + 1
+        return outputs[slot]
+
+    # Call function
+    ring.run(FakeCapture(10), process, lambda frame: written.append(int(frame[0, 0, 0])))
+
+    # Verify
+    assert written == list(range(1, 11))
+
+def test_run_raises_process_errors():
+    """Test that an error in processing stops the threads and is raised."""
+    ring = FrameRing((4, 6, 3), size=2)
+
+    def process(slot, frame, index):
+        if index == 3:
+            raise ValueError("bad frame")
+        return frame
+
+    with pytest.raises(ValueError):
+        ring.run(FakeCapture(100), process, lambda frame: None)
+
+def test_run_raises_write_errors():
+    """Test that an error in the writer stops the threads and is raised."""
+    ring = FrameRing((4, 6, 3), size=2)
+
+    def write(frame):
+        raise IOError("disk full")
+
+    with pytest.raises(IOError):
+        ring.run(FakeCapture(100), lambda slot, frame, index: frame, write)
@@ -0,0 +1,140 @@
+import os
+import pytest
+import sqlite3
+from pathlib import Path
+from unittest.mock import patch
+import src.job_store as job_store
+from src.job_store import JobStore
+
+@pytest.fixture
+def store(temp_dir):
+    """Create a JobStore backed by a temporary database."""
+    store = JobStore(str(Path(temp_dir) / 'state' / 'jobs.db'))
+    yield store
+    store.close()
+
+@pytest.fixture
+def source_video(temp_dir):
+    """Create a fake downloaded video."""
+    path = Path(temp_dir) / 'video1.mp4'
+    path.write_bytes(b"mock video content")
+    return str(path)
+
+def test_start_records_downloaded_stage(store, source_video):
+    """Test registering a downloaded video."""
+    job_id = store.start(source_video)
+
+    # Verify
+    assert store.state(job_id) == 'downloaded'
+    assert store.get(job_id, 'downloaded')['path'] == source_video
+
+def test_complete_advances_state(store, source_video, temp_dir):
+    """Test recording stages with artifacts and data."""
+    processed = Path(temp_dir) / 'processed.mp4'
+    processed.write_bytes(b"processed content")
+
+    job_id = store.start(source_video)
+    store.complete(job_id, 'processed', str(processed))
+    store.complete(job_id, 'captioned', None, {'caption': 'Hi', 'hashtags': ['#fyp']})
+
+    # Verify
+    assert store.state(job_id) == 'captioned'
+    assert store.get(job_id, 'processed')['path'] == str(processed)
+    assert store.get(job_id, 'captioned')['data'] == {'caption': 'Hi', 'hashtags': ['#fyp']}
+    assert store.get(job_id, 'transcribed') is None
+
+def test_state_survives_reopen(temp_dir, source_video):
+    """Test that progress is persisted across store instances."""
+    db_path = str(Path(temp_dir) / 'jobs.db')
+
+    store = JobStore(db_path)
+    job_id = store.start(source_video)
+    store.complete(job_id, 'uploaded')
+    store.close()
+
+    reopened = JobStore(db_path)
+    assert reopened.state(job_id) == 'uploaded'
+    reopened.close()
+
+def test_modified_artifact_is_not_resumed(store, source_video, temp_dir):
+    """Test that a changed or deleted artifact invalidates its stage."""
+    processed = Path(temp_dir) / 'processed.mp4'
+    processed.write_bytes(b"processed content")
+
+    job_id = store.start(source_video)
+    store.complete(job_id, 'processed', str(processed))
+
+    processed.write_bytes(b"truncated")
+    assert store.get(job_id, 'processed') is None
+
+    processed.unlink()
+    assert store.get(job_id, 'processed') is None
+
+def test_unchanged_files_are_hashed_once(store, source_video, temp_dir):
+    """Test that files whose size and modification time are unchanged are not read again."""
+    processed = Path(temp_dir) / 'processed.mp4'
+    processed.write_bytes(b"processed content")
+    checksum = job_store.file_checksum(source_video)
+
+    with patch('src.job_store.file_checksum', side_effect=job_store.file_checksum) as mock_checksum:
+        # Call function
+        job_id = store.start(source_video)
+        store.complete(job_id, 'processed', str(processed))
+        store.start(source_video)
+        store.get(job_id, 'processed')
+        store.get(job_id, 'processed')
+
+        # Verify
+        assert mock_checksum.call_count == 2
+        assert store.get(job_id, 'downloaded')['checksum'] == checksum
+
+        # A touched file with the same content is hashed and still resumed
+        stat = os.stat(processed)
+        os.utime(processed, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        assert store.get(job_id, 'processed')['path'] == str(processed)
+        assert mock_checksum.call_count == 3
+
+def test_old_database_is_upgraded(temp_dir, source_video):
+    """Test that a database without the file stat columns is still readable."""
+    db_path = str(Path(temp_dir) / 'old.db')
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE jobs (job_id TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at TEXT NOT NULL)")
+        conn.execute(
+            "CREATE TABLE stages (job_id TEXT NOT NULL, stage TEXT NOT NULL, path TEXT, checksum TEXT, "
+            "data TEXT, completed_at TEXT NOT NULL, PRIMARY KEY (job_id, stage))"
+        )
+        conn.execute(
+            "INSERT INTO stages VALUES (?, 'processed', ?, ?, NULL, 'then')",
+            ('job', source_video, job_store.file_checksum(source_video))
+        )
+    conn.close()
+
+    # Call function
+    store = JobStore(db_path)
+    result = store.get('job', 'processed')
+    store.close()
+
+    # Verify
+    assert result['path'] == source_video
+
+def test_changed_source_resets_job(store, source_video, temp_dir):
+    """Test that a different file under the same name restarts the job."""
+    processed = Path(temp_dir) / 'processed.mp4'
+    processed.write_bytes(b"processed content")
+
+    job_id = store.start(source_video)
+    store.complete(job_id, 'processed', str(processed))
+
+    Path(source_video).write_bytes(b"new video content")
+    store.start(source_video)
+
+    # Verify
+    assert store.state(job_id) == 'downloaded'
+    assert store.get(job_id, 'processed') is None
+
+def test_complete_rejects_unknown_stage(store, source_video):
+    """Test that only known stages can be recorded."""
+    job_id = store.start(source_video)
+
+    with pytest.raises(ValueError):
+        store.complete(job_id, 'published')
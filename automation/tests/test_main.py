@@ -1,123 +1,203 @@
 import pytest
-import asyncio
 from pathlib import Path
-import json
-from unittest.mock import patch, MagicMock
-from src.main import ContentOrchestrator
+from unittest.mock import patch, AsyncMock
+from src.main import TikTokAutomation
+
+def artifact(temp_dir: str, name: str) -> str:
+    """Create a stage output file."""
+    path = Path(temp_dir) / name
+    path.write_bytes(name.encode())
+    return str(path)
 
 @pytest.fixture
-def test_config():
-    config_path = Path(__file__).parent / 'test_config.json'
-    with open(config_path, 'r') as f:
-        return json.load(f)
+def sources(temp_dir):
+    """Create two fake downloaded videos."""
+    return [artifact(temp_dir, 'video1.mp4'), artifact(temp_dir, 'video2.mp4')]
 
 @pytest.fixture
-def orchestrator(test_config):
-    with patch('src.main.json.load') as mock_load, \
-         patch('src.main.ContentScraper') as mock_scraper, \
-         patch('src.main.VideoProcessor') as mock_processor, \
-         patch('src.main.TranscriptionService') as mock_transcriber, \
-         patch('src.main.CaptionGenerator') as mock_caption_gen, \
-         patch('src.main.TikTokUploader') as mock_uploader, \
-         patch('src.main.AutomationLogger') as mock_logger:
-        mock_load.return_value = test_config
-        mock_scraper.return_value = MagicMock()
-        mock_processor.return_value = MagicMock()
-        mock_transcriber.return_value = MagicMock()
-        mock_caption_gen.return_value = MagicMock()
-        mock_uploader.return_value = MagicMock()
-        mock_logger.return_value = MagicMock()
-        return ContentOrchestrator()
+def automation(test_config, temp_dir, sources):
+    """Create a TikTokAutomation with mocked components and job state in a temp directory."""
+    config = {**test_config, 'state': {'db_path': str(Path(temp_dir) / 'state' / 'jobs.db')}}
+    with patch('src.main.load_config') as mock_load, \
+         patch('src.main.logging.basicConfig'), \
+         patch('src.main.AutomationLogger'), \
+         patch('src.main.ContentScraper'), \
+         patch('src.main.QualityFilter'), \
+         patch('src.main.VideoProcessor'), \
+         patch('src.main.TranscriptionService'), \
+         patch('src.main.CaptionGenerator'), \
+         patch('src.main.TikTokUploader'):
+        mock_load.return_value = config
+        automation = TikTokAutomation()
+
+    automation.logger.log_event = AsyncMock()
+    automation.scraper.get_content = AsyncMock(return_value=sources)
+    automation.quality_filter.check_video = AsyncMock(return_value={'passed': True})
+    automation.transcriber.warmup = AsyncMock(return_value=True)
+    automation.transcriber.transcribe_video = AsyncMock(
+        side_effect=lambda path, input_hash=None: artifact(temp_dir, f"{Path(path).stem}.txt")
+    )
+    automation.processor.burn_subtitles = False
+    automation.processor.process_video_outputs = AsyncMock(
+        side_effect=lambda path, progress, **kwargs: {'main': artifact(temp_dir, f"processed_{Path(path).name}")}
+    )
+    automation.caption_generator.generate_caption = AsyncMock(return_value=("Caption", ["#fyp"]))
+    automation.uploader.upload_video = AsyncMock(return_value=True)
+
+    yield automation
+    automation.jobs.close()
+
+def started(automation, source: str) -> dict:
+    """Register a source with the job store, as the filter stage does."""
+    job_id = automation.jobs.start(source)
+    return {'source': source, 'job': job_id, 'hash': automation.jobs.get(job_id, 'downloaded')['checksum']}
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('mode', ['streaming', 'batch'])
+async def test_run_uploads_every_video(automation, sources, mode):
+    """Test that every video goes through each stage and is uploaded."""
+    automation.pipeline_settings = {'mode': mode}
+
+    # Call function
+    await automation.run()
+
+    # Verify
+    assert automation.uploader.upload_video.call_count == 2
+    for source in sources:
+        assert automation.jobs.state(automation.jobs.start(source)) == 'uploaded'
+    automation.transcriber.close.assert_called_once()
+    automation.processor.close.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_source_is_hashed_once(automation, sources):
+    """Test that the stages reuse the checksum taken when the job started."""
+    automation.pipeline_settings = {'mode': 'batch'}
+
+    # Call function
+    await automation.run()
+
+    # Verify
+    checksum = automation.jobs.get(automation.jobs.start(sources[0]), 'downloaded')['checksum']
+    automation.transcriber.transcribe_video.assert_any_call(sources[0], checksum)
+    kwargs = automation.processor.process_video_outputs.call_args_list[0].kwargs
+    assert kwargs['input_hash'] == checksum
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('mode', ['streaming', 'batch'])
+async def test_rerun_skips_uploaded_videos(automation, sources, mode):
+    """Test that a rerun after a fully successful run skips every video without failing."""
+    automation.pipeline_settings = {'mode': mode}
+    await automation.run()
+
+    # Call function
+    await automation.run()
+
+    # Verify
+    assert automation.skipped == sources
+    assert automation.uploader.upload_video.call_count == 2
+    assert automation.quality_filter.check_video.call_count == 2
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('mode', ['streaming', 'batch'])
+async def test_run_fails_when_remaining_videos_fail(automation, sources, mode):
+    """Test that a run still fails when the videos that were not skipped all failed."""
+    automation.pipeline_settings = {'mode': mode}
+    first = started(automation, sources[0])
+    automation.jobs.complete(first['job'], 'uploaded')
+    automation.quality_filter.check_video.return_value = {'passed': False}
+
+    # Call function
+    with pytest.raises(Exception):
+        await automation.run()
+
+    # Verify
+    assert automation.skipped == sources[:1]
+    automation.uploader.upload_video.assert_not_called()
 
 @pytest.mark.asyncio
-async def test_run_pipeline_success(orchestrator):
-    # Mock successful responses from all components
-    orchestrator.scraper.get_content.return_value = ["video1.mp4", "video2.mp4"]
-    orchestrator.processor.process_videos.return_value = ["processed1.mp4", "processed2.mp4"]
-    orchestrator.transcriber.transcribe_videos.return_value = ["transcript1.srt", "transcript2.srt"]
-    orchestrator.caption_gen.generate_captions.return_value = [
-        ("Caption 1", ["test", "video"]),
-        ("Caption 2", ["test", "video"])
-    ]
-    orchestrator.uploader.upload_videos.return_value = [True, True]
-    
-    await orchestrator.run_pipeline()
-    
-    # Verify all components were called
-    orchestrator.scraper.get_content.assert_called_once()
-    orchestrator.processor.process_videos.assert_called_once()
-    orchestrator.transcriber.transcribe_videos.assert_called_once()
-    orchestrator.caption_gen.generate_captions.assert_called_once()
-    orchestrator.uploader.upload_videos.assert_called_once()
-    
-    # Verify logging
-    orchestrator.logger.log_success.assert_called()
+async def test_run_error_closes_workers(automation):
+    """Test that a failed run is logged and still shuts the pools down."""
+    automation.scraper.get_content.side_effect = Exception("Scraper error")
+
+    # Call function
+    with pytest.raises(Exception, match="Scraper error"):
+        await automation.run()
+
+    # Verify
+    automation.logger.log_event.assert_any_call("Error in automation process: Scraper error", "error")
+    automation.transcriber.transcribe_video.assert_not_called()
+    automation.transcriber.close.assert_called_once()
+    automation.processor.close.assert_called_once()
 
 @pytest.mark.asyncio
-async def test_run_pipeline_scraper_error(orchestrator):
-    # Mock scraper error
-    orchestrator.scraper.get_content.side_effect = Exception("Scraper error")
-    
-    await orchestrator.run_pipeline()
-    
-    # Verify error was logged
-    orchestrator.logger.log_error.assert_called()
-    
-    # Verify subsequent components were not called
-    orchestrator.processor.process_videos.assert_not_called()
-    orchestrator.transcriber.transcribe_videos.assert_not_called()
-    orchestrator.caption_gen.generate_captions.assert_not_called()
-    orchestrator.uploader.upload_videos.assert_not_called()
+async def test_filter_skips_uploaded_video(automation, sources):
+    """Test that a video uploaded by an earlier run is not checked again."""
+    item = started(automation, sources[0])
+    automation.jobs.complete(item['job'], 'uploaded')
+
+    # Call function
+    result = await automation._filter_item({'source': sources[0]})
+
+    # Verify
+    assert result is None
+    assert automation.skipped == [sources[0]]
+    automation.quality_filter.check_video.assert_not_called()
 
 @pytest.mark.asyncio
-async def test_run_pipeline_processor_error(orchestrator):
-    # Mock successful scraping but failed processing
-    orchestrator.scraper.get_content.return_value = ["video1.mp4"]
-    orchestrator.processor.process_videos.side_effect = Exception("Processing error")
-    
-    await orchestrator.run_pipeline()
-    
-    # Verify error was logged
-    orchestrator.logger.log_error.assert_called()
-    
-    # Verify subsequent components were not called
-    orchestrator.transcriber.transcribe_videos.assert_not_called()
-    orchestrator.caption_gen.generate_captions.assert_not_called()
-    orchestrator.uploader.upload_videos.assert_not_called()
+async def test_transcribe_resumes_after_transcription(automation, sources, temp_dir):
+    """Test that a recorded transcript is reused instead of transcribing again."""
+    item = started(automation, sources[0])
+    subtitle = artifact(temp_dir, 'video1.txt')
+    automation.jobs.complete(item['job'], 'transcribed', subtitle)
+
+    # Call function
+    result = await automation._transcribe_item(item)
+
+    # Verify
+    assert result['subtitle'] == subtitle
+    automation.transcriber.transcribe_video.assert_not_called()
 
 @pytest.mark.asyncio
-async def test_run_pipeline_partial_success(orchestrator):
-    # Mock mixed results
-    orchestrator.scraper.get_content.return_value = ["video1.mp4", "video2.mp4"]
-    orchestrator.processor.process_videos.return_value = ["processed1.mp4"]  # One failed
-    orchestrator.transcriber.transcribe_videos.return_value = ["transcript1.srt"]
-    orchestrator.caption_gen.generate_captions.return_value = [("Caption 1", ["test", "video"])]
-    orchestrator.uploader.upload_videos.return_value = [True]
-    
-    await orchestrator.run_pipeline()
-    
-    # Verify all components were called
-    orchestrator.scraper.get_content.assert_called_once()
-    orchestrator.processor.process_videos.assert_called_once()
-    orchestrator.transcriber.transcribe_videos.assert_called_once()
-    orchestrator.caption_gen.generate_captions.assert_called_once()
-    orchestrator.uploader.upload_videos.assert_called_once()
-    
-    # Verify warning was logged
-    orchestrator.logger.log_warning.assert_called()
+async def test_process_resumes_after_processing(automation, sources, temp_dir):
+    """Test that a recorded render and its renditions are reused."""
+    item = started(automation, sources[0])
+    video = artifact(temp_dir, 'processed_video1.mp4')
+    renditions = {'main': video, 'poster': 'poster.jpg'}
+    automation.jobs.complete(item['job'], 'processed', video, {'renditions': renditions})
+
+    # Call function
+    result = await automation._process_item({**item, 'subtitle': 'video1.txt'})
+
+    # Verify
+    assert result['video'] == video
+    assert result['renditions'] == renditions
+    automation.processor.process_video_outputs.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_process_reruns_when_render_changed(automation, sources, temp_dir):
+    """Test that a render modified since it was recorded is made again."""
+    item = started(automation, sources[0])
+    video = artifact(temp_dir, 'processed_video1.mp4')
+    automation.jobs.complete(item['job'], 'processed', video, {'renditions': {'main': video}})
+    Path(video).write_bytes(b"truncated")
+
+    # Call function
+    result = await automation._process_item({**item, 'subtitle': 'video1.txt'})
+
+    # Verify
+    automation.processor.process_video_outputs.assert_called_once()
+    assert result['video'] == video
 
 @pytest.mark.asyncio
-async def test_schedule_runs(orchestrator):
-    # Mock successful pipeline run
-    orchestrator.run_pipeline.return_value = None
-    
-    # Run for a short duration
-    await asyncio.sleep(0.1)
-    orchestrator.stop_scheduling()
-    
-    # Verify pipeline was called
-    orchestrator.run_pipeline.assert_called()
-
-def test_stop_scheduling(orchestrator):
-    orchestrator.stop_scheduling()
-    assert orchestrator.is_running is False 
\ No newline at end of file
+async def test_caption_resumes_after_captioning(automation, sources):
+    """Test that a recorded caption is reused instead of calling the API again."""
+    item = started(automation, sources[0])
+    automation.jobs.complete(item['job'], 'captioned', None, {'caption': "Saved", 'hashtags': ["#one"]})
+
+    # Call function
+    result = await automation._caption_item({**item, 'video': 'processed.mp4', 'subtitle': 'video1.txt'})
+
+    # Verify
+    assert result['caption'] == "Saved"
+    assert result['hashtags'] == ["#one"]
+    automation.caption_generator.generate_caption.assert_not_called()
@@ -0,0 +1,116 @@
+import pytest
+import cv2
+import numpy as np
+from pathlib import Path
+from src.overlay import Sprite, WatermarkOverlay, render_text_sprite
+
+@pytest.fixture
+def frame():
+    """Create a mid-grey 1080x1920 frame."""
+    return np.full((1920, 1080, 3), 100, dtype=np.uint8)
+
+def test_blend_opaque_and_transparent():
+    """Test that opaque pixels replace the frame and transparent ones keep it."""
+    premultiplied = np.zeros((2, 2, 3), dtype=np.uint8)
+    premultiplied[0, 0] = (255, 0, 0)
+    alpha = np.array([[255, 0], [0, 0]], dtype=np.uint8)
+    sprite = Sprite(premultiplied, alpha)
+    target = np.full((4, 4, 3), 50, dtype=np.uint8)
+
+    # Call function
+    sprite.blend(target, 1, 1)
+
+    # Verify
+    assert tuple(target[1, 1]) == (255, 0, 0)
+    assert tuple(target[1, 2]) == (50, 50, 50)
+    assert tuple(target[0, 0]) == (50, 50, 50)
+
+def test_blend_half_transparent():
+    """Test blending a straight-alpha colour at 50% opacity."""
+    bgr = np.full((1, 1, 3), 200, dtype=np.uint8)
+    alpha = np.full((1, 1), 128, dtype=np.uint8)
+    sprite = Sprite.from_straight(bgr, alpha)
+    target = np.zeros((1, 1, 3), dtype=np.uint8)
+
+    # Call function
+    sprite.blend(target, 0, 0)
+
+    # Verify
+    assert abs(int(target[0, 0, 0]) - 100) <= 1
+
+def test_blend_clips_to_frame():
+    """Test that sprites hanging off the frame edge are clipped."""
+    sprite = Sprite(np.full((4, 4, 3), 255, dtype=np.uint8), np.full((4, 4), 255, dtype=np.uint8))
+    target = np.zeros((3, 3, 3), dtype=np.uint8)
+
+    # Call function
+    sprite.blend(target, 1, -2)
+
+    # Verify
+    assert target[0:2, 1:3].min() == 255
+    assert target[2].max() == 0
+    assert target[:, 0].max() == 0
+
+def test_text_watermark_matches_direct_rendering(frame):
+    """Test that the pre-rendered watermark looks like drawing the text per frame."""
+    text = "@YourTikTokHandle"
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    (text_width, _), _ = cv2.getTextSize(text, font, 1.0, 2)
+    origin = (1080 - text_width - 10, 1920 - 10)
+    expected = frame.copy()
+    cv2.putText(expected, text, origin, font, 1.0, (0, 0, 0), 3)
+    cv2.putText(expected, text, origin, font, 1.0, (255, 255, 255), 2)
+
+    # Call function
+    result = WatermarkOverlay(text).apply(frame.copy())
+
+    # Verify (allowing for rounding in the blend)
+    assert np.abs(result.astype(int) - expected.astype(int)).max() <= 2
+
+def test_text_sprite_origin():
+    """Test that the text origin lies inside the sprite."""
+    sprite, (origin_x, origin_y) = render_text_sprite("@handle")
+
+    assert 0 < origin_x < sprite.width
+    assert 0 < origin_y < sprite.height
+    assert sprite.alpha.max() == 255
+
+def test_image_watermark(frame, temp_dir):
+    """Test that a PNG watermark is used when it exists."""
+    image_path = Path(temp_dir) / 'watermark.png'
+    image = np.zeros((50, 100, 4), dtype=np.uint8)
+    image[:, :, 2] = 255
+    image[:, :, 3] = 255
+    cv2.imwrite(str(image_path), image)
+
+    # Call function
+    result = WatermarkOverlay("@handle", str(image_path), image_scale=0.1).apply(frame)
+
+    # Verify the red patch sits in the bottom right corner
+    assert tuple(result[1920 - 11, 1080 - 11]) == (0, 0, 255)
+    assert tuple(result[0, 0]) == (100, 100, 100)
+
+def test_missing_image_falls_back_to_text(frame):
+    """Test that a missing watermark image falls back to the text watermark."""
+    overlay = WatermarkOverlay("@handle", "does/not/exist.png")
+
+    # Call function
+    result = overlay.apply(frame)
+
+    # Verify
+    assert overlay.image_path is None
+    assert result[1860:1920, 900:1080].max() == 255
+
+def test_to_bgra_round_trip():
+    """Test exporting a sprite as straight-alpha BGRA and loading it back."""
+    bgr = np.full((3, 3, 3), 200, dtype=np.uint8)
+    alpha = np.full((3, 3), 128, dtype=np.uint8)
+    sprite = Sprite.from_straight(bgr, alpha)
+
+    # Call function
+    bgra = sprite.to_bgra()
+
+    # Verify
+    assert bgra.shape == (3, 3, 4)
+    assert np.abs(bgra[:, :, :3].astype(int) - 200).max() <= 2
+    assert (bgra[:, :, 3] == 128).all()
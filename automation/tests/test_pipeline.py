@@ -0,0 +1,90 @@
+import pytest
+import asyncio
+from src.pipeline import Stage, StagePipeline
+
+@pytest.mark.asyncio
+async def test_run_passes_items_through_all_stages():
+    """Test that every item visits every stage in order."""
+    async def double(item):
+        return item * 2
+
+    async def increment(item):
+        return item + 1
+
+    pipeline = StagePipeline([Stage('double', double), Stage('increment', increment)])
+
+    # Call function
+    results = await pipeline.run([1, 2, 3])
+
+    # Verify
+    assert sorted(results) == [3, 5, 7]
+
+@pytest.mark.asyncio
+async def test_run_drops_failed_items():
+    """Test that items returning None or raising are dropped."""
+    async def check(item):
+        if item == 2:
+            return None
+        if item == 3:
+            raise Exception("Stage error")
+        return item
+
+    pipeline = StagePipeline([Stage('check', check, workers=2)])
+
+    # Call function
+    results = await pipeline.run([1, 2, 3, 4])
+
+    # Verify
+    assert sorted(results) == [1, 4]
+
+@pytest.mark.asyncio
+async def test_run_overlaps_stages():
+    """Test that a later stage starts before an earlier one finishes the batch."""
+    events = []
+
+    async def slow(item):
+        await asyncio.sleep(0.01)
+        events.append(('slow', item))
+        return item
+
+    async def fast(item):
+        events.append(('fast', item))
+        return item
+
+    pipeline = StagePipeline([Stage('slow', slow), Stage('fast', fast)], queue_size=1)
+
+    # Call function
+    await pipeline.run([1, 2, 3])
+
+    # Verify the first item reached the second stage before the last item left the first
+    assert events.index(('fast', 1)) < events.index(('slow', 3))
+
+@pytest.mark.asyncio
+async def test_queue_size_bounds_work_in_flight():
+    """Test that a blocked stage stops the feeder from running ahead."""
+    consumed = []
+    release = asyncio.Event()
+
+    async def gate(item):
+        await release.wait()
+        return item
+
+    async def first(item):
+        consumed.append(item)
+        return item
+
+    pipeline = StagePipeline([Stage('first', first), Stage('gate', gate)], queue_size=1)
+    task = asyncio.ensure_future(pipeline.run(range(10)))
+    await asyncio.sleep(0.05)
+
+    # Verify only a bounded number of items were pulled while the gate is closed
+    assert len(consumed) < 5
+
+    release.set()
+    results = await task
+    assert sorted(results) == list(range(10))
+
+def test_pipeline_requires_stages():
+    """Test that an empty pipeline is rejected."""
+    with pytest.raises(ValueError):
+        StagePipeline([])
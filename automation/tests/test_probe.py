@@ -0,0 +1,104 @@
+import pytest
+import json
+import cv2
+import numpy as np
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+from src.probe import ProbeIndex, read_metadata
+
+@pytest.fixture
+def index(temp_dir):
+    """Create a ProbeIndex backed by a temporary database."""
+    index = ProbeIndex(str(Path(temp_dir) / 'state' / 'probe.db'))
+    yield index
+    index.close()
+
+@pytest.fixture
+def video(temp_dir):
+    """Write a short 64x48 test video."""
+    path = str(Path(temp_dir) / 'clip.avi')
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10.0, (64, 48))
+    for index in range(20):
+        out.write(np.full((48, 64, 3), index * 10, dtype=np.uint8))
+    out.release()
+    return path
+
+def test_read_metadata_opencv(video):
+    """Test reading metadata without ffprobe."""
+    with patch('src.probe.shutil.which') as mock_which:
+        mock_which.return_value = None
+
+        # Call function
+        info = read_metadata(video)
+
+    # Verify
+    assert (info['width'], info['height']) == (64, 48)
+    assert info['fps'] == pytest.approx(10.0)
+    assert info['frame_count'] == 20
+    assert info['duration'] == pytest.approx(2.0)
+
+def test_read_metadata_ffprobe():
+    """Test parsing ffprobe output, estimating a missing frame count."""
+    output = {
+        'streams': [{'width': 1920, 'height': 1080, 'avg_frame_rate': '30000/1001', 'r_frame_rate': '30000/1001'}],
+        'format': {'duration': '10.010000'}
+    }
+    with patch('src.probe.shutil.which') as mock_which, \
+         patch('src.probe.subprocess.run') as mock_run:
+        mock_which.return_value = '/usr/bin/ffprobe'
+        mock_run.return_value = MagicMock(stdout=json.dumps(output).encode())
+
+        # Call function
+        info = read_metadata("input.mp4")
+
+    # Verify
+    assert (info['width'], info['height']) == (1920, 1080)
+    assert info['fps'] == pytest.approx(29.97, abs=0.01)
+    assert info['frame_count'] == 300
+    assert info['duration'] == pytest.approx(10.01)
+
+def test_probe_is_read_once(index, video):
+    """Test that repeated probes do not reopen the file."""
+    with patch('src.probe.read_metadata', wraps=read_metadata) as mock_read:
+        # Call function
+        first = index.probe(video)
+        second = index.probe(video)
+
+    # Verify
+    assert first == second
+    assert mock_read.call_count == 1
+
+def test_probe_persists(temp_dir, video):
+    """Test that the index survives reopening."""
+    db_path = str(Path(temp_dir) / 'probe.db')
+    index = ProbeIndex(db_path)
+    info = index.probe(video)
+    index.close()
+
+    reopened = ProbeIndex(db_path)
+    with patch('src.probe.read_metadata') as mock_read:
+        assert reopened.probe(video) == info
+        mock_read.assert_not_called()
+    reopened.close()
+
+def test_changed_file_is_probed_again(index, video):
+    """Test that a different size or mtime invalidates the entry."""
+    index.probe(video)
+
+    Path(video).write_bytes(b"not a video any more")
+    with patch('src.probe.read_metadata') as mock_read:
+        mock_read.return_value = None
+
+        # Verify
+        assert index.probe(video) is None
+        mock_read.assert_called_once()
+
+def test_probe_many_skips_unreadable(index, video, temp_dir):
+    """Test probing several files at once."""
+    missing = str(Path(temp_dir) / 'missing.mp4')
+
+    # Call function
+    results = index.probe_many([video, missing])
+
+    # Verify
+    assert list(results) == [video]
@@ -0,0 +1,66 @@
+import pytest
+from pathlib import Path
+import shutil
+import cv2
+import numpy as np
+from src.proxy_reader import read_proxies_ffmpeg, read_proxies_opencv, frames_from_raw
+
+@pytest.fixture
+def video_path(temp_dir):
+    """Write a 20-frame video whose brightness encodes the frame number."""
+    path = str(Path(temp_dir) / 'ramp.avi')
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10.0, (128, 72))
+    for index in range(20):
+        out.write(np.full((72, 128, 3), index * 10, dtype=np.uint8))
+    out.release()
+    return path
+
+def test_read_proxies_opencv_grabs_between_samples(video_path):
+    """Test sampling every fifth frame by decoding through the video."""
+    # Call function
+    proxies, indices = read_proxies_opencv(video_path, (32, 18), range(0, 20, 5))
+    
+    # Verify
+    assert proxies.shape == (4, 18, 32)
+    assert list(indices) == [0, 5, 10, 15]
+    assert np.allclose(proxies.mean(axis=(1, 2)), [0, 50, 100, 150], atol=4)
+
+def test_read_proxies_opencv_seeks(video_path):
+    """Test seeking to sparse samples, skipping frames past the end."""
+    # Call function
+    proxies, indices = read_proxies_opencv(video_path, (32, 18), [3, 12, 40], seek=True)
+    
+    # Verify
+    assert list(indices) == [3, 12]
+    assert np.allclose(proxies.mean(axis=(1, 2)), [30, 120], atol=4)
+
+def test_read_proxies_opencv_unreadable(temp_dir):
+    """Test that an unreadable file gives no proxies."""
+    # Call function
+    proxies, indices = read_proxies_opencv(str(Path(temp_dir) / 'missing.mp4'), (32, 18), [0, 1])
+    
+    # Verify
+    assert proxies.shape == (0, 18, 32)
+    assert len(indices) == 0
+
+@pytest.mark.skipif(shutil.which('ffmpeg') is None, reason="FFmpeg is not installed")
+def test_read_proxies_ffmpeg(video_path):
+    """Test sampling a range of the video at analysis_fps with FFmpeg."""
+    # Call function
+    proxies, times = read_proxies_ffmpeg(video_path, (32, 18), 2.0, start=0.5, duration=1.0)
+    
+    # Verify
+    assert proxies.shape[1:] == (18, 32)
+    assert len(proxies) == len(times) == 2
+    assert list(times) == [0.0, 0.5]
+
+def test_frames_from_raw_drops_partial_frame():
+    """Test splitting raw greyscale output into proxies."""
+    data = bytes(range(6)) * 2 + b'\x01'
+    
+    # Call function
+    frames = frames_from_raw(data, (3, 2))
+    
+    # Verify
+    assert frames.shape == (2, 2, 3)
+    assert frames[1, 1, 2] == 5
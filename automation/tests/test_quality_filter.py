@@ -0,0 +1,123 @@
+import pytest
+import cv2
+import numpy as np
+from pathlib import Path
+from unittest.mock import patch
+from src.quality_filter import QualityFilter, score_frames
+
+@pytest.fixture
+def quality_filter(test_config, temp_dir):
+    """Create a QualityFilter with test thresholds."""
+    config = {
+        **test_config,
+        'state': {'probe_db_path': str(Path(temp_dir) / 'probe.db')},
+        'quality_filter': {'samples': 6, 'min_brightness': 16, 'min_sharpness': 20, 'min_motion': 1.0}
+    }
+    with patch('src.quality_filter.load_config') as mock_load:
+        mock_load.return_value = config
+        return QualityFilter()
+
+def write_video(path, frames):
+    """Write frames to an MJPG test video."""
+    height, width = frames[0].shape[:2]
+    out = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), 10.0, (width, height))
+    for frame in frames:
+        out.write(frame)
+    out.release()
+    return str(path)
+
+def textured_frames(count, moving=True):
+    """Create detailed frames, shifted every frame when moving."""
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 256, (120, 200, 3), dtype=np.uint8)
+    return [np.roll(base, index * 4 if moving else 0, axis=1) for index in range(count)]
+
+def test_score_frames():
+    """Test the brightness, sharpness and motion scores on synthetic proxies."""
+    flat = np.full((3, 20, 20), 100, dtype=np.uint8)
+    scores = score_frames(flat)
+
+    # Verify
+    assert scores['brightness'] == pytest.approx(100)
+    assert scores['sharpness'] == 0
+    assert scores['motion'] == 0
+
+    checker = np.indices((20, 20)).sum(axis=0) % 2 * 255
+    changing = np.stack([checker, 255 - checker]).astype(np.uint8)
+    scores = score_frames(changing)
+    assert scores['sharpness'] > 1000
+    assert scores['motion'] == pytest.approx(255)
+
+@pytest.mark.asyncio
+async def test_good_clip_passes(quality_filter, temp_dir):
+    """Test that a bright, detailed, moving clip passes."""
+    video = write_video(Path(temp_dir) / 'good.avi', textured_frames(30))
+
+    # Call function
+    report = await quality_filter.check_video(video)
+
+    # Verify
+    assert report['passed']
+    assert report['reasons'] == []
+
+@pytest.mark.asyncio
+async def test_black_clip_is_rejected(quality_filter, temp_dir):
+    """Test rejecting a black clip."""
+    frames = [np.zeros((120, 200, 3), dtype=np.uint8) for _ in range(30)]
+    video = write_video(Path(temp_dir) / 'black.avi', frames)
+
+    # Call function
+    report = await quality_filter.check_video(video)
+
+    # Verify
+    assert not report['passed']
+    assert any(reason.startswith('too dark') for reason in report['reasons'])
+
+@pytest.mark.asyncio
+async def test_frozen_clip_is_rejected(quality_filter, temp_dir):
+    """Test rejecting a clip whose frames never change."""
+    video = write_video(Path(temp_dir) / 'frozen.avi', textured_frames(30, moving=False))
+
+    # Call function
+    report = await quality_filter.check_video(video)
+
+    # Verify
+    assert not report['passed']
+    assert any(reason.startswith('static') for reason in report['reasons'])
+
+@pytest.mark.asyncio
+async def test_blurry_clip_is_rejected(quality_filter, temp_dir):
+    """Test rejecting a heavily blurred clip."""
+    frames = [cv2.GaussianBlur(frame, (0, 0), 8) for frame in textured_frames(30)]
+    video = write_video(Path(temp_dir) / 'blurry.avi', frames)
+
+    # Call function
+    report = await quality_filter.check_video(video)
+
+    # Verify
+    assert not report['passed']
+    assert any(reason.startswith('blurry') for reason in report['reasons'])
+
+@pytest.mark.asyncio
+async def test_unreadable_clip_is_rejected(quality_filter, temp_dir):
+    """Test rejecting a file that is not a video."""
+    path = Path(temp_dir) / 'broken.mp4'
+    path.write_bytes(b"not a video")
+
+    # Call function
+    report = await quality_filter.check_video(str(path))
+
+    # Verify
+    assert not report['passed']
+    assert report['reasons'] == ['unreadable']
+
+@pytest.mark.asyncio
+async def test_disabled_filter_passes_everything(quality_filter):
+    """Test turning the filter off."""
+    quality_filter.settings = {'enabled': False}
+
+    # Call function
+    report = await quality_filter.check_video("missing.mp4")
+
+    # Verify
+    assert report['passed']
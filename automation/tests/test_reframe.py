@@ -0,0 +1,94 @@
+import pytest
+import numpy as np
+from pathlib import Path
+from unittest.mock import patch
+from src.reframe import CropPlan, crop_size, plan_reframe
+
+def square_proxies(positions, background=0):
+    """Create 90x160 proxies with a flickering square at the given x positions."""
+    frames = np.full((len(positions), 90, 160), background, dtype=np.uint8)
+    for index, x in enumerate(positions):
+        frames[index, 30:60, x:x + 30] = 255 if index % 2 else 200
+    return frames
+
+def test_crop_size_landscape_and_portrait():
+    """Test that the crop window has the target aspect ratio and even sides."""
+    assert crop_size(1920, 1080, 1080, 1920) == (608, 1080)
+    assert crop_size(1080, 1920, 1080, 1920) == (1080, 1920)
+    assert crop_size(1080, 1080, 1920, 1080) == (1080, 608)
+
+def test_static_plan():
+    """Test a crop window that does not move."""
+    plan = CropPlan.static(606, 1080, 657, 0)
+
+    # Verify
+    assert plan.offset(0) == (657, 0)
+    assert plan.offset(5000) == (657, 0)
+    assert plan.crop(np.zeros((1080, 1920, 3), dtype=np.uint8), 10).shape == (1080, 606, 3)
+
+def test_plan_offset_interpolates():
+    """Test that offsets are interpolated between samples."""
+    plan = CropPlan(606, 1080, 300, 30.0, np.array([0.0, 1.0]), np.array([0, 300]))
+
+    # Verify
+    assert plan.offset(300) == (0, 0)
+    assert plan.offset(315) == (150, 0)
+    assert plan.offset(400) == (300, 0)
+
+def test_plan_follows_subject():
+    """Test that the crop window moves to where the action is."""
+    frames = square_proxies([120] * 20)
+
+    with patch('src.reframe._read_proxies') as mock_read:
+        mock_read.return_value = frames
+
+        # Call function
+        plan = plan_reframe("input.mp4", 1280, 720, 25.0, 0, 100, 1080, 1920)
+
+    # Verify
+    assert (plan.crop_width, plan.crop_height) == (404, 720)
+    x, _ = plan.offset(50)
+    assert 120 * 8 - 404 <= x <= 1280 - 404
+
+def test_plan_jumps_at_cuts():
+    """Test that the crop window cuts with the shot instead of panning."""
+    frames = np.concatenate([
+        square_proxies([0] * 10),
+        square_proxies([120] * 10, background=100)
+    ])
+
+    with patch('src.reframe._read_proxies') as mock_read:
+        mock_read.return_value = frames
+
+        # Call function
+        plan = plan_reframe("input.mp4", 1280, 720, 25.0, 0, 100, 1080, 1920, analysis_fps=5.0)
+
+    # Verify: positions on either side of the cut (at 2.0s) differ by a jump, not a pan
+    before, _ = plan.offset(49)
+    after, _ = plan.offset(50)
+    assert after - before > 400
+
+def test_plan_without_proxies_is_centered():
+    """Test falling back to a centered crop when nothing could be decoded."""
+    with patch('src.reframe._read_proxies') as mock_read:
+        mock_read.return_value = np.empty((0, 90, 160), dtype=np.uint8)
+
+        # Call function
+        plan = plan_reframe("input.mp4", 1280, 720, 25.0, 0, 100, 1080, 1920)
+
+    # Verify
+    assert plan.offset(0) == ((1280 - 404) // 2, 0)
+
+def test_write_sendcmd(temp_dir):
+    """Test that the sendcmd script only lists offset changes."""
+    plan = CropPlan(404, 720, 0, 10.0, np.array([0.0, 0.5, 1.0]), np.array([0, 0, 100]))
+    path = Path(temp_dir) / 'crop.cmd'
+
+    # Call function
+    plan.write_sendcmd(str(path), 11)
+
+    # Verify
+    lines = path.read_text().splitlines()
+    assert lines[0] == "0.0000 crop x 0;"
+    assert lines[-1] == "1.0000 crop x 100;"
+    assert len(lines) == 6
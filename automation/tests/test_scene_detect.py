@@ -0,0 +1,113 @@
+import pytest
+import cv2
+import numpy as np
+from pathlib import Path
+from unittest.mock import patch
+from src.scene_detect import SceneDetector, find_scenes, highlight_start, score_changes
+
+def shot(value, count, moving=False):
+    """Create count proxies of one shot, optionally with an edge sweeping across it."""
+    frames = np.full((count, 36, 64), value, dtype=np.uint8)
+    if moving:
+        for index in range(count):
+            frames[index, :, :index * 64 // count] = 255 - value
+    return frames
+
+def test_score_changes():
+    """Test the histogram distance and mean difference of consecutive proxies."""
+    proxies = np.concatenate([shot(20, 2), shot(220, 1)])
+
+    # Call function
+    histogram, difference = score_changes(proxies)
+
+    # Verify
+    assert histogram.tolist() == [0.0, 0.0, 1.0]
+    assert difference.tolist() == [0.0, 0.0, 200.0]
+
+def test_find_scenes():
+    """Test splitting proxies at cuts and scoring the activity inside each scene."""
+    proxies = np.concatenate([shot(20, 4), shot(220, 6, moving=True), shot(120, 4)])
+    times = np.arange(len(proxies)) / 2.0
+
+    # Call function
+    scenes = find_scenes(proxies, times, 7.5)
+
+    # Verify
+    assert [(scene['start'], scene['end']) for scene in scenes] == [(0.0, 2.0), (2.0, 5.0), (5.0, 7.5)]
+    assert scenes[1]['score'] > scenes[0]['score'] == scenes[2]['score'] == 0.0
+
+def test_gradual_motion_is_not_a_cut():
+    """Test that motion inside a shot does not split it."""
+    proxies = shot(40, 10, moving=True)
+
+    # Call function
+    scenes = find_scenes(proxies, np.arange(10) / 2.0, 5.0)
+
+    # Verify
+    assert len(scenes) == 1
+
+def test_highlight_start():
+    """Test choosing the window over the most active scenes."""
+    scenes = [
+        {'start': 0.0, 'end': 30.0, 'score': 1.0},
+        {'start': 30.0, 'end': 50.0, 'score': 10.0},
+        {'start': 50.0, 'end': 100.0, 'score': 2.0},
+        {'start': 100.0, 'end': 120.0, 'score': 9.0}
+    ]
+
+    # Verify
+    assert highlight_start(scenes, 120.0, 20.0) == 30.0
+    assert highlight_start(scenes, 120.0, 60.0) == 30.0
+    assert highlight_start([{'start': 0.0, 'end': 120.0, 'score': 0.0}], 120.0, 60.0) == 0.0
+    assert highlight_start(scenes, 50.0, 60.0) == 0.0
+
+def test_highlight_window_can_end_with_the_video():
+    """Test that a window starting at a late cut is moved back to fit."""
+    scenes = [
+        {'start': 0.0, 'end': 110.0, 'score': 1.0},
+        {'start': 110.0, 'end': 120.0, 'score': 10.0}
+    ]
+
+    # Verify
+    assert highlight_start(scenes, 120.0, 30.0) == 90.0
+
+def test_detect_prefers_dense_keyframes():
+    """Test decoding only keyframes when they are close enough together."""
+    detector = SceneDetector(keyframe_gap=3.0)
+    decoded = {'keyframes': (shot(20, 6), np.arange(6) * 2.0), 'sampled': (shot(20, 6), np.arange(6) / 2.0)}
+
+    with patch('src.scene_detect.shutil.which') as mock_which, \
+         patch('src.scene_detect.read_proxies_ffmpeg') as mock_read:
+        mock_which.return_value = '/usr/bin/ffmpeg'
+        mock_read.side_effect = lambda *args, **kwargs: decoded['keyframes' if kwargs.get('keyframes') else 'sampled']
+
+        # Call function
+        detector.detect("input.mp4", 30.0, 360)
+        assert mock_read.call_count == 1
+
+        # Keyframes 10 seconds apart are too coarse
+        decoded['keyframes'] = (shot(20, 2), np.array([0.0, 10.0]))
+        detector.detect("input.mp4", 30.0, 360)
+
+    # Verify
+    assert mock_read.call_count == 3
+    mock_read.assert_called_with("input.mp4", (64, 36), 2.0, fast=True)
+
+def test_detect_with_opencv(temp_dir):
+    """Test finding the cuts of a real video without FFmpeg, best scene first."""
+    path = str(Path(temp_dir) / 'cuts.avi')
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10.0, (128, 72))
+    for value, moving in ((30, False), (220, True), (120, False)):
+        for frame in shot(value, 30, moving):
+            out.write(cv2.cvtColor(cv2.resize(frame, (128, 72)), cv2.COLOR_GRAY2BGR))
+    out.release()
+
+    with patch('src.scene_detect.shutil.which') as mock_which:
+        mock_which.return_value = None
+
+        # Call function
+        scenes = SceneDetector(analysis_fps=5.0).detect(path, 10.0, 90)
+
+    # Verify
+    assert sorted(scene['start'] for scene in scenes) == [0.0, 3.0, 6.0]
+    assert scenes[0]['start'] == 3.0
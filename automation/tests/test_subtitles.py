@@ -0,0 +1,115 @@
+import pytest
+import numpy as np
+from pathlib import Path
+from unittest.mock import patch
+from src.subtitles import SubtitleTrack, parse_srt, wrap_text
+from src.overlay import render_text_sprite
+
+SEGMENTS = [
+    {'start': 1.0, 'end': 2.5, 'text': ' First line '},
+    {'start': 3.0, 'end': 4.0, 'text': 'Second line'},
+    {'start': 4.0, 'end': 4.0, 'text': 'Empty span'},
+    {'start': 5.0, 'end': 6.0, 'text': '   '}
+]
+
+def test_parse_srt(temp_dir):
+    """Test reading the segments of an SRT file."""
+    path = Path(temp_dir) / 'clip.srt'
+    path.write_text(
+        "1\n00:00:01,500 --> 00:00:03,250\nHello\nworld\n\n"
+        "2\n01:02:03,004 --> 01:02:04,000\nBye\n\n",
+        encoding='utf-8'
+    )
+
+    # Call function
+    segments = parse_srt(str(path))
+
+    # Verify
+    assert segments == [
+        {'start': 1.5, 'end': 3.25, 'text': 'Hello world'},
+        {'start': 3723.004, 'end': 3724.0, 'text': 'Bye'}
+    ]
+
+def test_segment_at_skips_empty_segments():
+    """Test looking up the segment on screen, ignoring blank or zero-length ones."""
+    track = SubtitleTrack(SEGMENTS)
+
+    # Verify
+    assert [segment['text'] for segment in track.segments] == ['First line', 'Second line']
+    assert track.segment_at(0.5) is None
+    assert track.segment_at(1.0) == 0
+    assert track.segment_at(2.6) is None
+    assert track.segment_at(3.5) == 1
+    assert track.segment_at(4.0) is None
+
+def test_sprites_are_rendered_once_per_segment():
+    """Test that a segment is rasterized once, however many frames show it."""
+    track = SubtitleTrack(SEGMENTS)
+    frame = np.zeros((640, 360, 3), dtype=np.uint8)
+
+    with patch('src.subtitles.render_text_sprite', wraps=render_text_sprite) as mock_render:
+        # Call function
+        for index in range(30):
+            track.apply(frame, 1.0 + index / 30)
+
+    # Verify
+    assert mock_render.call_count == 1
+    assert frame.any()
+
+def test_apply_draws_centered_above_margin():
+    """Test that text is drawn centered, above the bottom margin, and only while its segment is on screen."""
+    track = SubtitleTrack(SEGMENTS, bottom_margin=0.25)
+    frame = np.zeros((640, 360, 3), dtype=np.uint8)
+
+    # Call function
+    track.apply(frame, 0.5)
+    assert not frame.any()
+    track.apply(frame, 1.5)
+
+    # Verify
+    rows, cols = np.nonzero(frame.any(axis=2))
+    assert rows.max() < 480
+    assert abs((cols.min() + cols.max()) / 2 - 180) <= 2
+
+def test_wrap_text():
+    """Test greedy word wrapping."""
+    lines = wrap_text("one two three four five six seven eight", 1.0, 2, 200)
+
+    # Verify
+    assert len(lines) > 1
+    assert ' '.join(lines) == "one two three four five six seven eight"
+
+def test_long_segments_wrap_to_frame_width():
+    """Test that a long segment is split over several lines that fit the frame."""
+    track = SubtitleTrack([{'start': 0.0, 'end': 1.0, 'text': 'word ' * 30}], max_width=0.9)
+
+    # Call function
+    sprite = track.sprite(0, 360)
+
+    # Verify
+    assert sprite.width <= 360
+    assert sprite.height > track.sprite(0, 1080).height / 3
+
+def test_write_ffconcat(temp_dir):
+    """Test the image sequence for the kept window of a video."""
+    track = SubtitleTrack(SEGMENTS)
+
+    # Call function
+    script, band_y = track.write_ffconcat(temp_dir, 360, 640, start_time=2.0, duration=10.0)
+
+    # Verify
+    lines = Path(script).read_text().splitlines()
+    durations = [float(line.split()[1]) for line in lines if line.startswith('duration')]
+    assert lines[0] == 'ffconcat version 1.0'
+    assert durations[:3] == [0.5, 0.5, 1.0]
+    assert 'subtitle_0000.png' in lines[1]
+    assert 'subtitle_0001.png' in lines[5]
+    assert lines[-1].endswith("subtitle_blank.png'")
+    assert 0 < band_y < 640 - 128
+
+def test_write_ffconcat_outside_window(temp_dir):
+    """Test that a window without speech produces no sequence."""
+    track = SubtitleTrack(SEGMENTS)
+
+    # Verify
+    assert track.write_ffconcat(temp_dir, 360, 640, start_time=10.0) is None
@@ -0,0 +1,102 @@
+import pytest
+import numpy as np
+from pathlib import Path
+from src.artifact_cache import ArtifactCache
+from src.audio import SAMPLE_RATE, fingerprint
+from src.transcript_store import TranscriptStore, digest
+
+PARAMS = {'backend': 'whisper', 'model': 'base'}
+TRANSCRIPT = {'text': ' Hi', 'segments': [{'start': 0.0, 'end': 1.0, 'text': ' Hi'}]}
+
+@pytest.fixture
+def cache(temp_dir):
+    """Create an ArtifactCache in a temporary directory."""
+    return ArtifactCache(str(Path(temp_dir) / 'cache'))
+
+@pytest.fixture
+def audio_fingerprint():
+    """A random minute-long fingerprint."""
+    return np.random.default_rng(0).integers(0, 2 ** 32, 940, dtype=np.uint32)
+
+def flip_bits(values: np.ndarray, fraction: float) -> np.ndarray:
+    """Flip a fraction of the bits, like a re-encode does."""
+    rng = np.random.default_rng(1)
+    bits = np.unpackbits(values.view(np.uint8))
+    flips = rng.random(len(bits)) < fraction
+    return np.packbits(bits ^ flips).view(np.uint32)
+
+def test_exact_hit(cache, audio_fingerprint):
+    """Test that the same fingerprint finds its transcript and is counted."""
+    store = TranscriptStore(cache, PARAMS)
+
+    # Call function
+    assert store.lookup(audio_fingerprint, 60.2) is None
+    store.store(audio_fingerprint, 60.2, TRANSCRIPT)
+
+    # Verify
+    assert store.lookup(audio_fingerprint, 60.2) == TRANSCRIPT
+    assert store.stats == {'hits': 1, 'misses': 1}
+
+def test_similar_audio_hits(cache, audio_fingerprint):
+    """Test that a re-encoded copy, slightly different in length, matches."""
+    store = TranscriptStore(cache, PARAMS)
+    store.store(audio_fingerprint, 60.9, TRANSCRIPT)
+
+    # Call function
+    result = store.lookup(flip_bits(audio_fingerprint, 0.08), 61.1)
+
+    # Verify
+    assert result == TRANSCRIPT
+    assert store.lookup(flip_bits(audio_fingerprint, 0.4), 60.9) is None
+    assert store.lookup(flip_bits(audio_fingerprint, 0.08), 75.0) is None
+
+def tone(frequency: float, seconds: float, padding: float) -> np.ndarray:
+    """A tone followed by digital silence."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    sound = (0.3 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+    return np.concatenate([sound, np.zeros(int(padding * SAMPLE_RATE), dtype=np.float32)])
+
+def test_silence_does_not_match(cache):
+    """Test that different sounds padded with the same silence are not taken for each other."""
+    store = TranscriptStore(cache, PARAMS)
+    store.store(fingerprint(tone(440, 6, 60)), 66.0, TRANSCRIPT)
+    store.store(fingerprint(tone(440, 1, 65)), 66.0, TRANSCRIPT)
+
+    # Call function
+    different = store.lookup(fingerprint(tone(1000, 6, 60)), 66.0)
+    short = store.lookup(fingerprint(tone(440, 1, 65) * 0.9), 66.0)
+
+    # Verify
+    assert different is None
+    assert short is None
+    assert store.lookup(fingerprint(tone(440, 1, 65)), 66.0) == TRANSCRIPT
+
+def test_other_model_misses(cache, audio_fingerprint):
+    """Test that transcripts are only shared by the same model and settings."""
+    TranscriptStore(cache, PARAMS).store(audio_fingerprint, 60.0, TRANSCRIPT)
+
+    # Verify
+    other = TranscriptStore(cache, {**PARAMS, 'model': 'small'})
+    assert other.lookup(audio_fingerprint, 60.0) is None
+    assert other.stats == {'hits': 0, 'misses': 1}
+
+def test_evicted_transcript_is_skipped(cache, audio_fingerprint):
+    """Test that an index entry whose transcript was evicted is a miss."""
+    store = TranscriptStore(cache, PARAMS)
+    store.store(audio_fingerprint, 60.0, TRANSCRIPT)
+    cache._entry_path(store._transcript_key(digest(audio_fingerprint))).unlink()
+
+    # Verify
+    assert store.lookup(flip_bits(audio_fingerprint, 0.05), 60.0) is None
+
+def test_index_is_bounded(cache):
+    """Test that the oldest fingerprints are dropped from a full index."""
+    store = TranscriptStore(cache, PARAMS, index_limit=3)
+    for seed in range(5):
+        store.store(np.full(10, seed, dtype=np.uint32), 30.0, TRANSCRIPT)
+
+    # Verify
+    entries = cache.get_json(store._index_key(30))
+    assert [entry['digest'] for entry in entries] == [
+        digest(np.full(10, seed, dtype=np.uint32)) for seed in (2, 3, 4)
+    ]
@@ -0,0 +1,59 @@
+import pytest
+from pathlib import Path
+from src.transcript_writer import TranscriptWriter, format_timestamp
+
+SEGMENTS = [
+    {'start': 0.0, 'end': 2.5, 'text': ' Hello there.'},
+    {'start': 3661.25, 'end': 3662.0, 'text': ' Later on.'}
+]
+
+def test_writes_every_format(temp_dir):
+    """Test that segments end up in the text, SRT and WebVTT files."""
+    base = Path(temp_dir) / 'clip'
+
+    # Call function
+    with TranscriptWriter(str(base)) as writer:
+        for segment in SEGMENTS:
+            writer.write(segment)
+
+    # Verify
+    assert Path(temp_dir, 'clip.txt').read_text() == ' Hello there. Later on.'
+    assert Path(temp_dir, 'clip.srt').read_text() == (
+        "1\n00:00:00,000 --> 00:00:02,500\nHello there.\n\n"
+        "2\n01:01:01,250 --> 01:01:02,000\nLater on.\n\n"
+    )
+    assert Path(temp_dir, 'clip.vtt').read_text() == (
+        "WEBVTT\n\n"
+        "00:00:00.000 --> 00:00:02.500\nHello there.\n\n"
+        "01:01:01.250 --> 01:01:02.000\nLater on.\n\n"
+    )
+
+def test_segments_are_readable_while_writing(temp_dir):
+    """Test that each segment is flushed as soon as it is written."""
+    base = Path(temp_dir) / 'clip'
+
+    with TranscriptWriter(str(base)) as writer:
+        # Call function
+        writer.write(SEGMENTS[0])
+
+        # Verify
+        assert Path(temp_dir, 'clip.txt').read_text() == ' Hello there.'
+        assert 'Hello there.' in Path(temp_dir, 'clip.srt').read_text()
+
+def test_failed_transcript_is_removed(temp_dir):
+    """Test that partial files are deleted when transcription fails."""
+    base = Path(temp_dir) / 'clip'
+
+    # Call function
+    with pytest.raises(RuntimeError):
+        with TranscriptWriter(str(base)) as writer:
+            writer.write(SEGMENTS[0])
+            raise RuntimeError("chunk failed")
+
+    # Verify
+    assert not list(Path(temp_dir).iterdir())
+
+def test_format_timestamp():
+    """Test SRT and WebVTT timestamps."""
+    assert format_timestamp(75.5) == "00:01:15,500"
+    assert format_timestamp(75.5, '.') == "00:01:15.500"
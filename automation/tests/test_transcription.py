@@ -1,135 +1,322 @@
 import pytest
 import asyncio
+import threading
 from pathlib import Path
 import json
-from unittest.mock import patch, MagicMock
-from transcription import TranscriptionService
+import numpy as np
+from unittest.mock import patch
+from src.audio import SAMPLE_RATE
+from src.subtitles import parse_srt
+from src.transcript_writer import TranscriptWriter
+from src.transcription import TranscriptionService
 
-@pytest.fixture
-def test_config():
-    """Load test configuration."""
-    config_path = Path(__file__).parent / 'test_config.json'
-    with open(config_path, 'r') as f:
-        return json.load(f)
+def voiced(seconds: float) -> np.ndarray:
+    """Harmonic 'voice' whose loudness rises and falls like syllables (4 Hz)."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    voice = sum(np.sin(2 * np.pi * f * t) / k for k, f in enumerate((150, 300, 450), 1))
+    return (0.3 * voice * np.sin(2 * np.pi * 4 * t) ** 2).astype(np.float32)
+
+def silence(seconds: float) -> np.ndarray:
+    """Faint background noise."""
+    rng = np.random.default_rng(0)
+    return (0.0005 * rng.standard_normal(int(seconds * SAMPLE_RATE))).astype(np.float32)
+
+class StubPool:
+    """Stand-in for the worker pool: every range of audio it is sent becomes one segment."""
+
+    def __init__(self, *args, **kwargs):
+        self.detection = {'language': 'en', 'language_probability': 0.9, 'no_speech_prob': 0.1}
+        self.detect_calls = []
+        self.transcribe_calls = []
+        self.release = None
+        self.warmup_results = []
+        self.warmup_calls = 0
+
+    def start(self):
+        pass
+
+    async def warmup(self):
+        self.warmup_calls += 1
+        await asyncio.sleep(0)
+        result = self.warmup_results.pop(0) if self.warmup_results else True
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def detect(self, audio):
+        self.detect_calls.append(audio)
+        if isinstance(self.detection, Exception):
+            raise self.detection
+        return self.detection
+
+    async def transcribe(self, audio, options=None):
+        self.transcribe_calls.append((audio, options))
+
+        # Chunks after the first wait until the test lets them finish
+        if self.release is not None and audio[0].start > 0:
+            await self.release.wait()
+
+        # Timestamps are relative to the joined ranges, as the model's are
+        segments = []
+        offset = 0.0
+        for ref in audio:
+            length = len(ref.load()) / SAMPLE_RATE
+            segments.append({'start': offset, 'end': offset + length, 'text': f" at {ref.start / SAMPLE_RATE:.1f}"})
+            offset += length
+        return {'text': ''.join(s['text'] for s in segments), 'segments': segments, 'language': 'en'}
+
+    def close(self):
+        pass
 
 @pytest.fixture
-def transcriber(test_config):
-    """Create a TranscriptionService instance with test configuration."""
-    with patch('transcription.json.load') as mock_load, \
-         patch('transcription.whisper.load_model') as mock_model:
-        mock_load.return_value = test_config
-        mock_model.return_value = MagicMock()
-        return TranscriptionService()
+def transcriber(test_config, temp_dir):
+    """Create a TranscriptionService on a stub pool, with its cache and transcripts in a temp directory."""
+    config = {
+        **test_config,
+        'cache': {'dir': str(Path(temp_dir) / 'cache')},
+        'transcription': {'chunk_seconds': 4, 'chunk_overlap': 0.5}
+    }
+    with patch('src.transcription.load_config') as mock_load, \
+         patch('src.transcription.TranscriptionPool', StubPool):
+        mock_load.return_value = config
+        service = TranscriptionService()
+    service.subtitles_dir = Path(temp_dir)
+    return service
+
+def video_file(temp_dir: str, name: str) -> str:
+    """Create a stand-in video; its audio comes from the patched decoder."""
+    path = Path(temp_dir) / name
+    path.write_bytes(name.encode())
+    return str(path)
+
+def cached_audio(transcriber: TranscriptionService, pcm: np.ndarray):
+    """Put PCM in the service's audio store and return its reference."""
+    with patch('src.audio.decode_pcm', return_value=pcm):
+        return transcriber.audio.extract('clip.mp4', 'clip')
 
 @pytest.mark.asyncio
-async def test_transcribe_video(transcriber):
-    """Test transcribing a single video."""
-    with patch('transcription.TranscriptionService._run_transcription') as mock_transcribe, \
-         patch('transcription.TranscriptionService._save_srt') as mock_save:
-        # Configure mocks
-        mock_transcribe.return_value = {
-            "segments": [
-                {
-                    "start": 0.0,
-                    "end": 5.0,
-                    "text": "Test subtitle"
-                }
-            ]
-        }
-        
-        # Test video path
-        video_path = "test_video.mp4"
-        
+async def test_silent_audio_is_not_transcribed(transcriber, temp_dir):
+    """Test that audio without speech skips the model and leaves an empty transcript."""
+    with patch('src.audio.decode_pcm', return_value=silence(5)):
         # Call function
-        result = await transcriber.transcribe_video(video_path)
-        
-        # Verify
-        assert result is not None
-        mock_transcribe.assert_called_once_with(video_path)
-        mock_save.assert_called_once()
+        result = await transcriber.transcribe_video(video_file(temp_dir, 'quiet.mp4'))
+
+    # Verify
+    assert Path(result).read_text() == ''
+    metadata = json.loads(Path(result).with_suffix('.json').read_text())
+    assert metadata['probe']['decision'] == 'skip'
+    assert transcriber.pool.detect_calls == []
+    assert transcriber.pool.transcribe_calls == []
 
 @pytest.mark.asyncio
-async def test_run_transcription(transcriber):
-    """Test running the transcription process."""
-    with patch('transcription.asyncio.get_event_loop') as mock_loop:
-        # Configure mock
-        mock_executor = MagicMock()
-        mock_executor.return_value = {
-            "segments": [
-                {
-                    "start": 0.0,
-                    "end": 5.0,
-                    "text": "Test subtitle"
-                }
-            ]
-        }
-        mock_loop.return_value.run_in_executor.return_value = mock_executor
-        
-        # Test video path
-        video_path = "test_video.mp4"
-        
+async def test_chunks_are_stitched_in_order(transcriber, temp_dir):
+    """Test that speech is transcribed in chunks and put back on the video's timeline."""
+    pcm = np.concatenate([voiced(3), silence(1.5), voiced(3), silence(1.5), voiced(3)])
+
+    with patch('src.audio.decode_pcm', return_value=pcm):
         # Call function
-        result = await transcriber._run_transcription(video_path)
-        
-        # Verify
-        assert result is not None
-        assert "segments" in result
-        mock_loop.return_value.run_in_executor.assert_called_once()
+        result = await transcriber.transcribe_video(video_file(temp_dir, 'talk.mp4'))
+
+    # Verify
+    assert len(transcriber.pool.transcribe_calls) == 3
+    segments = parse_srt(str(Path(result).with_suffix('.srt')))
+    assert len(segments) == 3
+    for segment, start in zip(segments, (0.0, 4.5, 9.0)):
+        assert segment['start'] == pytest.approx(start, abs=0.4)
+        assert segment['text'] == f"at {segment['start']:.1f}"
+    assert all(a['end'] <= b['start'] for a, b in zip(segments, segments[1:]))
+    assert Path(result).with_suffix('.vtt').read_text().startswith("WEBVTT\n\n")
 
 @pytest.mark.asyncio
-async def test_save_srt(transcriber):
-    """Test saving transcription results in SRT format."""
-    with patch('builtins.open', create=True) as mock_open:
-        # Test data
-        result = {
-            "segments": [
-                {
-                    "start": 0.0,
-                    "end": 5.0,
-                    "text": "Test subtitle"
-                }
-            ]
-        }
-        output_path = Path("test.srt")
-        
+async def test_segments_are_written_as_they_arrive(transcriber, temp_dir):
+    """Test that the first chunk is on disk while later chunks are still transcribing."""
+    pcm = np.concatenate([voiced(3), silence(1.5), voiced(3)])
+    transcriber.pool.release = asyncio.Event()
+
+    with patch('src.audio.decode_pcm', return_value=pcm):
         # Call function
-        await transcriber._save_srt(result, output_path)
-        
+        task = asyncio.ensure_future(transcriber.transcribe_video(video_file(temp_dir, 'talk.mp4')))
+
+        for _ in range(200):
+            written = [path.read_text() for path in Path(temp_dir).glob('talk-*.txt')]
+            if written and written[0]:
+                break
+            await asyncio.sleep(0.01)
+
         # Verify
-        mock_open.assert_called_once()
-        # Verify SRT format
-        mock_open.return_value.__enter__.return_value.write.assert_called()
+        assert written[0].count(' at ') == 1
+        assert not task.done()
+
+        transcriber.pool.release.set()
+        result = await task
+
+    assert Path(result).read_text().count(' at ') == 2
 
 @pytest.mark.asyncio
-async def test_transcribe_videos(transcriber):
-    """Test transcribing multiple videos."""
-    with patch('transcription.TranscriptionService.transcribe_video') as mock_transcribe:
-        # Configure mock
-        mock_transcribe.return_value = "test.srt"
-        
-        # Test video paths
-        video_paths = ["video1.mp4", "video2.mp4"]
-        
+async def test_transcript_files_are_written_off_the_event_loop(transcriber, temp_dir):
+    """Test that the transcript files are opened, written and closed on executor threads."""
+    threads = []
+    methods = {name: getattr(TranscriptWriter, name) for name in ('__init__', 'write', 'close')}
+
+    def recording(name):
+        def method(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return methods[name](*args, **kwargs)
+        return method
+
+    with patch('src.audio.decode_pcm', return_value=np.concatenate([voiced(3), silence(1.5), voiced(3)])), \
+         patch.multiple(TranscriptWriter, **{name: recording(name) for name in methods}):
         # Call function
-        results = await transcriber.transcribe_videos(video_paths)
-        
-        # Verify
-        assert len(results) == 2
-        assert mock_transcribe.call_count == 2
+        result = await transcriber.transcribe_video(video_file(temp_dir, 'talk.mp4'))
+
+    # Verify
+    assert Path(result).read_text().count(' at ') == 2
+    assert len(threads) == 4
+    assert threading.main_thread() not in threads
 
 @pytest.mark.asyncio
-async def test_transcribe_videos_error_handling(transcriber):
-    """Test error handling in transcribing multiple videos."""
-    with patch('transcription.TranscriptionService.transcribe_video') as mock_transcribe:
-        # Configure mock to simulate error
-        mock_transcribe.side_effect = Exception("Transcription error")
-        
-        # Test video paths
-        video_paths = ["video1.mp4", "video2.mp4"]
-        
+async def test_same_audio_is_transcribed_once(transcriber, temp_dir):
+    """Test that a second file with the same audio gets the cached transcript."""
+    pcm = np.concatenate([voiced(3), silence(1.5), voiced(3)])
+
+    with patch('src.audio.decode_pcm', return_value=pcm):
         # Call function
-        results = await transcriber.transcribe_videos(video_paths)
-        
-        # Verify
-        assert len(results) == 0
-        assert mock_transcribe.call_count == 2 
\ No newline at end of file
+        first = await transcriber.transcribe_video(video_file(temp_dir, 'original.mp4'))
+        second = await transcriber.transcribe_video(video_file(temp_dir, 'reupload.mp4'))
+
+    # Verify
+    assert len(transcriber.pool.transcribe_calls) == 2
+    assert transcriber.transcripts.stats == {'hits': 1, 'misses': 1}
+    assert Path(second).read_text() == Path(first).read_text()
+    assert Path(second).with_suffix('.srt').read_text() == Path(first).with_suffix('.srt').read_text()
+
+@pytest.mark.asyncio
+async def test_known_checksum_is_not_recomputed(transcriber, temp_dir):
+    """Test that a checksum passed in by the caller is used instead of hashing the video again."""
+    with patch('src.audio.decode_pcm', return_value=np.concatenate([voiced(3), silence(1)])), \
+         patch('src.transcription.file_checksum') as mock_checksum:
+        # Call function
+        result = await transcriber.transcribe_video(video_file(temp_dir, 'talk.mp4'), 'abcdef0123456789')
+
+    # Verify
+    mock_checksum.assert_not_called()
+    assert Path(result).name == 'talk-abcdef01.txt'
+
+@pytest.mark.asyncio
+async def test_transcribe_videos_error_handling(transcriber, temp_dir):
+    """Test that videos that fail are left out of the results."""
+    with patch('src.audio.decode_pcm', side_effect=IOError("no audio stream")):
+        # Call function
+        results = await transcriber.transcribe_videos([
+            video_file(temp_dir, 'one.mp4'), video_file(temp_dir, 'two.mp4')
+        ])
+
+    # Verify
+    assert results == []
+    assert not list(Path(temp_dir).glob('*.txt'))
+
+@pytest.mark.asyncio
+async def test_probe_skips_when_model_hears_no_speech(transcriber, temp_dir):
+    """Test that a probe above no_speech_threshold skips transcription."""
+    transcriber.pool.detection = {'language': 'en', 'language_probability': 0.9, 'no_speech_prob': 0.8}
+
+    with patch('src.audio.decode_pcm', return_value=np.concatenate([voiced(3), silence(1)])):
+        # Call function
+        result = await transcriber.transcribe_video(video_file(temp_dir, 'music.mp4'))
+
+    # Verify
+    probe = json.loads(Path(result).with_suffix('.json').read_text())['probe']
+    assert probe['decision'] == 'skip'
+    assert probe['reason'] == 'no_speech_prob above threshold'
+    assert len(transcriber.pool.detect_calls) == 1
+    assert transcriber.pool.transcribe_calls == []
+
+@pytest.mark.asyncio
+async def test_probe_forces_confident_language(transcriber):
+    """Test that a confidently detected language is forced on the transcription, and a doubtful one is not."""
+    audio = cached_audio(transcriber, voiced(3))
+
+    # Call function
+    confident = await transcriber._probe(audio, [(0, 3 * SAMPLE_RATE)])
+    transcriber.pool.detection = {'language': 'de', 'language_probability': 0.3, 'no_speech_prob': 0.1}
+    doubtful = await transcriber._probe(audio, [(0, 3 * SAMPLE_RATE)])
+
+    # Verify
+    assert confident['decision'] == doubtful['decision'] == 'transcribe'
+    assert confident['language'] == 'en' and confident['forced']
+    assert doubtful['language'] == 'de' and not doubtful['forced']
+
+@pytest.mark.asyncio
+async def test_probe_uses_configured_language(transcriber):
+    """Test that a configured language overrides the detected one."""
+    transcriber.language = 'fr'
+    transcriber.pool.detection = {'language': 'de', 'language_probability': 0.3, 'no_speech_prob': 0.1}
+    audio = cached_audio(transcriber, voiced(3))
+
+    # Call function
+    probe = await transcriber._probe(audio, [(0, 3 * SAMPLE_RATE)])
+
+    # Verify
+    assert probe['language'] == 'fr'
+    assert probe['forced']
+
+@pytest.mark.asyncio
+async def test_failed_probe_still_transcribes(transcriber, temp_dir):
+    """Test that transcription goes ahead when the probe fails."""
+    transcriber.pool.detection = RuntimeError("worker died")
+
+    with patch('src.audio.decode_pcm', return_value=np.concatenate([voiced(3), silence(1)])):
+        # Call function
+        result = await transcriber.transcribe_video(video_file(temp_dir, 'talk.mp4'))
+
+    # Verify
+    probe = json.loads(Path(result).with_suffix('.json').read_text())['probe']
+    assert probe['reason'] == 'probe failed'
+    assert len(transcriber.pool.transcribe_calls) == 1
+    assert transcriber.pool.transcribe_calls[0][1] == {}
+    assert Path(result).read_text() != ''
+
+@pytest.mark.asyncio
+async def test_probe_reads_first_probe_seconds_of_speech(transcriber):
+    """Test that the probe is sent only the start of the speech, across regions."""
+    transcriber.probe_seconds = 2
+    audio = cached_audio(transcriber, voiced(6))
+    regions = [(0, SAMPLE_RATE), (2 * SAMPLE_RATE, 5 * SAMPLE_RATE)]
+
+    # Call function
+    await transcriber._probe(audio, regions)
+
+    # Verify
+    refs = transcriber.pool.detect_calls[0]
+    assert [(ref.start, ref.end) for ref in refs] == [(0, SAMPLE_RATE), (2 * SAMPLE_RATE, 3 * SAMPLE_RATE)]
+
+@pytest.mark.asyncio
+async def test_warmup_is_shared_and_lazy(transcriber, temp_dir):
+    """Test that the model load is only awaited by model work, once for every caller."""
+    # Verify construction did not wait for the workers
+    assert transcriber.pool.warmup_calls == 0
+
+    # Call function
+    ready = await asyncio.gather(transcriber.warmup(), transcriber.warmup())
+    with patch('src.audio.decode_pcm', return_value=np.concatenate([voiced(3), silence(1)])):
+        await transcriber.transcribe_video(video_file(temp_dir, 'talk.mp4'))
+
+    # Verify
+    assert ready == [True, True]
+    assert transcriber.pool.warmup_calls == 1
+
+@pytest.mark.asyncio
+async def test_failed_warmup_is_retried(transcriber):
+    """Test that a readiness check that failed or raised is run again by the next caller."""
+    transcriber.pool.warmup_results = [RuntimeError("spawn failed"), False, True]
+
+    # Call function
+    with pytest.raises(RuntimeError):
+        await transcriber.warmup()
+    unhealthy = await transcriber.warmup()
+    healthy = await transcriber.warmup()
+    again = await transcriber.warmup()
+
+    # Verify
+    assert (unhealthy, healthy, again) == (False, True, True)
+    assert transcriber.pool.warmup_calls == 3
@@ -0,0 +1,111 @@
+import pytest
+import numpy as np
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+from src.transcription_backends import (
+    create_backend, TranscriptionBackend, WhisperBackend, FasterWhisperBackend
+)
+
+def test_create_backend():
+    """Test choosing a backend by name."""
+    # Verify
+    assert isinstance(create_backend('whisper', 'base'), WhisperBackend)
+    backend = create_backend('faster-whisper', 'small', threads=2)
+    assert isinstance(backend, FasterWhisperBackend)
+    assert backend.compute_type == 'int8'
+    assert backend.identity == {'backend': 'faster-whisper', 'model': 'small', 'compute_type': 'int8'}
+    with pytest.raises(ValueError):
+        create_backend('wav2vec', 'base')
+
+def test_whisper_backend_ignores_compute_type():
+    """Test that openai-whisper does not claim a precision it cannot run at."""
+    backend = create_backend('whisper', 'base', compute_type='int8')
+
+    # Verify
+    assert backend.compute_type is None
+    assert backend.identity == {'backend': 'whisper', 'model': 'base', 'compute_type': None}
+    with pytest.raises(TypeError):
+        TranscriptionBackend('base')
+
+def test_whisper_backend():
+    """Test loading and running openai-whisper on the CPU."""
+    backend = WhisperBackend('base', 'cpu', threads=2)
+    model = MagicMock()
+    model.transcribe.return_value = {'text': ' hi', 'segments': [], 'language': 'en'}
+
+    with patch('whisper.load_model', return_value=model) as mock_load, \
+         patch('torch.set_num_threads') as mock_threads:
+        # Call function
+        backend.load()
+        result = backend.transcribe(np.zeros(16000, dtype=np.float32), {'language': 'en'})
+
+    # Verify
+    mock_threads.assert_called_once_with(2)
+    mock_load.assert_called_once_with('base', device='cpu')
+    assert model.transcribe.call_args[1] == {'fp16': False, 'language': 'en'}
+    assert result['text'] == ' hi'
+
+def test_faster_whisper_backend():
+    """Test loading and running faster-whisper with int8 weights."""
+    model = MagicMock()
+    model.transcribe.return_value = (
+        iter([
+            SimpleNamespace(start=0.0, end=1.5, text=' Hello'),
+            SimpleNamespace(start=1.5, end=2.0, text=' there')
+        ]),
+        SimpleNamespace(language='en')
+    )
+    module = MagicMock()
+    module.WhisperModel.return_value = model
+    backend = FasterWhisperBackend('base', 'cpu', threads=4)
+
+    with patch.dict('sys.modules', {'faster_whisper': module}):
+        # Call function
+        backend.load()
+        result = backend.transcribe(np.zeros(16000, dtype=np.float64), {})
+
+    # Verify
+    module.WhisperModel.assert_called_once_with(
+        'base', device='cpu', compute_type='int8', cpu_threads=4
+    )
+    assert model.transcribe.call_args[0][0].dtype == np.float32
+    assert result == {
+        'text': ' Hello there',
+        'segments': [
+            {'start': 0.0, 'end': 1.5, 'text': ' Hello'},
+            {'start': 1.5, 'end': 2.0, 'text': ' there'}
+        ],
+        'language': 'en'
+    }
+
+def test_whisper_detect():
+    """Test probing a window for speech and its language with one decoding step."""
+    backend = WhisperBackend('base', 'cpu')
+    backend.model = MagicMock()
+    decoded = SimpleNamespace(language='de', language_probs={'en': 0.2, 'de': 0.7}, no_speech_prob=0.1)
+
+    with patch('whisper.log_mel_spectrogram') as mock_mel, \
+         patch('whisper.decode', return_value=decoded) as mock_decode:
+        # Call function
+        result = backend.detect(np.zeros(16000, dtype=np.float32))
+
+    # Verify
+    assert len(mock_mel.call_args[0][0]) == 30 * 16000
+    assert mock_decode.call_args[0][2].sample_len == 1
+    assert result == {'language': 'de', 'language_probability': 0.7, 'no_speech_prob': 0.1}
+
+def test_faster_whisper_detect():
+    """Test probing with faster-whisper."""
+    backend = FasterWhisperBackend('base', 'cpu')
+    backend.model = MagicMock()
+    backend.model.transcribe.return_value = (
+        iter([SimpleNamespace(no_speech_prob=0.9)]),
+        SimpleNamespace(language='en', language_probability=0.4)
+    )
+
+    # Call function
+    result = backend.detect(np.zeros(60 * 16000, dtype=np.float32))
+
+    # Verify
+    assert len(backend.model.transcribe.call_args[0][0]) == 30 * 16000
+    assert result == {'language': 'en', 'language_probability': 0.4, 'no_speech_prob': 0.9}
@@ -0,0 +1,180 @@
+import os
+import time
+import itertools
+import pytest
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import patch, MagicMock
+import src.transcription_pool as transcription_pool
+from src.transcription_pool import TranscriptionPool
+from src.audio import PcmRef
+
+def thread_executor(max_workers, mp_context, initializer, initargs):
+    """Stand-in for ProcessPoolExecutor that runs the workers as threads."""
+    return ThreadPoolExecutor(max_workers, initializer=initializer, initargs=initargs)
+
+@pytest.fixture
+def model():
+    """Load a mock model into the (thread) workers."""
+    model = MagicMock()
+    model.transcribe.return_value = {'text': 'hello', 'segments': []}
+    with patch.dict(os.environ), \
+         patch('whisper.load_model') as mock_load, \
+         patch('torch.set_num_threads'), \
+         patch('src.transcription_pool.ProcessPoolExecutor', side_effect=thread_executor) as mock_executor:
+        mock_load.return_value = model
+        model.load = mock_load
+        model.executor = mock_executor
+        yield model
+    transcription_pool._backend = None
+
+def test_init_worker_pins_threads(model):
+    """Test that a worker pins its torch threads and loads the model on the chosen device."""
+    with patch('torch.set_num_threads') as mock_threads:
+        # Call function
+        transcription_pool._init_worker('base', 'cpu', 2)
+
+    # Verify
+    mock_threads.assert_called_once_with(2)
+    assert os.environ['OMP_NUM_THREADS'] == '2'
+    model.load.assert_called_once_with('base', device='cpu')
+
+    transcription_pool._transcribe('clip.mp4', {'language': 'en'})
+    model.transcribe.assert_called_once_with('clip.mp4', fp16=False, language='en')
+
+def test_transcribe_maps_pcm(model, temp_dir):
+    """Test that a worker memory-maps PCM it is sent by reference."""
+    path = os.path.join(temp_dir, 'pcm.npy')
+    np.save(path, np.arange(10, dtype=np.float32))
+    transcription_pool._init_worker('base', 'cpu', 1)
+
+    # Call function
+    transcription_pool._transcribe(PcmRef(path, 2, 5), {})
+
+    # Verify
+    audio = model.transcribe.call_args[0][0]
+    np.testing.assert_array_equal(audio, [2, 3, 4])
+
+    # A list of ranges is transcribed as one stretch of audio
+    transcription_pool._transcribe([PcmRef(path, 0, 2), PcmRef(path, 8)], {})
+    audio = model.transcribe.call_args[0][0]
+    np.testing.assert_array_equal(audio, [0, 1, 8, 9])
+
+def test_threads_split_cores():
+    """Test that the cores are shared between the workers by default."""
+    with patch('src.transcription_pool.os.cpu_count') as mock_count:
+        mock_count.return_value = 8
+
+        # Verify
+        assert TranscriptionPool(workers=2).threads == 4
+        assert TranscriptionPool(workers=16).threads == 1
+        assert TranscriptionPool(workers=2, threads=3).threads == 3
+
+@pytest.mark.asyncio
+async def test_warmup_and_transcribe(model):
+    """Test warming the workers up and transcribing on them."""
+    pool = TranscriptionPool('base', workers=2, device='cpu')
+
+    # Call function; worker threads share a PID, so each ping answers with a new one
+    with patch('src.transcription_pool._ping', side_effect=itertools.count(101).__next__):
+        healthy = await pool.warmup()
+    result = await pool.transcribe('clip.mp4')
+    with patch('src.transcription_pool._detect', return_value={'language': 'en'}) as mock_detect:
+        probe = await pool.detect('clip.mp4')
+    pool.close()
+
+    # Verify
+    assert healthy
+    assert result == {'text': 'hello', 'segments': []}
+    assert probe['language'] == 'en'
+    mock_detect.assert_called_once_with('clip.mp4')
+    assert model.executor.call_count == 1
+
+@pytest.mark.asyncio
+async def test_dead_worker_is_replaced(model):
+    """Test that a broken pool is restarted and the job retried."""
+    pool = TranscriptionPool('base', device='cpu')
+    results = [BrokenProcessPool("worker died"), {'text': 'retried', 'segments': []}]
+
+    def transcribe(audio, options):
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    with patch('src.transcription_pool._transcribe', side_effect=transcribe):
+        # Call function
+        result = await pool.transcribe('clip.mp4')
+    pool.close()
+
+    # Verify
+    assert result['text'] == 'retried'
+    assert model.executor.call_count == 2
+
+@pytest.mark.asyncio
+async def test_unresponsive_workers_are_restarted(model):
+    """Test that workers failing a health check are replaced."""
+    pool = TranscriptionPool('base', device='cpu', ping_timeout=0.05)
+    pool.start()
+
+    with patch('src.transcription_pool._ping', side_effect=lambda: time.sleep(0.5)):
+        # Call function
+        healthy = await pool.check_health()
+    pool.close()
+
+    # Verify
+    assert not healthy
+    assert model.executor.call_count == 2
+
+@pytest.mark.asyncio
+async def test_health_check_waits_for_every_worker(model):
+    """Test that the health check only passes once each worker process has answered."""
+    pool = TranscriptionPool('base', workers=2, device='cpu')
+    pool.start()
+
+    # The first worker answers every ping while the second is still loading
+    pids = [101, 101, 101, 102]
+
+    with patch('src.transcription_pool._ping', side_effect=lambda: pids.pop(0)) as mock_ping:
+        # Call function
+        healthy = await pool.check_health()
+    answered = set(pool._pids)
+    pool.close()
+
+    # Verify
+    assert healthy
+    assert mock_ping.call_count == 4
+    assert answered == {101, 102}
+
+@pytest.mark.asyncio
+async def test_restart_terminates_old_workers(model):
+    """Test that restarting kills the pool's own worker processes and no others."""
+    pool = TranscriptionPool('base', device='cpu')
+    pool.start()
+    pool._pids = {101}
+    worker, other = MagicMock(pid=101), MagicMock(pid=202)
+
+    # Call function
+    with patch('src.transcription_pool.multiprocessing.active_children', return_value=[worker, other]):
+        pool.restart()
+    pool.close()
+
+    # Verify
+    worker.terminate.assert_called_once()
+    other.terminate.assert_not_called()
+    assert model.executor.call_count == 2
+
+def test_start_tracks_spawned_workers(model):
+    """Test that the processes started with the pool are tracked before they answer a ping."""
+    before, spawned = MagicMock(pid=100), MagicMock(pid=101)
+    pool = TranscriptionPool('base', device='cpu')
+
+    # Call function
+    with patch('src.transcription_pool.multiprocessing.active_children', side_effect=[[before], [before, spawned]]):
+        pool.start()
+    tracked = set(pool._pids)
+    pool.close()
+
+    # Verify
+    assert tracked == {101}
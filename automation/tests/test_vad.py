@@ -0,0 +1,83 @@
+import pytest
+import numpy as np
+from unittest.mock import patch
+from src.vad import EnergyVad, create_vad, merge_runs, offset_segments
+
+RATE = 16000
+
+def voiced(seconds: float) -> np.ndarray:
+    """Harmonic 'voice' whose loudness rises and falls like syllables (4 Hz)."""
+    t = np.arange(int(seconds * RATE)) / RATE
+    voice = sum(np.sin(2 * np.pi * f * t) / k for k, f in enumerate((150, 300, 450), 1))
+    return (0.3 * voice * np.sin(2 * np.pi * 4 * t) ** 2).astype(np.float32)
+
+def silence(seconds: float) -> np.ndarray:
+    """Faint background noise."""
+    rng = np.random.default_rng(0)
+    return (0.0005 * rng.standard_normal(int(seconds * RATE))).astype(np.float32)
+
+def test_finds_speech_between_silence():
+    """Test that speech regions are found in place and padded."""
+    pcm = np.concatenate([silence(2), voiced(1.5), silence(2), voiced(1), silence(1)])
+
+    # Call function
+    regions = EnergyVad().detect(pcm, RATE)
+
+    # Verify
+    assert len(regions) == 2
+    (first_start, first_end), (second_start, second_end) = regions
+    assert 1.7 * RATE <= first_start <= 2.0 * RATE
+    assert 3.4 * RATE <= first_end <= 3.8 * RATE
+    assert 5.2 * RATE <= second_start <= 5.5 * RATE
+    assert 6.4 * RATE <= second_end <= 6.8 * RATE
+
+def test_no_speech():
+    """Test that silence, hiss and steady tones are not speech."""
+    rng = np.random.default_rng(1)
+    t = np.arange(5 * RATE) / RATE
+    vad = EnergyVad()
+
+    # Verify
+    assert vad.detect(np.zeros(5 * RATE, dtype=np.float32), RATE) == []
+    assert vad.detect(silence(5), RATE) == []
+    assert vad.detect((0.3 * rng.standard_normal(5 * RATE)).astype(np.float32), RATE) == []
+    assert vad.detect((0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.float32), RATE) == []
+    assert vad.detect(np.zeros(10, dtype=np.float32), RATE) == []
+
+def test_merge_runs():
+    """Test that short gaps are bridged and short runs dropped."""
+    flags = np.array([1, 1, 0, 1, 1, 0, 0, 0, 1, 0, 0, 0, 1, 1, 1], dtype=bool)
+
+    # Call function
+    runs = merge_runs(flags, min_gap=2, min_length=2)
+
+    # Verify
+    assert runs == [(0, 5), (12, 15)]
+
+def test_offset_segments():
+    """Test mapping segments on the joined speech back to the original timeline."""
+    regions = [(2 * RATE, 4 * RATE), (10 * RATE, 11 * RATE)]
+    segments = [
+        {'start': 0.5, 'end': 2.0, 'text': 'first'},
+        {'start': 2.0, 'end': 2.5, 'text': 'second'},
+        {'start': 1.5, 'end': 2.5, 'text': 'across'}
+    ]
+
+    # Call function
+    result = offset_segments(segments, regions, RATE)
+
+    # Verify
+    assert [(s['start'], s['end']) for s in result] == [(2.5, 4.0), (10.0, 10.5), (3.5, 10.5)]
+    assert result[0]['text'] == 'first'
+
+def test_create_vad():
+    """Test choosing a detector from the settings."""
+    # Verify
+    assert isinstance(create_vad({}), EnergyVad)
+    assert create_vad({'vad': 'none'}) is None
+    with pytest.raises(ValueError):
+        create_vad({'vad': 'neural'})
+
+    # webrtcvad missing: fall back to the energy detector
+    with patch.dict('sys.modules', {'webrtcvad': None}):
+        assert isinstance(create_vad({'vad': 'webrtc'}), EnergyVad)
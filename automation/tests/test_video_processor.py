@@ -2,8 +2,11 @@ import pytest
 import asyncio
 from pathlib import Path
 import json
-from unittest.mock import patch, MagicMock
-from video_processor import VideoProcessor
+from unittest.mock import patch, MagicMock, AsyncMock
+import numpy as np
+from src.video_processor import VideoProcessor, _ProgressReporter, _rendition_size
+from src.reframe import CropPlan
+from src.subtitles import SubtitleTrack
 
 @pytest.fixture
 def test_config():
@@ -13,40 +16,46 @@ def test_config():
         return json.load(f)
 
 @pytest.fixture
-def processor(test_config):
+def processor(test_config, temp_dir):
     """Create a VideoProcessor instance with test configuration."""
-    with patch('video_processor.json.load') as mock_load:
-        mock_load.return_value = test_config
+    config = {
+        **test_config,
+        'cache': {'dir': temp_dir},
+        'state': {'probe_db_path': str(Path(temp_dir) / 'probe.db')}
+    }
+    with patch('src.video_processor.load_config') as mock_load:
+        mock_load.return_value = config
         return VideoProcessor()
 
 @pytest.mark.asyncio
 async def test_run_ffmpeg_command(processor):
     """Test running an FFmpeg command."""
-    with patch('video_processor.asyncio.create_subprocess_exec') as mock_subprocess:
+    with patch('src.video_processor.asyncio.create_subprocess_exec', new_callable=AsyncMock) as mock_subprocess:
         # Configure mock
         mock_process = MagicMock()
         mock_process.returncode = 0
-        mock_process.communicate.return_value = (b"", b"")
+        mock_process.communicate = AsyncMock(return_value=(b"output", b""))
         mock_subprocess.return_value = mock_process
         
         # Test command
         command = ['ffmpeg', '-i', 'input.mp4', 'output.mp4']
         
         # Call function
-        await processor._run_ffmpeg_command(command)
+        result = await processor._run_ffmpeg_command(command)
         
         # Verify
+        assert result == b"output"
         mock_subprocess.assert_called_once()
         mock_process.communicate.assert_called_once()
 
 @pytest.mark.asyncio
 async def test_run_ffmpeg_command_error(processor):
     """Test error handling in FFmpeg command execution."""
-    with patch('video_processor.asyncio.create_subprocess_exec') as mock_subprocess:
+    with patch('src.video_processor.asyncio.create_subprocess_exec', new_callable=AsyncMock) as mock_subprocess:
         # Configure mock to simulate error
         mock_process = MagicMock()
         mock_process.returncode = 1
-        mock_process.communicate.return_value = (b"", b"Error message")
+        mock_process.communicate = AsyncMock(return_value=(b"", b"Error message"))
         mock_subprocess.return_value = mock_process
         
         # Test command
@@ -60,80 +69,427 @@ async def test_run_ffmpeg_command_error(processor):
 @pytest.mark.asyncio
 async def test_process_video(processor):
     """Test processing a single video."""
-    with patch('video_processor.VideoProcessor._get_video_duration') as mock_duration, \
-         patch('video_processor.VideoProcessor._run_ffmpeg_command') as mock_ffmpeg:
-        # Configure mocks
-        mock_duration.return_value = 15.0  # Video duration in seconds
+    with patch('src.video_processor.VideoProcessor.process_video_outputs', new_callable=AsyncMock) as mock_outputs:
+        # Configure mock
+        mock_outputs.return_value = {'main': "processed_video.mp4", 'preview': "preview.mp4"}
         
-        # Test video path
-        video_path = "test_video.mp4"
+        # Call function
+        result = await processor.process_video("test_video.mp4")
         
+        # Verify
+        assert result == "processed_video.mp4"
+        mock_outputs.assert_called_once()
+
+def test_add_watermark(processor):
+    """Test adding watermark to a frame."""
+    frame = np.zeros((64, 36, 3), dtype=np.uint8)
+    processor.overlay = MagicMock()
+    processor.overlay.apply.return_value = frame + 1
+    
+    # Call function
+    result = processor._add_watermark(frame, 36, 64)
+    
+    # Verify
+    processor.overlay.apply.assert_called_once_with(frame)
+    assert (result == 1).all()
+
+def test_add_subtitles(processor):
+    """Test building the subtitle track to burn in."""
+    subtitles = [{'start': 0.0, 'end': 1.5, 'text': "Hello"}]
+    
+    # Call function
+    processor.burn_subtitles = True
+    track = processor._subtitle_track(subtitles)
+    processor.burn_subtitles = False
+    disabled = processor._subtitle_track(subtitles)
+    
+    # Verify
+    assert isinstance(track, SubtitleTrack)
+    assert disabled is None
+
+@pytest.mark.asyncio
+async def test_process_video_missing_file(processor):
+    """Test that a missing video is not processed."""
+    with patch('src.video_processor.VideoProcessor._probe') as mock_probe:
         # Call function
-        result = await processor.process_video(video_path)
+        result = await processor.process_video_outputs("missing_video.mp4")
         
         # Verify
-        assert result is not None
-        mock_ffmpeg.assert_called_once()
+        assert result is None
+        mock_probe.assert_not_called()
 
 @pytest.mark.asyncio
-async def test_add_watermark(processor):
-    """Test adding watermark to video."""
-    with patch('video_processor.VideoProcessor._run_ffmpeg_command') as mock_ffmpeg:
-        # Test paths
-        input_path = "input.mp4"
-        output_path = "output.mp4"
+async def test_process_video_error_handling(processor, temp_dir):
+    """Test error handling in processing a video."""
+    video_path = Path(temp_dir) / "video.mp4"
+    video_path.write_bytes(b"not a video")
+    
+    with patch('src.video_processor.VideoProcessor._probe') as mock_probe:
+        # Configure mock to simulate error
+        mock_probe.side_effect = Exception("Processing error")
         
         # Call function
-        await processor.add_watermark(input_path, output_path)
+        result = await processor.process_video_outputs(str(video_path))
         
         # Verify
-        mock_ffmpeg.assert_called_once()
+        assert result is None
+        mock_probe.assert_called_once()
 
-@pytest.mark.asyncio
-async def test_add_subtitles(processor):
-    """Test adding subtitles to video."""
-    with patch('video_processor.VideoProcessor._run_ffmpeg_command') as mock_ffmpeg:
-        # Test paths
-        video_path = "input.mp4"
-        subtitle_path = "subtitles.srt"
-        output_path = "output.mp4"
+def test_plan_segments_splits_across_workers(processor):
+    """Test splitting a long video into one frame range per worker."""
+    processor.processing_settings = {'workers': 4, 'min_segment_seconds': 5}
+    
+    with patch('src.video_processor.shutil.which') as mock_which:
+        mock_which.return_value = '/usr/bin/ffmpeg'
         
         # Call function
-        await processor.add_subtitles(video_path, subtitle_path, output_path)
+        segments = processor._plan_segments(0, None, 1200, 30.0)
+    
+    # Verify
+    assert segments == [(0, 300), (300, 600), (600, 900), (900, None)]
+
+def test_plan_segments_short_video_is_serial(processor):
+    """Test that short videos are not split."""
+    processor.processing_settings = {'workers': 4, 'min_segment_seconds': 5}
+    
+    with patch('src.video_processor.shutil.which') as mock_which:
+        mock_which.return_value = '/usr/bin/ffmpeg'
+        
+        # Call function
+        segments = processor._plan_segments(0, None, 200, 30.0)
+    
+    # Verify
+    assert segments == [(0, None)]
+
+def test_plan_segments_without_ffmpeg_is_serial(processor):
+    """Test that segments are not split when they cannot be concatenated."""
+    processor.processing_settings = {'workers': 4, 'min_segment_seconds': 5}
+    
+    with patch('src.video_processor.shutil.which') as mock_which:
+        mock_which.return_value = None
+        
+        # Call function
+        segments = processor._plan_segments(0, None, 1200, 30.0)
+    
+    # Verify
+    assert segments == [(0, None)]
+
+def test_use_ffmpeg_backend(processor):
+    """Test choosing between the FFmpeg and OpenCV backends."""
+    with patch('src.video_processor.shutil.which') as mock_which:
+        mock_which.return_value = '/usr/bin/ffmpeg'
+        
+        processor.processing_settings = {'backend': 'ffmpeg'}
+        assert processor._use_ffmpeg()
+        
+        processor.processing_settings = {'backend': 'opencv'}
+        assert not processor._use_ffmpeg()
+        
+        # Fall back to OpenCV when FFmpeg is missing
+        mock_which.return_value = None
+        processor.processing_settings = {'backend': 'ffmpeg'}
+        assert not processor._use_ffmpeg()
+
+@pytest.mark.asyncio
+async def test_render_ffmpeg_command(processor, temp_dir):
+    """Test that the FFmpeg backend renders with one libx264 filtergraph."""
+    processor.processed_dir = Path(temp_dir)
+    
+    with patch('src.video_processor.VideoProcessor._run_ffmpeg_command', new_callable=AsyncMock) as mock_ffmpeg:
+        # Call function
+        await processor._render_ffmpeg("input.mp4", "output.mp4", (1080, 1920))
         
         # Verify
-        mock_ffmpeg.assert_called_once()
+        command = mock_ffmpeg.call_args[0][0]
+        assert command[0] == 'ffmpeg'
+        assert 'libx264' in command
+        assert command[-1] == 'output.mp4'
+        filtergraph = command[command.index('-filter_complex') + 1]
+        assert 'overlay=' in filtergraph
+        assert filtergraph.endswith('[out]')
+        assert command[command.index('-c:a') + 1] == 'copy'
+        assert '0:a?' in command
 
 @pytest.mark.asyncio
-async def test_process_videos(processor):
-    """Test processing multiple videos."""
-    with patch('video_processor.VideoProcessor.process_video') as mock_process:
-        # Configure mock
-        mock_process.return_value = "processed_video.mp4"
+async def test_render_ffmpeg_reframes(processor, temp_dir):
+    """Test that a moving crop window is scripted with sendcmd before scaling."""
+    processor.processed_dir = Path(temp_dir)
+    crop_plan = CropPlan(404, 720, 0, 30.0, np.array([0.0, 1.0]), np.array([0, 300]))
+    
+    with patch('src.video_processor.VideoProcessor._run_ffmpeg_command', new_callable=AsyncMock) as mock_ffmpeg:
+        # Call function
+        await processor._render_ffmpeg("input.mp4", "output.mp4", (1080, 1920), 0.0, 2.0, crop_plan, 60)
         
-        # Test video paths
-        video_paths = ["video1.mp4", "video2.mp4"]
+        # Verify
+        command = mock_ffmpeg.call_args[0][0]
+        filtergraph = command[command.index('-filter_complex') + 1]
+        assert filtergraph.startswith('[0:v]sendcmd=')
+        assert 'crop=404:720:0:0,scale=1080:1920' in filtergraph
+
+@pytest.mark.asyncio
+async def test_render_serial_muxes_source_audio(processor, temp_dir):
+    """Test that the OpenCV backend stream-copies the source audio window."""
+    processor.processed_dir = Path(temp_dir)
+    
+    with patch('src.video_processor.VideoProcessor._run_segments', new_callable=AsyncMock) as mock_render, \
+         patch('src.video_processor.shutil.which') as mock_which, \
+         patch('src.video_processor.VideoProcessor._run_ffmpeg_command', new_callable=AsyncMock) as mock_ffmpeg:
+        mock_which.return_value = '/usr/bin/ffmpeg'
+        mock_render.return_value = [300]
         
         # Call function
-        results = await processor.process_videos(video_paths)
+        frames = await processor._render_serial("input.mp4", "output.mp4", 300, 600, 30.0, (1080, 1920))
         
         # Verify
-        assert len(results) == 2
-        assert mock_process.call_count == 2
+        assert frames == 300
+        mock_render.assert_called_once()
+        command = mock_ffmpeg.call_args[0][0]
+        assert command[command.index('-ss') + 1] == '10.000'
+        assert command[command.index('-t') + 1] == '10.000'
+        assert ['-map', '1:a?', '-c:a', 'copy'] == command[-5:-1]
+        assert command[command.index('-c:v') + 1] == 'copy'
+
+def test_audio_can_be_dropped(processor):
+    """Test disabling the audio track."""
+    processor.processing_settings = {'keep_audio': False}
+    
+    # Verify
+    assert processor._audio_input("input.mp4", 10.0, 5.0) == []
+    assert processor._audio_output_options(1) == ['-an']
 
 @pytest.mark.asyncio
-async def test_process_videos_error_handling(processor):
-    """Test error handling in processing multiple videos."""
-    with patch('video_processor.VideoProcessor.process_video') as mock_process:
-        # Configure mock to simulate error
-        mock_process.side_effect = Exception("Processing error")
+async def test_render_ffmpeg_reports_progress(processor, temp_dir):
+    """Test that FFmpeg's progress output is forwarded to the callback."""
+    processor.processed_dir = Path(temp_dir)
+    updates = []
+    reporter = _ProgressReporter("input.mp4", 60, updates.append, interval=0)
+    
+    async def run_ffmpeg(command, on_frames):
+        for frames in (20, 40, 60):
+            on_frames(frames)
+        return b""
+    
+    with patch('src.video_processor.VideoProcessor._run_ffmpeg_command', side_effect=run_ffmpeg) as mock_ffmpeg:
+        # Call function
+        frames = await processor._render_ffmpeg("input.mp4", "output.mp4", (1080, 1920), reporter=reporter)
+    
+    # Verify
+    command = mock_ffmpeg.call_args[0][0]
+    assert command[command.index('-progress') + 1] == 'pipe:1'
+    assert frames == 60
+    assert [update['frames'] for update in updates] == [20, 40, 60]
+    assert updates[-1]['total'] == 60
+
+def test_progress_reporter_sums_jobs():
+    """Test that progress from parallel jobs is added up and throttled."""
+    updates = []
+    reporter = _ProgressReporter("input.mp4", 100, updates.append, interval=60)
+    
+    # Call function
+    reporter.update(0, 10)
+    reporter.update(1, 30)
+    reporter.finish(100)
+    
+    # Verify
+    assert [update['frames'] for update in updates] == [10, 100]
+    assert updates[0]['video'] == "input.mp4"
+
+def test_rendition_size_keeps_aspect_ratio():
+    """Test sizing renditions from one or both sides."""
+    assert _rendition_size({'width': 360, 'height': 640}, (1080, 1920)) == (360, 640)
+    assert _rendition_size({'height': 640}, (1080, 1920)) == (360, 640)
+    assert _rendition_size({'width': 405}, (1080, 1920)) == (405, 720)
+    assert _rendition_size({}, (1080, 1920)) == (1080, 1920)
+
+def test_plan_outputs(processor):
+    """Test resolving rendition specs, clamping posters to short clips."""
+    specs = [
+        {'name': 'preview', 'height': 640, 'crf': 28},
+        {'name': 'poster', 'type': 'poster', 'at': 5.0}
+    ]
+    paths = {spec['name']: processor._rendition_path("clip.mp4", spec) for spec in specs}
+    
+    # Call function
+    outputs = processor._plan_outputs(specs, paths, (1080, 1920), 300, 61, 30.0)
+    
+    # Verify
+    assert outputs[0] == {'kind': 'video', 'path': paths['preview'], 'size': (360, 640), 'crf': 28}
+    assert outputs[1]['path'].endswith('processed_clip_poster.jpg')
+    assert outputs[1]['at'] == pytest.approx(2.0)
+    assert outputs[1]['frame'] == 360
+
+def test_rendition_specs_skip_invalid(processor):
+    """Test that unnamed, reserved or unknown renditions are ignored."""
+    specs = processor._rendition_specs([
+        {'name': 'preview'}, {'height': 640}, {'name': 'main'}, {'name': 'gif', 'type': 'gif'}
+    ])
+    
+    # Verify
+    assert specs == [{'name': 'preview'}]
+
+def test_restore_outputs_follows_manifest(processor, temp_dir):
+    """Test that a cached render missing an optional rendition is still a hit."""
+    rendered = {'main': str(Path(temp_dir) / "main.mp4"), 'preview': str(Path(temp_dir) / "preview.mp4")}
+    for path in rendered.values():
+        Path(path).write_bytes(b"video")
+    processor._store_outputs("key", rendered)
+    
+    # Call function
+    paths = {name: str(Path(temp_dir) / "restored" / f"{name}.mp4") for name in ('main', 'preview', 'poster')}
+    Path(temp_dir, "restored").mkdir()
+    hit = processor._restore_outputs("key", paths)
+    miss = processor._restore_outputs("other", dict(paths))
+    
+    # Verify
+    assert hit is True
+    assert sorted(paths) == ['main', 'preview']
+    assert Path(paths['preview']).read_bytes() == b"video"
+    assert miss is False
+
+@pytest.mark.asyncio
+async def test_render_ffmpeg_renditions(processor, temp_dir):
+    """Test that renditions are split off the main video in the same command."""
+    processor.processed_dir = Path(temp_dir)
+    extra_outputs = [
+        {'kind': 'video', 'path': 'preview.mp4', 'size': (360, 640), 'crf': 28},
+        {'kind': 'poster', 'path': 'poster.jpg', 'size': (1080, 1920), 'at': 1.0, 'frame': 30}
+    ]
+    
+    with patch('src.video_processor.VideoProcessor._run_ffmpeg_command', new_callable=AsyncMock) as mock_ffmpeg:
+        # Call function
+        await processor._render_ffmpeg(
+            "input.mp4", "output.mp4", (1080, 1920), extra_outputs=extra_outputs
+        )
         
-        # Test video paths
-        video_paths = ["video1.mp4", "video2.mp4"]
+        # Verify
+        command = mock_ffmpeg.call_args[0][0]
+        assert command.count('-i') == 2
+        filtergraph = command[command.index('-filter_complex') + 1]
+        assert 'split=3[out][s0][s1]' in filtergraph
+        assert '[s0]scale=360:640,setsar=1[r0]' in filtergraph
+        assert '[s1]trim=start=1.000' in filtergraph
+        assert command[command.index('[r0]') + 1:].count('28') == 1
+        assert command[-1] == 'poster.jpg'
+
+def test_frames_per_second(processor):
+    """Test the render throughput counter."""
+    assert processor.frames_per_second == 0.0
+    
+    # Call function
+    processor._record_throughput("a.mp4", 300, 2.0)
+    processor._record_throughput("b.mp4", 100, 2.0)
+    
+    # Verify
+    assert processor.frames_per_second == 100.0
+
+def test_output_size_follows_reframe_setting(processor):
+    """Test that reframed output uses the target resolution."""
+    processor.video_settings = {'target_resolution': {'width': 1080, 'height': 1920}}
+    assert processor._output_size(1280, 720) == (1080, 1920)
+    
+    processor.video_settings = {'target_resolution': {'width': 1080, 'height': 1920}, 'reframe': False}
+    assert processor._output_size(1280, 720) == (1280, 720)
+
+def test_plan_segments_within_window(processor):
+    """Test that parallel ranges stay inside the kept window."""
+    processor.processing_settings = {'workers': 2, 'min_segment_seconds': 5}
+    
+    with patch('src.video_processor.shutil.which') as mock_which:
+        mock_which.return_value = '/usr/bin/ffmpeg'
         
         # Call function
-        results = await processor.process_videos(video_paths)
+        segments = processor._plan_segments(600, 2400, 36000, 30.0)
+    
+    # Verify
+    assert segments == [(600, 1500), (1500, 2400)]
+
+def test_select_window_caps_to_max_duration(processor):
+    """Test that long videos are cut to max_duration frames."""
+    processor.video_settings = {'max_duration': 60, 'window_selection': 'start'}
+    
+    # Verify
+    assert processor._select_window("long.mp4", 30.0, 36000) == (0, 1800)
+    assert processor._select_window("short.mp4", 30.0, 300) == (0, 1800)
+    
+    processor.video_settings = {}
+    assert processor._select_window("long.mp4", 30.0, 36000) == (0, None)
+
+def test_select_window_motion(processor):
+    """Test picking the most active window with the pre-pass."""
+    processor.video_settings = {'max_duration': 60, 'window_selection': 'motion'}
+    
+    with patch('src.video_processor._find_active_window') as mock_find:
+        mock_find.return_value = 900
+        
+        # Call function
+        window = processor._select_window("long.mp4", 30.0, 36000)
+    
+    # Verify
+    assert window == (900, 2700)
+
+def test_select_window_scenes(processor):
+    """Test starting the window at the cut into the most active scenes."""
+    processor.video_settings = {'max_duration': 60, 'window_selection': 'scenes'}
+    scenes = [
+        {'start': 0.0, 'end': 300.0, 'score': 1.0},
+        {'start': 300.0, 'end': 330.0, 'score': 20.0},
+        {'start': 330.0, 'end': 1200.0, 'score': 2.0}
+    ]
+    
+    with patch.object(processor.scene_detector, 'detect') as mock_detect:
+        mock_detect.return_value = scenes
+        
+        # Call function
+        window = processor._select_window("long.mp4", 30.0, 36000)
+    
+    # Verify
+    mock_detect.assert_called_once_with("long.mp4", 30.0, 36000)
+    assert window == (9000, 10800)
+
+@pytest.mark.asyncio
+async def test_render_ffmpeg_burns_subtitles(processor, temp_dir):
+    """Test that subtitles are overlaid in the same filtergraph as the watermark."""
+    processor.processed_dir = Path(temp_dir)
+    track = SubtitleTrack([{'start': 5.0, 'end': 7.0, 'text': 'Hello there'}])
+    
+    with patch('src.video_processor.VideoProcessor._run_ffmpeg_command', new_callable=AsyncMock) as mock_ffmpeg:
+        # Call function
+        await processor._render_ffmpeg(
+            "input.mp4", "output.mp4", (1080, 1920), 4.0, 10.0, subtitles=track
+        )
         
         # Verify
-        assert len(results) == 0
-        assert mock_process.call_count == 2 
\ No newline at end of file
+        command = mock_ffmpeg.call_args[0][0]
+        assert command.count('-i') == 3
+        assert command[command.index('concat') + 4].endswith('subtitles.ffconcat')
+        filtergraph = command[command.index('-filter_complex') + 1]
+        assert '[w];[w][2:v]overlay=0:' in filtergraph
+        assert filtergraph.endswith('[out]')
+
+@pytest.mark.asyncio
+async def test_render_ffmpeg_skips_subtitles_outside_window(processor, temp_dir):
+    """Test that no subtitle input is added when nothing is said in the kept window."""
+    processor.processed_dir = Path(temp_dir)
+    track = SubtitleTrack([{'start': 70.0, 'end': 72.0, 'text': 'Too late'}])
+    
+    with patch('src.video_processor.VideoProcessor._run_ffmpeg_command', new_callable=AsyncMock) as mock_ffmpeg:
+        # Call function
+        await processor._render_ffmpeg(
+            "input.mp4", "output.mp4", (1080, 1920), 0.0, 60.0, subtitles=track
+        )
+        
+        # Verify
+        command = mock_ffmpeg.call_args[0][0]
+        assert command.count('-i') == 2
+        assert '[2:v]' not in command[command.index('-filter_complex') + 1]
+
+def test_subtitle_track_follows_setting(processor):
+    """Test that segments are only burned in when burn_subtitles is enabled."""
+    segments = [{'start': 0.0, 'end': 1.0, 'text': 'Hi'}]
+    
+    processor.burn_subtitles = False
+    assert processor._subtitle_track(segments) is None
+    
+    processor.burn_subtitles = True
+    assert processor._subtitle_track([]) is None
+    assert processor._subtitle_track(segments).segments == segments